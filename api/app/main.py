@@ -1,30 +1,107 @@
-from datetime import datetime
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
 from typing import Annotated, Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, WebSocket
 from fastapi.openapi.docs import get_redoc_html
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from prometheus_fastapi_instrumentator import Instrumentator
+from pydantic import BaseModel
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.db import SessionLocal, engine, get_db
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
 from app.repositories import earthquakes as earthquake_repo
+from app.repositories import nearby as nearby_repo
+from app.repositories import stats as stats_repo
+from app.repositories import tiles as tiles_repo
 from app.schemas import (
     CircuitBreakerStatusResponse,
+    ClusterResponse,
+    DepthStatsResponse,
     EarthquakeDetailResponse,
+    EarthquakeItem,
     EarthquakeListResponse,
     HealthResponse,
+    MagnitudeStatsResponse,
+    NearbyEarthquakeResponse,
     ReadyResponse,
+    TimeSeriesResponse,
 )
+from app.serialization import list_response_content
 from app.services.circuit_breaker import CircuitBreaker
+from app.services.columnar_store import ColumnarStore
+from app.services.export import MEDIA_TYPES, ExportFormat, encode_export
+from app.services.freshness import FreshnessCache
+from app.services.live_feed import FeedMessage, LiveFeed, PollResult
+from app.services.result_cache import ResultCache
+from app.services.single_flight import SingleFlightCache
+from app.services import shared_state, usgs_client
 from app.services.usgs_client import USGSClientError, fetch_earthquakes as fetch_usgs_earthquakes
 from app.settings import settings
 
+
+# Global data_fresh_as_of cache, invalidated by the loader's NOTIFY
+freshness_cache = FreshnessCache(ttl_secs=settings.freshness_ttl_secs)
+
+# Global list/detail response cache; entries go stale when the freshness watermark is invalidated
+result_cache = (
+    ResultCache(
+        max_entries=settings.result_cache_max_entries,
+        max_bytes=settings.result_cache_max_bytes,
+        ttl_secs=settings.result_cache_ttl_secs,
+    )
+    if settings.result_cache_enabled
+    else None
+)
+
+# Optional in-memory copy of stg_earthquakes; queries fall back to SQL while it is cold or stale
+columnar_store = (
+    ColumnarStore(
+        freshness_cache,
+        SessionLocal,
+        max_staleness_secs=settings.columnar_store_max_staleness_secs,
+        lookback_secs=settings.columnar_store_lookback_secs,
+        batch_size=settings.export_batch_size,
+    )
+    if settings.columnar_store_enabled
+    else None
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await usgs_client.open_client()
+    if columnar_store is not None:
+        columnar_store.schedule_refresh()
+    listener = None
+    if settings.freshness_listen_enabled:
+        listener = asyncio.create_task(
+            freshness_cache.listen(settings.database_url, settings.ingest_notify_channel)
+        )
+    yield
+    if listener is not None:
+        listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await listener
+    if columnar_store is not None:
+        await columnar_store.close()
+    await live_feed.close()
+    await usgs_client.close_client()
+    await engine.dispose()
+
+
 app = FastAPI(
     title="Earthquake API",
     description="Read-only API for earthquake data from Postgres with optional live USGS data",
     version="1.0.0",
     redoc_url=None,  # Disable default ReDoc to use custom route
+    lifespan=lifespan,
 )
 
 
@@ -40,150 +117,290 @@ async def redoc_html():
 
 # Prometheus metrics instrumentation
 Instrumentator(
-    excluded_handlers=["/metrics", "/health"],
+    # Long-lived streams would swamp the request duration histograms
+    excluded_handlers=["/metrics", "/health", "/earthquakes/live/stream"],
 ).instrument(app).expose(app, include_in_schema=False)
 
-# Global circuit breaker instance
+# Global circuit breaker instance, shared by all workers unless SHARED_STATE_BACKEND=memory
 circuit_breaker = CircuitBreaker(
     failure_threshold=settings.cb_failure_threshold,
     recovery_secs=settings.cb_recovery_secs,
+    store=shared_state.breaker_store(),
+    probe_timeout_secs=settings.cb_probe_timeout_secs,
+)
+
+# Identical concurrent /earthquakes/live calls share one USGS fetch; results are
+# also published to the other workers when a shared backend is configured
+live_flights = SingleFlightCache(
+    ttl_secs=settings.live_cache_ttl_secs,
+    max_entries=settings.live_cache_max_entries,
+    shared=shared_state.live_cache(),
+    encode=lambda items: [item.model_dump(mode="json") for item in items],
+    decode=lambda data: [EarthquakeItem(**item) for item in data],
 )
 
 
+async def _poll_live_feed() -> PollResult:
+    """One live feed poll: recent events from USGS through the circuit breaker, else from the database."""
+    start = datetime.utcnow() - timedelta(seconds=settings.live_feed_window_secs)
+    if await circuit_breaker.should_allow_request():
+        try:
+            items = await fetch_usgs_earthquakes(
+                start=start,
+                limit=settings.live_feed_limit,
+                deadline=time.monotonic() + settings.live_slo_secs - settings.live_fallback_reserve_secs,
+            )
+        except USGSClientError:
+            await circuit_breaker.record_failure()
+        else:
+            await circuit_breaker.record_success()
+            return items, "usgs"
+
+    async with SessionLocal() as db:
+        items = await earthquake_repo.get_earthquakes(
+            db=db, start=start, limit=settings.live_feed_limit, offset=0, order="desc"
+        )
+    return items, "db_fallback"
+
+
+# Push feed for /earthquakes/live/stream and /earthquakes/live/ws; polls only while clients are connected
+live_feed = LiveFeed(
+    _poll_live_feed,
+    interval_secs=settings.live_feed_interval_secs,
+    queue_size=settings.live_feed_queue_size,
+    heartbeat_secs=settings.live_feed_heartbeat_secs,
+)
+
+
+BBoxQuery = Annotated[
+    str | None,
+    Query(
+        description="Bounding box as min_lon,min_lat,max_lon,max_lat",
+        pattern=r"^-?\d+\.?\d*,-?\d+\.?\d*,-?\d+\.?\d*,-?\d+\.?\d*$",
+    ),
+]
+
+
+def _parse_bbox(bbox: str | None) -> tuple[float, float, float, float] | None:
+    """Parse a validated bbox query string into (min_lon, min_lat, max_lon, max_lat)."""
+    if not bbox:
+        return None
+    coords = [float(x) for x in bbox.split(",")]
+    return (coords[0], coords[1], coords[2], coords[3])
+
+
 @app.get("/health", response_model=HealthResponse)
-def health():
+async def health():
     """Health check endpoint."""
     return HealthResponse(status="ok")
 
 
 @app.get("/ready", response_model=ReadyResponse)
-def ready(db: Session = Depends(get_db)):
+async def ready(db: AsyncSession = Depends(get_db)):
     """Readiness check - verifies database connectivity."""
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return ReadyResponse(status="ok", db="ok")
     except Exception:
         return ReadyResponse(status="degraded", db="down")
 
 
 @app.get("/circuit-breaker/status", response_model=CircuitBreakerStatusResponse)
-def circuit_breaker_status():
+async def circuit_breaker_status():
     """Get current circuit breaker state and metrics."""
-    return CircuitBreakerStatusResponse(**circuit_breaker.get_status())
+    return CircuitBreakerStatusResponse(**await circuit_breaker.get_status())
+
+
+async def _cached_response(
+    request: Request, params: dict, build: Callable[[], Awaitable[BaseModel | dict]]
+) -> BaseModel | Response:
+    """
+    Serve a response from the result cache, building and caching it on a miss.
+
+    build may return a model or a plain dict from the fast serialization path;
+    dicts are encoded with orjson and skip response_model validation.
+    Cached bodies carry a strong ETag; a matching If-None-Match gets a 304
+    without touching the database.
+    """
+    if result_cache is None:
+        content = await build()
+        return ORJSONResponse(content) if isinstance(content, dict) else content
+
+    key = result_cache.key(request.url.path, params)
+    if_none_match = request.headers.get("if-none-match")
+    # Read before building so data loaded mid-query marks this entry stale
+    generation = freshness_cache.generation
+
+    entry = result_cache.get(key, generation)
+    if entry is not None:
+        return entry.response(if_none_match, cache_status="HIT")
+
+    content = await build()
+    if isinstance(content, dict):
+        body = orjson.dumps(content)
+    else:
+        body = content.model_dump_json().encode()
+    entry = result_cache.put(key, body, generation)
+    return entry.response(if_none_match, cache_status="MISS")
 
 
 @app.get("/earthquakes", response_model=EarthquakeListResponse)
-def list_earthquakes(
-    db: Session = Depends(get_db),
+async def list_earthquakes(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
     end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
     min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
     max_magnitude: float | None = Query(None, ge=0, le=10, description="Maximum magnitude"),
-    bbox: Annotated[
-        str | None,
-        Query(
-            description="Bounding box as min_lon,min_lat,max_lon,max_lat",
-            pattern=r"^-?\d+\.?\d*,-?\d+\.?\d*,-?\d+\.?\d*,-?\d+\.?\d*$",
-        ),
-    ] = None,
+    bbox: BBoxQuery = None,
     limit: int = Query(50, ge=1, le=200, description="Maximum results to return"),
     offset: int = Query(0, ge=0, le=5000, description="Number of results to skip"),
     order: Literal["asc", "desc"] = Query("desc", description="Sort order by time"),
+    cursor: str | None = Query(None, description="Opaque next_cursor from a previous page"),
 ):
     """
     List earthquakes from the database.
 
     Supports filtering by time range, magnitude range, and bounding box.
-    Results are paginated with limit/offset.
+    Results are paginated with limit/offset, or with keyset cursors: pass the
+    next_cursor of one page as cursor to get the next, at any depth.
     """
-    parsed_bbox = None
-    if bbox:
-        coords = [float(x) for x in bbox.split(",")]
-        parsed_bbox = (coords[0], coords[1], coords[2], coords[3])
+    parsed_bbox = _parse_bbox(bbox)
 
-    items = earthquake_repo.get_earthquakes(
-        db=db,
-        start=start,
-        end=end,
-        min_magnitude=min_magnitude,
-        max_magnitude=max_magnitude,
-        bbox=parsed_bbox,
-        limit=limit,
-        offset=offset,
-        order=order,
-    )
-
-    data_fresh_as_of = earthquake_repo.get_max_event_time(db)
-
-    return EarthquakeListResponse(
-        source="db",
-        data_fresh_as_of=data_fresh_as_of,
-        count=len(items),
-        limit=limit,
-        offset=offset,
-        items=items,
-    )
+    after = None
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=400, detail="cursor and offset cannot be combined")
+        try:
+            after = decode_cursor(cursor, order)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def build() -> dict:
+        # One extra row tells whether another page exists
+        query = dict(
+            start=start,
+            end=end,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+            bbox=parsed_bbox,
+            limit=limit + 1,
+            offset=offset,
+            order=order,
+            after=after,
+        )
+        rows = columnar_store.get_rows(**query) if columnar_store is not None else None
+        if rows is None:
+            rows = await earthquake_repo.get_earthquake_rows(db=db, **query)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].time, rows[-1].id, order)
+
+        data_fresh_as_of = await freshness_cache.get(db)
+
+        # Rows go straight to JSON; response_model stays for the OpenAPI schema
+        return list_response_content(
+            rows,
+            source="db",
+            data_fresh_as_of=data_fresh_as_of,
+            limit=limit,
+            offset=offset,
+            next_cursor=next_cursor,
+        )
+
+    params = {
+        "start": start,
+        "end": end,
+        "min_magnitude": min_magnitude,
+        "max_magnitude": max_magnitude,
+        "bbox": parsed_bbox,
+        "limit": limit,
+        "offset": offset,
+        "order": order,
+        "cursor": cursor,
+    }
+    return await _cached_response(request, params, build)
 
 
 @app.get("/earthquakes/live", response_model=EarthquakeListResponse)
-def list_live_earthquakes(
-    db: Session = Depends(get_db),
+async def list_live_earthquakes(
+    db: AsyncSession = Depends(get_db),
     start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
     end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
     min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
-    bbox: Annotated[
-        str | None,
-        Query(
-            description="Bounding box as min_lon,min_lat,max_lon,max_lat",
-            pattern=r"^-?\d+\.?\d*,-?\d+\.?\d*,-?\d+\.?\d*,-?\d+\.?\d*$",
-        ),
-    ] = None,
+    bbox: BBoxQuery = None,
     limit: int = Query(50, ge=1, le=200, description="Maximum results to return"),
 ):
     """
     Fetch live earthquake data from USGS API with circuit breaker protection.
 
+    Identical concurrent requests share one USGS fetch, and results are reused
+    for a few seconds; cache_status tells which happened.
     If USGS is unavailable or circuit breaker is open, falls back to database.
+    USGS gets LIVE_SLO_SECS minus the fallback reserve, so a slow upstream
+    still leaves time for the fallback query.
     Response includes breaker_state and fallback_reason when applicable.
     """
-    parsed_bbox = None
-    if bbox:
-        coords = [float(x) for x in bbox.split(",")]
-        parsed_bbox = (coords[0], coords[1], coords[2], coords[3])
+    parsed_bbox = _parse_bbox(bbox)
+    deadline = time.monotonic() + settings.live_slo_secs - settings.live_fallback_reserve_secs
 
-    breaker_state = circuit_breaker.state.value
-    fallback_reason = None
+    key = ResultCache.key(
+        "/earthquakes/live",
+        {"start": start, "end": end, "min_magnitude": min_magnitude, "bbox": parsed_bbox, "limit": limit},
+    )
 
-    # Check if circuit breaker allows the request
-    if circuit_breaker.should_allow_request():
+    async def fetch_live() -> list:
+        # Runs once per flight, so the breaker sees one outcome per upstream call
         try:
-            items = fetch_usgs_earthquakes(
+            items = await fetch_usgs_earthquakes(
                 start=start,
                 end=end,
                 min_magnitude=min_magnitude,
                 bbox=parsed_bbox,
                 limit=limit,
+                deadline=deadline,
             )
-            circuit_breaker.record_success()
+        except USGSClientError:
+            await circuit_breaker.record_failure()
+            raise
+        await circuit_breaker.record_success()
+        return items
 
-            return EarthquakeListResponse(
-                source="usgs",
-                data_fresh_as_of=datetime.utcnow(),
-                count=len(items),
-                limit=limit,
-                offset=0,
-                items=items,
-                breaker_state=circuit_breaker.state.value,
-            )
-        except USGSClientError as e:
-            circuit_breaker.record_failure()
-            fallback_reason = str(e)
-            breaker_state = circuit_breaker.state.value
+    fallback_reason = None
+
+    result = await live_flights.get(key)
+    if result is None:
+        # Joining a running fetch adds no upstream call, so it needs no permission
+        # from the breaker; in half-open that fetch is the probe, and its waiters
+        # get its result instead of falling back
+        if live_flights.in_flight(key) or await circuit_breaker.should_allow_request():
+            try:
+                result = await live_flights.fetch(key, fetch_live)
+            except USGSClientError as e:
+                fallback_reason = str(e)
+        else:
+            fallback_reason = "Circuit breaker is open"
+        # The claim or the fetch's outcome just went through the store
+        breaker_state = circuit_breaker.last_state.value
     else:
-        fallback_reason = "Circuit breaker is open"
+        breaker_state = (await circuit_breaker.get_state()).value
+
+    if result is not None:
+        return EarthquakeListResponse(
+            source="usgs",
+            data_fresh_as_of=result.fetched_at,
+            count=len(result.value),
+            limit=limit,
+            offset=0,
+            items=result.value,
+            breaker_state=breaker_state,
+            cache_status=result.cache_status,
+        )
 
     # Fallback to database
-    items = earthquake_repo.get_earthquakes(
+    items = await earthquake_repo.get_earthquakes(
         db=db,
         start=start,
         end=end,
@@ -194,7 +411,7 @@ def list_live_earthquakes(
         order="desc",
     )
 
-    data_fresh_as_of = earthquake_repo.get_max_event_time(db)
+    data_fresh_as_of = await freshness_cache.get(db)
 
     return EarthquakeListResponse(
         source="db_fallback",
@@ -208,12 +425,384 @@ def list_live_earthquakes(
     )
 
 
+def _sse_event(message: FeedMessage) -> bytes:
+    if message.type == "heartbeat":
+        return b": heartbeat\n\n"
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (message.seq, message.type.encode(), message.body)
+
+
+@app.get("/earthquakes/live/stream")
+async def stream_live_earthquakes(
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    bbox: BBoxQuery = None,
+):
+    """
+    Server-Sent Events feed of recent earthquakes.
+
+    Sends a snapshot event with the current matching events, then a changes
+    event with new and updated events after each poll that finds any. Events
+    are upserts keyed by event_id. All clients share one poller, so upstream
+    load does not grow with the number of clients.
+    """
+    parsed_bbox = _parse_bbox(bbox)
+
+    async def events():
+        # Subscribe inside the stream so a client that never starts reading leaves nothing behind
+        subscription = live_feed.subscribe(min_magnitude, parsed_bbox)
+        try:
+            async for message in live_feed.messages(subscription):
+                yield _sse_event(message)
+        finally:
+            live_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/earthquakes/live/ws")
+async def websocket_live_earthquakes(
+    websocket: WebSocket,
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    bbox: BBoxQuery = None,
+):
+    """
+    WebSocket version of /earthquakes/live/stream.
+
+    Each text message is {"type": "snapshot" | "changes" | "heartbeat", "seq": n, "data": {...}}.
+    The server closes with 1013 (try again later) if the client falls too far behind.
+    """
+    await websocket.accept()
+    subscription = live_feed.subscribe(min_magnitude, _parse_bbox(bbox))
+
+    async def send() -> None:
+        async for message in live_feed.messages(subscription):
+            payload = b'{"type":"%s","seq":%d,"data":%s}' % (message.type.encode(), message.seq, message.body)
+            await websocket.send_text(payload.decode())
+        await websocket.close(code=1013)
+
+    async def wait_for_disconnect() -> None:
+        # Clients only listen; reading is how we notice them leave
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        live_feed.unsubscribe(subscription)
+
+
+@app.get("/earthquakes/export", response_class=StreamingResponse)
+async def export_earthquakes(
+    format: ExportFormat = Query("ndjson", description="Output format: ndjson, csv or geojson"),
+    gzip: bool = Query(False, description="Gzip-compress the stream (Content-Encoding: gzip)"),
+    start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
+    end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    max_magnitude: float | None = Query(None, ge=0, le=10, description="Maximum magnitude"),
+    bbox: BBoxQuery = None,
+    order: Literal["asc", "desc"] = Query("asc", description="Sort order by time"),
+):
+    """
+    Stream every earthquake matching the filters, without pagination.
+
+    Rows are read through a server-side cursor and written out batch by batch
+    with chunked transfer, so memory use does not grow with the result size.
+    """
+    parsed_bbox = _parse_bbox(bbox)
+
+    async def body():
+        # Own session: request-scoped dependencies are closed before the body streams
+        async with SessionLocal() as db:
+            batches = earthquake_repo.stream_earthquakes(
+                db=db,
+                start=start,
+                end=end,
+                min_magnitude=min_magnitude,
+                max_magnitude=max_magnitude,
+                bbox=parsed_bbox,
+                order=order,
+                batch_size=settings.export_batch_size,
+            )
+            async for chunk in encode_export(batches, format, gzip=gzip):
+                yield chunk
+
+    extension = "json" if format == "geojson" else format
+    headers = {"Content-Disposition": f'attachment; filename="earthquakes.{extension}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@app.get("/earthquakes/stats/timeseries", response_model=TimeSeriesResponse)
+async def earthquake_time_series(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    interval: stats_repo.TimeInterval = Query("day", description="Bucket size: hour, day, week, month or year"),
+    start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
+    end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    max_magnitude: float | None = Query(None, ge=0, le=10, description="Maximum magnitude"),
+    bbox: BBoxQuery = None,
+):
+    """
+    Count earthquakes per time bucket, computed in SQL.
+
+    Takes the same filters as /earthquakes. Buckets without events are omitted.
+    """
+    parsed_bbox = _parse_bbox(bbox)
+
+    async def build() -> TimeSeriesResponse:
+        query = dict(
+            interval=interval,
+            start=start,
+            end=end,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+            bbox=parsed_bbox,
+        )
+        try:
+            buckets = columnar_store.time_series(**query) if columnar_store is not None else None
+            if buckets is None:
+                buckets = await stats_repo.get_time_series(db=db, **query)
+        except stats_repo.TooManyBucketsError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return TimeSeriesResponse(
+            data_fresh_as_of=await freshness_cache.get(db),
+            interval=interval,
+            total=sum(bucket.count for bucket in buckets),
+            buckets=buckets,
+        )
+
+    params = {
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "min_magnitude": min_magnitude,
+        "max_magnitude": max_magnitude,
+        "bbox": parsed_bbox,
+    }
+    return await _cached_response(request, params, build)
+
+
+@app.get("/earthquakes/stats/magnitude", response_model=MagnitudeStatsResponse)
+async def earthquake_magnitude_stats(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    bin_width: float = Query(0.1, ge=0.01, le=5, description="Magnitude bin width"),
+    start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
+    end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    max_magnitude: float | None = Query(None, ge=0, le=10, description="Maximum magnitude"),
+    bbox: BBoxQuery = None,
+):
+    """
+    Magnitude histogram with Gutenberg-Richter cumulative counts.
+
+    Also estimates the completeness magnitude (maximum curvature) and the
+    b-value (Aki-Utsu maximum likelihood) from the histogram.
+    """
+    parsed_bbox = _parse_bbox(bbox)
+
+    async def build() -> MagnitudeStatsResponse:
+        query = dict(
+            bin_width=bin_width,
+            start=start,
+            end=end,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+            bbox=parsed_bbox,
+        )
+        bins = columnar_store.magnitude_histogram(**query) if columnar_store is not None else None
+        if bins is None:
+            bins = await stats_repo.get_magnitude_histogram(db=db, **query)
+        completeness, b_value = stats_repo.estimate_b_value(bins, bin_width)
+
+        return MagnitudeStatsResponse(
+            data_fresh_as_of=await freshness_cache.get(db),
+            bin_width=bin_width,
+            total=bins[0].cumulative_count if bins else 0,
+            completeness_magnitude=completeness,
+            b_value=b_value,
+            bins=bins,
+        )
+
+    params = {
+        "bin_width": bin_width,
+        "start": start,
+        "end": end,
+        "min_magnitude": min_magnitude,
+        "max_magnitude": max_magnitude,
+        "bbox": parsed_bbox,
+    }
+    return await _cached_response(request, params, build)
+
+
+@app.get("/earthquakes/stats/depth", response_model=DepthStatsResponse)
+async def earthquake_depth_stats(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    bins: str = Query(
+        "0,70,300,700",
+        description="Ascending depth bin edges in km (default: shallow, intermediate, deep)",
+        pattern=r"^-?\d+\.?\d*(,-?\d+\.?\d*)+$",
+    ),
+    start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
+    end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    max_magnitude: float | None = Query(None, ge=0, le=10, description="Maximum magnitude"),
+    bbox: BBoxQuery = None,
+):
+    """Count earthquakes per depth range, computed in SQL with width_bucket."""
+    edges = [float(x) for x in bins.split(",")]
+    if len(edges) > 50:
+        raise HTTPException(status_code=400, detail="At most 50 depth bin edges are allowed")
+    if any(lower >= upper for lower, upper in zip(edges, edges[1:])):
+        raise HTTPException(status_code=400, detail="Depth bin edges must be strictly ascending")
+    parsed_bbox = _parse_bbox(bbox)
+
+    async def build() -> DepthStatsResponse:
+        query = dict(
+            edges=edges,
+            start=start,
+            end=end,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+            bbox=parsed_bbox,
+        )
+        depth_bins = columnar_store.depth_histogram(**query) if columnar_store is not None else None
+        if depth_bins is None:
+            depth_bins = await stats_repo.get_depth_histogram(db=db, **query)
+
+        return DepthStatsResponse(
+            data_fresh_as_of=await freshness_cache.get(db),
+            total=sum(depth_bin.count for depth_bin in depth_bins),
+            bins=depth_bins,
+        )
+
+    params = {
+        "bins": edges,
+        "start": start,
+        "end": end,
+        "min_magnitude": min_magnitude,
+        "max_magnitude": max_magnitude,
+        "bbox": parsed_bbox,
+    }
+    return await _cached_response(request, params, build)
+
+
+@app.get("/earthquakes/clusters", response_model=ClusterResponse)
+async def earthquake_clusters(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    zoom: int = Query(..., ge=0, description="Grid zoom: cells are Web Mercator tiles at this zoom"),
+    bbox: BBoxQuery = None,
+    start: datetime | None = Query(None, description="Include months from this one (ISO format)"),
+    end: datetime | None = Query(None, description="Include months up to this one (ISO format)"),
+):
+    """
+    Clustered map view: event counts per grid cell with max magnitude and centroid.
+
+    Served from the precomputed agg_quake_grid dbt model, so the cost depends
+    on the number of cells, not events. Time bounds select whole months.
+    """
+    if zoom > settings.cluster_max_zoom:
+        raise HTTPException(status_code=400, detail=f"zoom must be at most {settings.cluster_max_zoom}")
+    parsed_bbox = _parse_bbox(bbox)
+
+    async def build() -> ClusterResponse:
+        try:
+            clusters = await tiles_repo.get_clusters(db=db, zoom=zoom, bbox=parsed_bbox, start=start, end=end)
+        except tiles_repo.TooManyClustersError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return ClusterResponse(
+            data_fresh_as_of=await freshness_cache.get(db),
+            zoom=zoom,
+            total=sum(cluster.count for cluster in clusters),
+            clusters=clusters,
+        )
+
+    params = {"zoom": zoom, "bbox": parsed_bbox, "start": start, "end": end}
+    return await _cached_response(request, params, build)
+
+
+@app.get("/earthquakes/near", response_model=NearbyEarthquakeResponse)
+async def nearby_earthquakes(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the query point"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the query point"),
+    radius_km: float | None = Query(
+        None, gt=0, le=nearby_repo.MAX_DISTANCE_KM, description="Search radius; omit for k-nearest mode"
+    ),
+    k: int = Query(50, ge=1, le=200, description="Maximum results, nearest first"),
+    start: datetime | None = Query(None, description="Filter events after this time (ISO format)"),
+    end: datetime | None = Query(None, description="Filter events before this time (ISO format)"),
+    min_magnitude: float | None = Query(None, ge=0, le=10, description="Minimum magnitude"),
+    max_magnitude: float | None = Query(None, ge=0, le=10, description="Maximum magnitude"),
+):
+    """
+    Earthquakes nearest to a point by great-circle distance.
+
+    With radius_km, returns up to k events within that radius; without it,
+    returns the k nearest events anywhere. Both use the GiST index through
+    a bounding-box prefilter, and work across the antimeridian and poles.
+    """
+
+    async def build() -> NearbyEarthquakeResponse:
+        items, searched_km = await nearby_repo.get_nearby(
+            db=db,
+            lat=lat,
+            lon=lon,
+            k=k,
+            radius_km=radius_km,
+            start=start,
+            end=end,
+            min_magnitude=min_magnitude,
+            max_magnitude=max_magnitude,
+        )
+
+        return NearbyEarthquakeResponse(
+            source="db",
+            data_fresh_as_of=await freshness_cache.get(db),
+            latitude=lat,
+            longitude=lon,
+            radius_km=searched_km,
+            count=len(items),
+            items=items,
+        )
+
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "radius_km": radius_km,
+        "k": k,
+        "start": start,
+        "end": end,
+        "min_magnitude": min_magnitude,
+        "max_magnitude": max_magnitude,
+    }
+    return await _cached_response(request, params, build)
+
+
 @app.get("/earthquakes/{event_id}", response_model=EarthquakeDetailResponse)
-def get_earthquake(event_id: str, db: Session = Depends(get_db)):
+async def get_earthquake(event_id: str, request: Request, db: AsyncSession = Depends(get_db)):
     """Fetch a single earthquake by its event ID."""
-    item = earthquake_repo.get_earthquake_by_id(db, event_id)
 
-    if item is None:
-        raise HTTPException(status_code=404, detail=f"Earthquake with id '{event_id}' not found")
+    async def build() -> EarthquakeDetailResponse:
+        item = await earthquake_repo.get_earthquake_by_id(db, event_id)
+
+        if item is None:
+            raise HTTPException(status_code=404, detail=f"Earthquake with id '{event_id}' not found")
+
+        return EarthquakeDetailResponse(source="db", item=item)
 
-    return EarthquakeDetailResponse(source="db", item=item)
+    return await _cached_response(request, {}, build)
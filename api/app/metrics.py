@@ -24,4 +24,147 @@ usgs_requests_total = Counter(
     ["status"],  # success, failure, timeout, rate_limited
 )
 
+usgs_connections_total = Counter(
+    "usgs_connections_total",
+    "USGS requests by connection used",
+    ["kind"],  # new, reused
+)
+
+usgs_pool_wait_seconds = Histogram(
+    "usgs_pool_wait_seconds",
+    "Time from issuing a USGS request until its connection was ready to use",
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 3.0],
+)
+
+usgs_hedged_requests_total = Counter(
+    "usgs_hedged_requests_total",
+    "USGS requests that sent a hedge, by which request answered first",
+    ["winner"],  # primary, hedge
+)
+
+usgs_retry_budget_exhausted_total = Counter(
+    "usgs_retry_budget_exhausted_total",
+    "USGS retries and hedges skipped because the retry budget was exhausted",
+    ["kind"],  # retry, hedge
+)
+
+usgs_adaptive_timeout_seconds = Gauge(
+    "usgs_adaptive_timeout_seconds",
+    "Current per-attempt USGS timeout derived from recent latency",
+)
+
+# USGS Fetch Cache Metrics
+usgs_fetch_cache_hits_total = Counter(
+    "usgs_fetch_cache_hits_total",
+    "USGS fetches answered from the on-disk fetch cache",
+    ["reason"],  # not_modified, content_hash
+)
+
+usgs_fetch_cache_misses_total = Counter(
+    "usgs_fetch_cache_misses_total",
+    "USGS fetches whose content was new and had to be parsed",
+)
+
+# Freshness Watermark Cache Metrics
+freshness_cache_hits_total = Counter(
+    "freshness_cache_hits_total",
+    "data_fresh_as_of lookups answered from the in-process cache",
+)
+
+freshness_cache_misses_total = Counter(
+    "freshness_cache_misses_total",
+    "data_fresh_as_of lookups that queried the database",
+)
+
+freshness_invalidations_total = Counter(
+    "freshness_invalidations_total",
+    "Freshness cache invalidations (ingest notifications and listener reconnects)",
+)
+
+# Query Result Cache Metrics
+result_cache_hits_total = Counter(
+    "result_cache_hits_total",
+    "List/detail responses served from the result cache",
+)
+
+result_cache_misses_total = Counter(
+    "result_cache_misses_total",
+    "List/detail responses that had to be queried and serialized",
+)
+
+result_cache_evictions_total = Counter(
+    "result_cache_evictions_total",
+    "Result cache entries evicted to stay within capacity",
+)
+
+result_cache_not_modified_total = Counter(
+    "result_cache_not_modified_total",
+    "Conditional requests answered with 304 Not Modified",
+)
+
+result_cache_entries = Gauge(
+    "result_cache_entries",
+    "Entries currently held in the result cache",
+)
+
+result_cache_bytes = Gauge(
+    "result_cache_bytes",
+    "Serialized response bytes currently held in the result cache",
+)
+
+# Live Endpoint Coalescing Metrics
+live_fetch_total = Counter(
+    "live_fetch_total",
+    "/earthquakes/live USGS lookups by outcome",
+    ["result"],  # hit (micro-cache), shared_hit (another worker's fetch), coalesced (joined an in-flight fetch), miss (fetched upstream)
+)
+
+# Live Feed Metrics
+live_feed_subscribers = Gauge(
+    "live_feed_subscribers",
+    "Clients connected to the live push feed in this worker",
+)
+
+live_feed_polls_total = Counter(
+    "live_feed_polls_total",
+    "Live feed poller runs by data source",
+    ["source"],  # usgs, db_fallback, error
+)
+
+live_feed_changes_total = Counter(
+    "live_feed_changes_total",
+    "Events pushed by the live feed",
+    ["kind"],  # new, updated
+)
+
+live_feed_dropped_subscribers_total = Counter(
+    "live_feed_dropped_subscribers_total",
+    "Live feed subscribers disconnected for falling too far behind",
+)
+
+# Shared State Metrics
+shared_state_errors_total = Counter(
+    "shared_state_errors_total",
+    "Shared state backend errors; the breaker falls back to per-process state and the cache to a miss",
+    ["backend", "op"],  # op: breaker, breaker_conflict (WATCH retries ran out), cache
+)
+
+# Columnar Store Metrics
+columnar_store_queries_total = Counter(
+    "columnar_store_queries_total",
+    "Queries offered to the in-process columnar store by outcome",
+    ["result"],  # hit (answered in memory), fallback (cold or stale; answered by SQL)
+)
+
+columnar_store_rows = Gauge(
+    "columnar_store_rows",
+    "Events held in the in-process columnar store",
+)
+
+columnar_store_refresh_seconds = Histogram(
+    "columnar_store_refresh_seconds",
+    "Duration of columnar store refreshes",
+    ["kind"],  # full, incremental
+)
+
 STATE_VALUES = {"closed": 0, "open": 1, "half_open": 2}
@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+from typing import Literal
+
+
+class InvalidCursorError(ValueError):
+    """Cursor token could not be decoded or does not match the request."""
+
+    pass
+
+
+def encode_cursor(time: datetime, event_id: str, order: Literal["asc", "desc"]) -> str:
+    """
+    Encode the position after a row as an opaque, URL-safe cursor token.
+
+    The token carries the sort order so a cursor cannot be replayed against
+    the opposite direction.
+    """
+    payload = json.dumps({"t": time.isoformat(), "id": event_id, "o": order}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: Literal["asc", "desc"]) -> tuple[datetime, str]:
+    """
+    Decode a cursor token into the (time, id) keyset position it points after.
+
+    Raises:
+        InvalidCursorError: If the token is malformed or was issued for another order
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = (datetime.fromisoformat(payload["t"]), str(payload["id"]))
+        cursor_order = payload["o"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if cursor_order != order:
+        raise InvalidCursorError(f"Cursor was issued for order={cursor_order}")
+    return position
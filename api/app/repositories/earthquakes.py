@@ -1,49 +1,47 @@
-from datetime import datetime
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timezone
 from typing import Literal
 
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, TextClause, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas import EarthquakeItem
 from app.settings import settings
 
+# Ties on time are broken by id in code point order, whatever the database collation.
+# The columnar store sorts ids the same way, so cursors are valid against either.
+ID_ORDER = 'id COLLATE "C"'
 
-def get_earthquakes(
-    db: Session,
-    start: datetime | None = None,
-    end: datetime | None = None,
-    min_magnitude: float | None = None,
-    max_magnitude: float | None = None,
-    bbox: tuple[float, float, float, float] | None = None,
-    limit: int = 50,
-    offset: int = 0,
-    order: Literal["asc", "desc"] = "desc",
-) -> list[EarthquakeItem]:
+
+def naive_utc(value: datetime | None) -> datetime | None:
     """
-    Fetch earthquakes from the database with filtering and pagination.
+    Convert a datetime to the naive UTC the timestamp columns hold; naive values are taken as UTC.
 
-    Args:
-        db: Database session
-        start: Filter events after this time
-        end: Filter events before this time
-        min_magnitude: Minimum magnitude
-        max_magnitude: Maximum magnitude
-        bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
-        limit: Maximum number of results
-        offset: Number of results to skip
-        order: Sort order by time ('asc' or 'desc')
+    asyncpg refuses to bind an aware datetime to a timestamp parameter, and
+    FastAPI parses ?start=...Z into one.
     """
-    schema = settings.db_schema
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
+
+def _filter_conditions(
+    start: datetime | None,
+    end: datetime | None,
+    min_magnitude: float | None,
+    max_magnitude: float | None,
+    bbox: tuple[float, float, float, float] | None,
+) -> tuple[list[str], dict]:
+    """Build WHERE conditions and bind parameters for the shared earthquake filters."""
     conditions = []
-    params: dict = {"limit": limit, "offset": offset}
+    params: dict = {}
 
     if start:
         conditions.append("time >= :start")
-        params["start"] = start
+        params["start"] = naive_utc(start)
     if end:
         conditions.append("time <= :end")
-        params["end"] = end
+        params["end"] = naive_utc(end)
     if min_magnitude is not None:
         conditions.append("magnitude >= :min_magnitude")
         params["min_magnitude"] = min_magnitude
@@ -52,28 +50,52 @@ def get_earthquakes(
         params["max_magnitude"] = max_magnitude
     if bbox:
         min_lon, min_lat, max_lon, max_lat = bbox
-        conditions.append("longitude >= :min_lon")
-        conditions.append("longitude <= :max_lon")
-        conditions.append("latitude >= :min_lat")
-        conditions.append("latitude <= :max_lat")
+        # Same expression as the GiST index on stg_earthquakes, so <@ can use it
+        if min_lon <= max_lon:
+            conditions.append("point(longitude, latitude) <@ box(point(:min_lon, :min_lat), point(:max_lon, :max_lat))")
+        else:
+            # min_lon > max_lon means the box crosses the antimeridian: split it in two
+            conditions.append(
+                "(point(longitude, latitude) <@ box(point(:min_lon, :min_lat), point(180, :max_lat))"
+                " OR point(longitude, latitude) <@ box(point(-180, :min_lat), point(:max_lon, :max_lat)))"
+            )
         params["min_lon"] = min_lon
         params["max_lon"] = max_lon
         params["min_lat"] = min_lat
         params["max_lat"] = max_lat
 
-    where_clause = " AND ".join(conditions) if conditions else "1=1"
-    order_direction = "ASC" if order == "asc" else "DESC"
+    return conditions, params
 
-    query = text(f"""
-        SELECT id, time, place, magnitude, latitude, longitude, depth_km, url
-        FROM {schema}.stg_earthquakes
-        WHERE {where_clause}
-        ORDER BY time {order_direction}, id
-        LIMIT :limit OFFSET :offset
-    """)
 
-    result = db.execute(query, params)
-    rows = result.fetchall()
+async def get_earthquakes(
+    db: AsyncSession,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    limit: int = 50,
+    offset: int = 0,
+    order: Literal["asc", "desc"] = "desc",
+    after: tuple[datetime, str] | None = None,
+) -> list[EarthquakeItem]:
+    """
+    Fetch earthquakes from the database with filtering and pagination.
+
+    Same arguments as get_earthquake_rows; returns EarthquakeItem models.
+    """
+    rows = await get_earthquake_rows(
+        db,
+        start=start,
+        end=end,
+        min_magnitude=min_magnitude,
+        max_magnitude=max_magnitude,
+        bbox=bbox,
+        limit=limit,
+        offset=offset,
+        order=order,
+        after=after,
+    )
 
     return [
         EarthquakeItem(
@@ -90,7 +112,151 @@ def get_earthquakes(
     ]
 
 
-def get_earthquake_by_id(db: Session, event_id: str) -> EarthquakeItem | None:
+async def get_earthquake_rows(
+    db: AsyncSession,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    limit: int = 50,
+    offset: int = 0,
+    order: Literal["asc", "desc"] = "desc",
+    after: tuple[datetime, str] | None = None,
+) -> Sequence[Row]:
+    """
+    Fetch raw earthquake rows from the database with filtering and pagination.
+
+    Args:
+        db: Database session
+        start: Filter events after this time
+        end: Filter events before this time
+        min_magnitude: Minimum magnitude
+        max_magnitude: Maximum magnitude
+        bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
+        limit: Maximum number of results
+        offset: Number of results to skip
+        order: Sort order by time ('asc' or 'desc')
+        after: Keyset position (time, id); only rows past it in sort order are returned
+    """
+    query, params = list_query(
+        start=start,
+        end=end,
+        min_magnitude=min_magnitude,
+        max_magnitude=max_magnitude,
+        bbox=bbox,
+        limit=limit,
+        offset=offset,
+        order=order,
+        after=after,
+    )
+    result = await db.execute(query, params)
+    return result.fetchall()
+
+
+def list_query(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    limit: int = 50,
+    offset: int = 0,
+    order: Literal["asc", "desc"] = "desc",
+    after: tuple[datetime, str] | None = None,
+) -> tuple[TextClause, dict]:
+    """Build the list query and its bind parameters (shared with the query plan tests)."""
+    schema = settings.db_schema
+
+    conditions, params = _filter_conditions(start, end, min_magnitude, max_magnitude, bbox)
+    params.update(limit=limit, offset=offset)
+
+    order_direction = "ASC" if order == "asc" else "DESC"
+    if after:
+        # Row comparison matches ORDER BY time, id in one direction, so it can use a (time, id) index
+        conditions.append(f"(time, {ID_ORDER}) {'>' if order == 'asc' else '<'} (:after_time, :after_id)")
+        params["after_time"], params["after_id"] = naive_utc(after[0]), after[1]
+
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+
+    query = text(f"""
+        SELECT id, time, place, magnitude, latitude, longitude, depth_km, url
+        FROM {schema}.stg_earthquakes
+        WHERE {where_clause}
+        ORDER BY time {order_direction}, {ID_ORDER} {order_direction}
+        LIMIT :limit OFFSET :offset
+    """)
+    return query, params
+
+
+async def stream_earthquakes(
+    db: AsyncSession,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    order: Literal["asc", "desc"] = "desc",
+    batch_size: int = 2000,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream every matching earthquake in batches through a server-side cursor.
+
+    Only one batch is held in memory at a time, whatever the result size.
+    Rows are yielded as-is, without an EarthquakeItem per row.
+
+    Args:
+        db: Database session, used only by this stream until it is exhausted
+        batch_size: Rows fetched from the cursor per round trip
+    """
+    schema = settings.db_schema
+
+    conditions, params = _filter_conditions(start, end, min_magnitude, max_magnitude, bbox)
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    order_direction = "ASC" if order == "asc" else "DESC"
+
+    query = text(f"""
+        SELECT id, time, place, magnitude, latitude, longitude, depth_km, url
+        FROM {schema}.stg_earthquakes
+        WHERE {where_clause}
+        ORDER BY time {order_direction}, {ID_ORDER} {order_direction}
+    """).execution_options(yield_per=batch_size)
+
+    result = await db.stream(query, params)
+    async for batch in result.partitions():
+        yield batch
+
+
+async def stream_rows_loaded_since(
+    db: AsyncSession,
+    since: datetime | None = None,
+    batch_size: int = 2000,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream every row the loader changed after `since` (all rows when None).
+
+    Feeds the in-process columnar store's full and incremental refreshes.
+    time and loaded_at come back as epoch microseconds (time_us, loaded_at_us),
+    which load into NumPy far faster than datetime objects.
+    """
+    schema = settings.db_schema
+
+    where_clause = "loaded_at > :since" if since is not None else "1=1"
+    query = text(f"""
+        SELECT id,
+            CAST(EXTRACT(EPOCH FROM time) * 1000000 AS BIGINT) AS time_us,
+            place, magnitude, latitude, longitude, depth_km, url,
+            CAST(EXTRACT(EPOCH FROM COALESCE(loaded_at, 'epoch')) * 1000000 AS BIGINT) AS loaded_at_us
+        FROM {schema}.stg_earthquakes
+        WHERE {where_clause}
+    """).execution_options(yield_per=batch_size)
+
+    result = await db.stream(query, {"since": naive_utc(since)} if since is not None else {})
+    async for batch in result.partitions():
+        yield batch
+
+
+async def get_earthquake_by_id(db: AsyncSession, event_id: str) -> EarthquakeItem | None:
     """Fetch a single earthquake by its ID."""
     schema = settings.db_schema
 
@@ -100,7 +266,7 @@ def get_earthquake_by_id(db: Session, event_id: str) -> EarthquakeItem | None:
         WHERE id = :event_id
     """)
 
-    result = db.execute(query, {"event_id": event_id})
+    result = await db.execute(query, {"event_id": event_id})
     row = result.fetchone()
 
     if row is None:
@@ -118,7 +284,7 @@ def get_earthquake_by_id(db: Session, event_id: str) -> EarthquakeItem | None:
     )
 
 
-def get_max_event_time(db: Session) -> datetime | None:
+async def get_max_event_time(db: AsyncSession) -> datetime | None:
     """Get the most recent event time in the database."""
     schema = settings.db_schema
 
@@ -127,7 +293,7 @@ def get_max_event_time(db: Session) -> datetime | None:
         FROM {schema}.stg_earthquakes
     """)
 
-    result = db.execute(query)
+    result = await db.execute(query)
     row = result.fetchone()
 
     return row.max_time if row else None
@@ -0,0 +1,148 @@
+import math
+from datetime import datetime
+
+from sqlalchemy import TextClause, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.earthquakes import _filter_conditions
+from app.schemas import NearbyEarthquakeItem
+from app.settings import settings
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+# Half the circumference: every point on Earth is within this distance
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+# First radius tried by a k-nearest search; doubled until k events are found
+KNN_START_RADIUS_KM = 100.0
+
+# Great-circle (haversine) distance from (:lat, :lon) to each row, in km
+HAVERSINE_SQL = """
+    2 * CAST(:earth_radius AS double precision) * asin(least(1, sqrt(
+        power(sin(radians(latitude - :lat) / 2), 2)
+        + cos(radians(:lat)) * cos(radians(latitude)) * power(sin(radians(longitude - :lon) / 2), 2)
+    )))
+"""
+
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float] | None:
+    """
+    Smallest lon/lat box containing every point within radius_km of (lat, lon).
+
+    Returns None when the circle covers every longitude (it contains a pole).
+    A box crossing the antimeridian comes back with min_lon > max_lon, which
+    the shared bbox filter splits in two.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    min_lat = lat - math.degrees(angular)
+    max_lat = lat + math.degrees(angular)
+    if min_lat <= -90 or max_lat >= 90:
+        return None
+
+    # Widest longitude offset of the circle, reached north/south of the centre's parallel
+    delta_lon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(lat))))
+    min_lon = lon - delta_lon
+    max_lon = lon + delta_lon
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def near_query(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    k: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+) -> tuple[TextClause, dict]:
+    """Build the query for the k nearest events within radius_km, nearest first."""
+    schema = settings.db_schema
+
+    # The bbox prefilter is answered by the GiST index; haversine then trims the corners
+    bbox = radius_bbox(lat, lon, radius_km)
+    conditions, params = _filter_conditions(start, end, min_magnitude, max_magnitude, bbox)
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    params.update(lat=lat, lon=lon, radius_km=radius_km, k=k, earth_radius=EARTH_RADIUS_KM)
+
+    query = text(f"""
+        SELECT id, time, place, magnitude, latitude, longitude, depth_km, url, distance_km
+        FROM (
+            SELECT id, time, place, magnitude, latitude, longitude, depth_km, url,
+                {HAVERSINE_SQL} AS distance_km
+            FROM {schema}.stg_earthquakes
+            WHERE {where_clause}
+        ) candidates
+        WHERE distance_km <= :radius_km
+        ORDER BY distance_km, time DESC, id
+        LIMIT :k
+    """)
+    return query, params
+
+
+async def _search(
+    db: AsyncSession,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    k: int,
+    start: datetime | None,
+    end: datetime | None,
+    min_magnitude: float | None,
+    max_magnitude: float | None,
+) -> list[NearbyEarthquakeItem]:
+    query, params = near_query(lat, lon, radius_km, k, start, end, min_magnitude, max_magnitude)
+    result = await db.execute(query, params)
+    return [
+        NearbyEarthquakeItem(
+            event_id=row.id,
+            time=row.time,
+            place=row.place,
+            magnitude=row.magnitude,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            depth_km=row.depth_km,
+            url=row.url,
+            distance_km=round(row.distance_km, 3),
+        )
+        for row in result.fetchall()
+    ]
+
+
+async def get_nearby(
+    db: AsyncSession,
+    lat: float,
+    lon: float,
+    k: int = 50,
+    radius_km: float | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+) -> tuple[list[NearbyEarthquakeItem], float]:
+    """
+    Find the k nearest earthquakes to (lat, lon) by great-circle distance.
+
+    With radius_km, only events within it are considered. Without it, the
+    search radius starts at KNN_START_RADIUS_KM and doubles until k events
+    are found or the whole globe is covered: once k events lie within a
+    radius, no event outside it can be nearer.
+
+    Returns:
+        (items nearest first, radius searched in km)
+    """
+    filters = dict(start=start, end=end, min_magnitude=min_magnitude, max_magnitude=max_magnitude)
+    if radius_km is not None:
+        return await _search(db, lat, lon, radius_km, k, **filters), radius_km
+
+    radius = KNN_START_RADIUS_KM
+    while True:
+        items = await _search(db, lat, lon, radius, k, **filters)
+        if len(items) >= k or radius >= MAX_DISTANCE_KM:
+            return items, radius
+        radius = min(radius * 2, MAX_DISTANCE_KM)
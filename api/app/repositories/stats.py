@@ -0,0 +1,204 @@
+import math
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.earthquakes import _filter_conditions
+from app.schemas import DepthBin, MagnitudeBin, TimeSeriesBucket
+from app.settings import settings
+
+TimeInterval = Literal["hour", "day", "week", "month", "year"]
+
+# Fewest events above the completeness magnitude for a b-value estimate
+MIN_EVENTS_FOR_B_VALUE = 50
+
+
+class TooManyBucketsError(ValueError):
+    """Raised when a time series would exceed settings.stats_max_buckets."""
+
+
+async def get_time_series(
+    db: AsyncSession,
+    interval: TimeInterval,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+) -> list[TimeSeriesBucket]:
+    """
+    Count events per time bucket with date_trunc; buckets without events are omitted.
+
+    Raises:
+        TooManyBucketsError: If the series has more than settings.stats_max_buckets buckets
+    """
+    schema = settings.db_schema
+    max_buckets = settings.stats_max_buckets
+
+    conditions, params = _filter_conditions(start, end, min_magnitude, max_magnitude, bbox)
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    params.update(interval=interval, max_buckets=max_buckets + 1)
+
+    query = text(f"""
+        SELECT date_trunc(:interval, time) AS bucket,
+            COUNT(*) AS count,
+            MAX(magnitude) AS max_magnitude,
+            AVG(magnitude) AS mean_magnitude
+        FROM {schema}.stg_earthquakes
+        WHERE {where_clause}
+        GROUP BY 1
+        ORDER BY 1
+        LIMIT :max_buckets
+    """)
+
+    result = await db.execute(query, params)
+    rows = result.fetchall()
+    check_bucket_count(len(rows), interval)
+
+    return [
+        build_time_series_bucket(row.bucket, row.count, row.max_magnitude, row.mean_magnitude)
+        for row in rows
+    ]
+
+
+def check_bucket_count(count: int, interval: TimeInterval) -> None:
+    """Raise TooManyBucketsError if a series has more than settings.stats_max_buckets buckets."""
+    max_buckets = settings.stats_max_buckets
+    if count > max_buckets:
+        raise TooManyBucketsError(
+            f"More than {max_buckets} {interval} buckets; use a coarser interval or a narrower time range"
+        )
+
+
+def build_time_series_bucket(
+    start: datetime, count: int, max_magnitude: float | None, mean_magnitude: float | None
+) -> TimeSeriesBucket:
+    return TimeSeriesBucket(
+        start=start,
+        count=count,
+        max_magnitude=max_magnitude,
+        mean_magnitude=round(mean_magnitude, 3) if mean_magnitude is not None else None,
+    )
+
+
+async def get_magnitude_histogram(
+    db: AsyncSession,
+    bin_width: float,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+) -> list[MagnitudeBin]:
+    """
+    Count events per magnitude bin, with the Gutenberg-Richter cumulative count N(M >= bin).
+
+    Bins are [k * bin_width, (k + 1) * bin_width); empty bins are omitted.
+    """
+    schema = settings.db_schema
+
+    conditions, params = _filter_conditions(start, end, min_magnitude, max_magnitude, bbox)
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    params["bin_width"] = bin_width
+
+    # Nudge before floor so magnitudes on a bin edge (4.3 / 0.1 = 42.999...) land in that bin
+    query = text(f"""
+        SELECT floor(magnitude / :bin_width + 1e-9) AS bin, COUNT(*) AS count
+        FROM {schema}.stg_earthquakes
+        WHERE {where_clause}
+        GROUP BY 1
+        ORDER BY 1
+    """)
+
+    result = await db.execute(query, params)
+    return build_magnitude_bins([(int(row.bin), row.count) for row in result.fetchall()], bin_width)
+
+
+def build_magnitude_bins(counts: list[tuple[int, int]], bin_width: float) -> list[MagnitudeBin]:
+    """Turn ascending (bin index, count) pairs into bins with cumulative N(M >= bin)."""
+    bins = []
+    cumulative = sum(count for _, count in counts)
+    for index, count in counts:
+        bins.append(
+            MagnitudeBin(
+                magnitude=round(index * bin_width, 6),
+                count=count,
+                cumulative_count=cumulative,
+            )
+        )
+        cumulative -= count
+    return bins
+
+
+def estimate_b_value(bins: list[MagnitudeBin], bin_width: float) -> tuple[float | None, float | None]:
+    """
+    Estimate the completeness magnitude and Gutenberg-Richter b-value from a histogram.
+
+    Mc is the most populated bin (maximum curvature); b uses the Aki-Utsu maximum
+    likelihood estimate over events at or above Mc, with bins at their lower edge.
+
+    Returns:
+        (completeness_magnitude, b_value); b_value is None with too few events
+    """
+    if not bins:
+        return None, None
+
+    completeness = max(bins, key=lambda b: b.count).magnitude
+    above = [b for b in bins if b.magnitude >= completeness]
+    n = sum(b.count for b in above)
+    if n < MIN_EVENTS_FOR_B_VALUE:
+        return completeness, None
+
+    mean = sum(b.magnitude * b.count for b in above) / n
+    spread = mean - (completeness - bin_width / 2)
+    if spread <= 0:
+        return completeness, None
+    return completeness, round(math.log10(math.e) / spread, 3)
+
+
+async def get_depth_histogram(
+    db: AsyncSession,
+    edges: list[float],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    min_magnitude: float | None = None,
+    max_magnitude: float | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+) -> list[DepthBin]:
+    """
+    Count events per depth range between ascending edges (km).
+
+    Every [edges[i], edges[i + 1]) range is returned, empty or not; events above
+    the first or below the last edge get open-ended bins when there are any.
+    """
+    schema = settings.db_schema
+
+    conditions, params = _filter_conditions(start, end, min_magnitude, max_magnitude, bbox)
+    conditions.append("depth_km IS NOT NULL")
+    where_clause = " AND ".join(conditions)
+    params["edges"] = edges
+
+    query = text(f"""
+        SELECT width_bucket(depth_km, CAST(:edges AS double precision[])) AS bucket, COUNT(*) AS count
+        FROM {schema}.stg_earthquakes
+        WHERE {where_clause}
+        GROUP BY 1
+    """)
+
+    result = await db.execute(query, params)
+    return build_depth_bins({row.bucket: row.count for row in result.fetchall()}, edges)
+
+
+def build_depth_bins(counts: dict[int, int], edges: list[float]) -> list[DepthBin]:
+    """Turn width_bucket-style {bucket: count} into depth ranges."""
+    # width_bucket gives 0 below edges[0], i for [edges[i-1], edges[i]) and len(edges) past the last
+    bins = []
+    if counts.get(0):
+        bins.append(DepthBin(min_km=None, max_km=edges[0], count=counts[0]))
+    for i in range(1, len(edges)):
+        bins.append(DepthBin(min_km=edges[i - 1], max_km=edges[i], count=counts.get(i, 0)))
+    if counts.get(len(edges)):
+        bins.append(DepthBin(min_km=edges[-1], max_km=None, count=counts[len(edges)]))
+    return bins
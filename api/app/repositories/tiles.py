@@ -0,0 +1,112 @@
+import math
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.earthquakes import naive_utc
+from app.schemas import Cluster
+from app.settings import settings
+
+# Web Mercator is undefined at the poles; tiles stop at this latitude
+MAX_LATITUDE = 85.05112878
+
+
+class TooManyClustersError(ValueError):
+    """Raised when a cluster query would exceed settings.cluster_max_cells cells."""
+
+
+def tile_xy(lon: float, lat: float, zoom: int) -> tuple[int, int]:
+    """Web Mercator tile containing (lon, lat) at zoom; same formula as the agg_quake_grid dbt model."""
+    n = 2**zoom
+    lat_rad = math.radians(max(min(lat, MAX_LATITUDE), -MAX_LATITUDE))
+    fx = (lon + 180) / 360
+    fy = (1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2
+    return min(max(math.floor(fx * n), 0), n - 1), min(max(math.floor(fy * n), 0), n - 1)
+
+
+def quadkey(x: int, y: int, zoom: int) -> str:
+    """Bing Maps quadkey of a tile: one base-4 digit per zoom level."""
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
+
+
+def _cell_conditions(zoom: int, bbox: tuple[float, float, float, float] | None) -> tuple[list[str], dict]:
+    conditions = ["zoom = :zoom"]
+    params: dict = {"zoom": zoom}
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        x0, y0 = tile_xy(min_lon, max(min_lat, max_lat), zoom)
+        x1, y1 = tile_xy(max_lon, min(min_lat, max_lat), zoom)
+        conditions.append("y BETWEEN :y0 AND :y1")
+        if min_lon <= max_lon:
+            conditions.append("x BETWEEN :x0 AND :x1")
+        else:
+            # Crosses the antimeridian: from x0 to the east edge, and from the west edge to x1
+            conditions.append("(x >= :x0 OR x <= :x1)")
+        params.update(x0=x0, x1=x1, y0=y0, y1=y1)
+    return conditions, params
+
+
+async def get_clusters(
+    db: AsyncSession,
+    zoom: int,
+    bbox: tuple[float, float, float, float] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[Cluster]:
+    """
+    Sum the precomputed agg_quake_grid cells at zoom that intersect bbox.
+
+    The grid is monthly, so start and end select whole months: every month
+    they touch is included.
+
+    Raises:
+        TooManyClustersError: If more than settings.cluster_max_cells cells are non-empty
+    """
+    schema = settings.db_schema
+    max_cells = settings.cluster_max_cells
+
+    conditions, params = _cell_conditions(zoom, bbox)
+    if start:
+        conditions.append("month >= date_trunc('month', CAST(:start AS timestamp))")
+        params["start"] = naive_utc(start)
+    if end:
+        conditions.append("month <= :end")
+        params["end"] = naive_utc(end)
+    params["max_cells"] = max_cells + 1
+    where_clause = " AND ".join(conditions)
+
+    query = text(f"""
+        SELECT x, y,
+            SUM(quake_count) AS count,
+            MAX(max_magnitude) AS max_magnitude,
+            SUM(sum_latitude) / SUM(quake_count) AS latitude,
+            SUM(sum_longitude) / SUM(quake_count) AS longitude
+        FROM {schema}.agg_quake_grid
+        WHERE {where_clause}
+        GROUP BY x, y
+        ORDER BY y, x
+        LIMIT :max_cells
+    """)
+
+    result = await db.execute(query, params)
+    rows = result.fetchall()
+    if len(rows) > max_cells:
+        raise TooManyClustersError(f"More than {max_cells} clusters; zoom out or use a smaller bbox")
+
+    return [
+        Cluster(
+            quadkey=quadkey(row.x, row.y, zoom),
+            x=row.x,
+            y=row.y,
+            count=row.count,
+            max_magnitude=row.max_magnitude,
+            latitude=round(row.latitude, 5),
+            longitude=round(row.longitude, 5),
+        )
+        for row in rows
+    ]
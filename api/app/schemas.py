@@ -25,8 +25,10 @@ class EarthquakeListResponse(BaseModel):
     limit: int
     offset: int
     items: list[EarthquakeItem]
+    next_cursor: str | None = None
     breaker_state: str | None = None
     fallback_reason: str | None = None
+    cache_status: Literal["hit", "coalesced", "miss"] | None = None
 
 
 class EarthquakeDetailResponse(BaseModel):
@@ -34,6 +36,78 @@ class EarthquakeDetailResponse(BaseModel):
     item: EarthquakeItem
 
 
+class TimeSeriesBucket(BaseModel):
+    start: datetime
+    count: int
+    max_magnitude: float | None = None
+    mean_magnitude: float | None = None
+
+
+class TimeSeriesResponse(BaseModel):
+    data_fresh_as_of: datetime | None = None
+    interval: Literal["hour", "day", "week", "month", "year"]
+    total: int
+    buckets: list[TimeSeriesBucket]
+
+
+class MagnitudeBin(BaseModel):
+    magnitude: float  # Lower edge of the bin
+    count: int
+    cumulative_count: int  # Events with magnitude >= this bin's lower edge
+
+
+class MagnitudeStatsResponse(BaseModel):
+    data_fresh_as_of: datetime | None = None
+    bin_width: float
+    total: int
+    completeness_magnitude: float | None = None
+    b_value: float | None = None
+    bins: list[MagnitudeBin]
+
+
+class DepthBin(BaseModel):
+    min_km: float | None  # None for the open-ended bin below the first edge
+    max_km: float | None  # None for the open-ended bin above the last edge
+    count: int
+
+
+class DepthStatsResponse(BaseModel):
+    data_fresh_as_of: datetime | None = None
+    total: int
+    bins: list[DepthBin]
+
+
+class Cluster(BaseModel):
+    quadkey: str
+    x: int  # Web Mercator tile column at the response's zoom
+    y: int  # Web Mercator tile row at the response's zoom
+    count: int
+    max_magnitude: float | None = None
+    latitude: float  # Centroid of the cell's events
+    longitude: float
+
+
+class ClusterResponse(BaseModel):
+    data_fresh_as_of: datetime | None = None
+    zoom: int
+    total: int
+    clusters: list[Cluster]
+
+
+class NearbyEarthquakeItem(EarthquakeItem):
+    distance_km: float  # Great-circle distance from the query point
+
+
+class NearbyEarthquakeResponse(BaseModel):
+    source: Literal["db"]
+    data_fresh_as_of: datetime | None = None
+    latitude: float
+    longitude: float
+    radius_km: float  # Radius searched; for k-nearest queries, the radius the search expanded to
+    count: int
+    items: list[NearbyEarthquakeItem]
+
+
 class HealthResponse(BaseModel):
     status: str
 
@@ -50,3 +124,4 @@ class CircuitBreakerStatusResponse(BaseModel):
     recovery_secs: int
     seconds_until_recovery: float | None  # Only when state is "open"
     allowing_requests: bool
+    backend: str  # Where the state lives: "memory" (this worker), "mmap" or "redis" (all workers)
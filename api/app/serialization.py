@@ -0,0 +1,47 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import Row
+
+
+def earthquake_row_content(row: Row) -> dict:
+    """Plain-dict form of a stg_earthquakes row, matching EarthquakeItem's fields."""
+    return {
+        "event_id": row.id,
+        "time": row.time,
+        "magnitude": row.magnitude,
+        "place": row.place,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "depth_km": row.depth_km,
+        "url": row.url,
+    }
+
+
+def list_response_content(
+    rows: Sequence[Row],
+    source: str,
+    data_fresh_as_of: datetime | None,
+    limit: int,
+    offset: int,
+    next_cursor: str | None = None,
+) -> dict:
+    """
+    Build an EarthquakeListResponse body straight from DB rows.
+
+    Skips per-row model construction and response_model validation; the dict
+    is meant for orjson, which encodes datetimes the same way Pydantic does.
+    Keys follow EarthquakeListResponse's field order.
+    """
+    return {
+        "source": source,
+        "data_fresh_as_of": data_fresh_as_of,
+        "count": len(rows),
+        "limit": limit,
+        "offset": offset,
+        "items": [earthquake_row_content(row) for row in rows],
+        "next_cursor": next_cursor,
+        "breaker_state": None,
+        "fallback_reason": None,
+        "cache_status": None,
+    }
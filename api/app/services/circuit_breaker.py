@@ -1,12 +1,17 @@
-import threading
 import time
+from collections.abc import Callable
+from dataclasses import replace
 from enum import Enum
+from typing import TypeVar
 
 from app.metrics import (
     STATE_VALUES,
     circuit_breaker_failure_count,
     circuit_breaker_state,
 )
+from app.services.shared_state import BreakerSnapshot, BreakerStore, LocalBreakerStore
+
+T = TypeVar("T")
 
 
 class CircuitState(Enum):
@@ -17,96 +22,143 @@ class CircuitState(Enum):
 
 class CircuitBreaker:
     """
-    In-memory circuit breaker implementation.
+    Circuit breaker over a pluggable state store.
 
     State machine:
     - CLOSED: Allow calls. On failure, increment counter. If >= threshold -> OPEN
     - OPEN: Reject calls immediately. After recovery_secs -> HALF_OPEN
     - HALF_OPEN: Allow 1 trial call. Success -> CLOSED, Failure -> OPEN
 
-    Note: In production, consider using Redis for state persistence across instances.
+    With a shared store (app.services.shared_state) all workers see one
+    breaker: their failures count toward a single threshold, and only one
+    of them gets the half-open trial call. A trial whose worker never reports
+    back is released after probe_timeout_secs.
     """
 
-    def __init__(self, failure_threshold: int = 5, recovery_secs: int = 60):
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_secs: int = 60,
+        store: BreakerStore | None = None,
+        probe_timeout_secs: float = 30,
+    ):
         self._failure_threshold = failure_threshold
         self._recovery_secs = recovery_secs
-        self._state = CircuitState.CLOSED
-        self._failure_count = 0
-        self._last_failure_time: float | None = None
-        self._lock = threading.Lock()
+        self._store = store or LocalBreakerStore()
+        self._probe_timeout_secs = probe_timeout_secs
+        self._last_state = CircuitState.CLOSED
 
-    @property
-    def state(self) -> CircuitState:
-        with self._lock:
-            self._check_recovery()
-            return self._state
+    async def _transact(self, fn: Callable[[BreakerSnapshot, float], T]) -> T:
+        """Apply fn(snapshot, now) atomically in the store and publish the resulting state."""
+
+        def run(snapshot: BreakerSnapshot) -> tuple[T, BreakerSnapshot]:
+            result = fn(snapshot, time.time())
+            return result, replace(snapshot)
 
-    def _check_recovery(self) -> None:
+        result, snapshot = await self._store.transact(run)
+        self._last_state = CircuitState(snapshot.state)
+        self._emit_metrics(snapshot)
+        return result
+
+    def _check_recovery(self, snapshot: BreakerSnapshot, now: float) -> None:
         """Check if circuit should transition from OPEN to HALF_OPEN."""
-        if self._state == CircuitState.OPEN and self._last_failure_time is not None:
-            if time.time() - self._last_failure_time >= self._recovery_secs:
-                self._state = CircuitState.HALF_OPEN
-
-    def should_allow_request(self) -> bool:
-        """Check if a request should be allowed through."""
-        with self._lock:
-            self._check_recovery()
-            if self._state == CircuitState.CLOSED:
+        if snapshot.state == CircuitState.OPEN.value and snapshot.last_failure_time is not None:
+            if now - snapshot.last_failure_time >= self._recovery_secs:
+                snapshot.state = CircuitState.HALF_OPEN.value
+                snapshot.probe_until = None
+
+    @property
+    def last_state(self) -> CircuitState:
+        """State as of this process's most recent breaker call, without a store round trip."""
+        return self._last_state
+
+    async def get_state(self) -> CircuitState:
+        def read(snapshot: BreakerSnapshot, now: float) -> CircuitState:
+            self._check_recovery(snapshot, now)
+            return CircuitState(snapshot.state)
+
+        return await self._transact(read)
+
+    async def should_allow_request(self) -> bool:
+        """Check if a request should be allowed through; in HALF_OPEN this claims the one trial call."""
+
+        def claim(snapshot: BreakerSnapshot, now: float) -> bool:
+            self._check_recovery(snapshot, now)
+            if snapshot.state == CircuitState.CLOSED.value:
                 return True
-            elif self._state == CircuitState.HALF_OPEN:
+            elif snapshot.state == CircuitState.HALF_OPEN.value:
+                if snapshot.probe_until is not None and snapshot.probe_until > now:
+                    return False  # Another request is already probing
+                snapshot.probe_until = now + self._probe_timeout_secs
                 return True
             else:  # OPEN
                 return False
 
-    def _emit_metrics(self) -> None:
+        return await self._transact(claim)
+
+    @staticmethod
+    def _emit_metrics(snapshot: BreakerSnapshot) -> None:
         """Emit current state to Prometheus metrics."""
-        circuit_breaker_state.set(STATE_VALUES.get(self._state.value, 0))
-        circuit_breaker_failure_count.set(self._failure_count)
+        circuit_breaker_state.set(STATE_VALUES.get(snapshot.state, 0))
+        circuit_breaker_failure_count.set(snapshot.failure_count)
 
-    def record_success(self) -> None:
+    async def record_success(self) -> None:
         """Record a successful call."""
-        with self._lock:
-            if self._state == CircuitState.HALF_OPEN:
-                self._state = CircuitState.CLOSED
-            self._failure_count = 0
-            self._last_failure_time = None
-            self._emit_metrics()
-
-    def record_failure(self) -> None:
+
+        def success(snapshot: BreakerSnapshot, now: float) -> None:
+            # Any success closes the breaker, including one that started before another worker opened it
+            snapshot.state = CircuitState.CLOSED.value
+            snapshot.failure_count = 0
+            snapshot.last_failure_time = None
+            snapshot.probe_until = None
+
+        await self._transact(success)
+
+    async def record_failure(self) -> None:
         """Record a failed call."""
-        with self._lock:
-            self._failure_count += 1
-            self._last_failure_time = time.time()
-
-            if self._state == CircuitState.HALF_OPEN:
-                self._state = CircuitState.OPEN
-            elif self._state == CircuitState.CLOSED:
-                if self._failure_count >= self._failure_threshold:
-                    self._state = CircuitState.OPEN
-            self._emit_metrics()
-
-    def reset(self) -> None:
+
+        def failure(snapshot: BreakerSnapshot, now: float) -> None:
+            snapshot.failure_count += 1
+            snapshot.last_failure_time = now
+
+            if snapshot.state == CircuitState.HALF_OPEN.value:
+                snapshot.state = CircuitState.OPEN.value
+                snapshot.probe_until = None
+            elif snapshot.state == CircuitState.CLOSED.value:
+                if snapshot.failure_count >= self._failure_threshold:
+                    snapshot.state = CircuitState.OPEN.value
+
+        await self._transact(failure)
+
+    async def reset(self) -> None:
         """Reset the circuit breaker to initial state."""
-        with self._lock:
-            self._state = CircuitState.CLOSED
-            self._failure_count = 0
-            self._last_failure_time = None
-            self._emit_metrics()
 
-    def get_status(self) -> dict:
+        def reset(snapshot: BreakerSnapshot, now: float) -> None:
+            snapshot.state = CircuitState.CLOSED.value
+            snapshot.failure_count = 0
+            snapshot.last_failure_time = None
+            snapshot.probe_until = None
+
+        await self._transact(reset)
+
+    async def get_status(self) -> dict:
         """Get current circuit breaker status."""
-        with self._lock:
-            self._check_recovery()
+
+        def status(snapshot: BreakerSnapshot, now: float) -> dict:
+            self._check_recovery(snapshot, now)
             seconds_until_recovery = None
-            if self._state == CircuitState.OPEN and self._last_failure_time:
-                elapsed = time.time() - self._last_failure_time
+            if snapshot.state == CircuitState.OPEN.value and snapshot.last_failure_time:
+                elapsed = now - snapshot.last_failure_time
                 seconds_until_recovery = max(0, self._recovery_secs - elapsed)
 
             return {
-                "state": self._state.value,
-                "failure_count": self._failure_count,
+                "state": snapshot.state,
+                "failure_count": snapshot.failure_count,
                 "failure_threshold": self._failure_threshold,
                 "recovery_secs": self._recovery_secs,
                 "seconds_until_recovery": seconds_until_recovery,
-                "allowing_requests": self._state != CircuitState.OPEN,
+                "allowing_requests": snapshot.state != CircuitState.OPEN.value,
+                "backend": self._store.name,
             }
+
+        return await self._transact(status)
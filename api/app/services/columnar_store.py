@@ -0,0 +1,394 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Literal, NamedTuple
+
+import numpy as np
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.metrics import columnar_store_queries_total, columnar_store_refresh_seconds, columnar_store_rows
+from app.repositories import earthquakes as earthquake_repo
+from app.repositories import stats as stats_repo
+from app.schemas import DepthBin, MagnitudeBin, TimeSeriesBucket
+from app.services.freshness import FreshnessCache
+
+logger = logging.getLogger(__name__)
+
+# Rows masked per step when collecting a page; most pages fill from the first chunk
+SCAN_CHUNK = 16384
+
+BBox = tuple[float, float, float, float]
+
+
+class StoreRow(NamedTuple):
+    """One event from the store, with the same attributes as a stg_earthquakes Row."""
+
+    id: str
+    time: datetime
+    place: str | None
+    magnitude: float | None
+    latitude: float | None
+    longitude: float | None
+    depth_km: float | None
+    url: str | None
+
+
+def _to_datetime64(value: datetime) -> np.datetime64:
+    # stg_earthquakes.time is naive UTC; aware query bounds are compared in UTC, as in SQL
+    return np.datetime64(earthquake_repo.naive_utc(value), "us")
+
+
+def _nullable(values: list) -> list:
+    return [None if v != v else v for v in values]  # NaN -> None
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Immutable column arrays sorted by (time, id); refreshes swap in a new one."""
+
+    time: np.ndarray  # datetime64[us]
+    id: np.ndarray  # str_
+    magnitude: np.ndarray  # float64, NaN for NULL (likewise below)
+    latitude: np.ndarray
+    longitude: np.ndarray
+    depth_km: np.ndarray
+    place: np.ndarray  # object
+    url: np.ndarray  # object
+    loaded_at: np.ndarray  # datetime64[us]
+    generation: int
+    refreshed_at: float
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def watermark(self) -> datetime | None:
+        """Newest loaded_at held; incremental refreshes read rows changed after it."""
+        if len(self) == 0:
+            return None
+        return self.loaded_at.max().astype("datetime64[us]").item()
+
+    def time_range(self, start: datetime | None, end: datetime | None) -> tuple[int, int]:
+        """Index range of start <= time <= end, by binary search on the sorted times."""
+        lo = int(np.searchsorted(self.time, _to_datetime64(start), "left")) if start else 0
+        hi = int(np.searchsorted(self.time, _to_datetime64(end), "right")) if end else len(self)
+        return lo, max(lo, hi)
+
+    def keyset_bound(self, after: tuple[datetime, str], order: Literal["asc", "desc"]) -> int:
+        """First index past (time, id) for asc, or the index before which rows precede it for desc."""
+        after_time = _to_datetime64(after[0])
+        lo = int(np.searchsorted(self.time, after_time, "left"))
+        hi = int(np.searchsorted(self.time, after_time, "right"))
+        side = "right" if order == "asc" else "left"
+        return lo + int(np.searchsorted(self.id[lo:hi], after[1], side))
+
+    def match(
+        self,
+        lo: int,
+        hi: int,
+        min_magnitude: float | None,
+        max_magnitude: float | None,
+        bbox: BBox | None,
+    ) -> np.ndarray:
+        """Ascending indices in [lo, hi) that pass the magnitude and bbox filters."""
+        if min_magnitude is None and max_magnitude is None and bbox is None:
+            return np.arange(lo, hi)
+
+        mask = np.ones(hi - lo, dtype=bool)
+        # NaN compares False, so NULL values are excluded as in SQL
+        if min_magnitude is not None:
+            mask &= self.magnitude[lo:hi] >= min_magnitude
+        if max_magnitude is not None:
+            mask &= self.magnitude[lo:hi] <= max_magnitude
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            lon = self.longitude[lo:hi]
+            lat = self.latitude[lo:hi]
+            # Same semantics as the SQL box: corners are normalized, min_lon > max_lon wraps the antimeridian
+            mask &= (lat >= min(min_lat, max_lat)) & (lat <= max(min_lat, max_lat))
+            if min_lon <= max_lon:
+                mask &= (lon >= min_lon) & (lon <= max_lon)
+            else:
+                mask &= ((lon >= min_lon) & (lon <= 180)) | ((lon >= -180) & (lon <= max_lon))
+        return np.flatnonzero(mask) + lo
+
+    def rows(self, indices: np.ndarray) -> list[StoreRow]:
+        columns = zip(
+            self.id[indices].tolist(),
+            self.time[indices].tolist(),
+            self.place[indices].tolist(),
+            _nullable(self.magnitude[indices].tolist()),
+            _nullable(self.latitude[indices].tolist()),
+            _nullable(self.longitude[indices].tolist()),
+            _nullable(self.depth_km[indices].tolist()),
+            self.url[indices].tolist(),
+        )
+        return [StoreRow(*values) for values in columns]
+
+
+def _build_snapshot(old: _Snapshot | None, batches: Sequence[Sequence[Row]], generation: int) -> _Snapshot:
+    """Merge freshly read rows into the previous snapshot; revised events replace their old row."""
+    rows = [row for batch in batches for row in batch]
+    # Transpose once; columns follow stream_rows_loaded_since's SELECT list
+    columns = list(zip(*rows)) or [()] * 9
+    event_id, time_us, place, magnitude, latitude, longitude, depth_km, url, loaded_at_us = columns
+    new = {
+        "time": np.array(time_us, dtype=np.int64).view("datetime64[us]"),
+        "id": np.array(event_id, dtype=np.str_),
+        "magnitude": np.array(magnitude, dtype=np.float64),
+        "latitude": np.array(latitude, dtype=np.float64),
+        "longitude": np.array(longitude, dtype=np.float64),
+        "depth_km": np.array(depth_km, dtype=np.float64),
+        "place": np.array(place, dtype=object),
+        "url": np.array(url, dtype=object),
+        "loaded_at": np.array(loaded_at_us, dtype=np.int64).view("datetime64[us]"),
+    }
+
+    if old is not None and len(old):
+        keep = ~np.isin(old.id, new["id"])
+        for name, values in new.items():
+            new[name] = np.concatenate([getattr(old, name)[keep], values])
+
+    # NumPy compares str_ by code point, the order of earthquake_repo.ID_ORDER
+    order = np.lexsort((new["id"], new["time"]))
+    return _Snapshot(
+        **{name: values[order] for name, values in new.items()},
+        generation=generation,
+        refreshed_at=time.monotonic(),
+    )
+
+
+class ColumnarStore:
+    """
+    In-process columnar copy of stg_earthquakes held as NumPy arrays.
+
+    Loaded in the background at startup, then refreshed incrementally with the
+    rows whose loaded_at is past the snapshot's watermark (minus a lookback for
+    late dbt merges). A snapshot is only served while no ingest notification
+    has arrived since it was read and it is younger than max_staleness_secs;
+    otherwise queries return None, the caller falls back to SQL, and a
+    refresh is started. Queries read one immutable snapshot, so they never see
+    a half-applied refresh.
+    """
+
+    def __init__(
+        self,
+        freshness: FreshnessCache,
+        session_factory: Callable[[], AsyncSession],
+        max_staleness_secs: float = 300,
+        lookback_secs: float = 3600,
+        batch_size: int = 2000,
+        retry_secs: float = 30,
+    ):
+        self._freshness = freshness
+        self._session_factory = session_factory
+        self._max_staleness_secs = max_staleness_secs
+        self._lookback = timedelta(seconds=lookback_secs)
+        self._batch_size = batch_size
+        self._retry_secs = retry_secs
+        self._snapshot: _Snapshot | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._retry_at = 0.0
+
+    def _current(self) -> _Snapshot | None:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.generation == self._freshness.generation
+            and time.monotonic() - snapshot.refreshed_at < self._max_staleness_secs
+        ):
+            columnar_store_queries_total.labels(result="hit").inc()
+            return snapshot
+
+        columnar_store_queries_total.labels(result="fallback").inc()
+        self.schedule_refresh()
+        return None
+
+    def schedule_refresh(self) -> None:
+        """Start a background refresh unless one is running or the last one failed recently."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+
+    async def refresh(self) -> None:
+        """Read new and revised rows and swap in a merged snapshot."""
+        generation = self._freshness.generation
+        old = self._snapshot
+        watermark = old.watermark if old is not None else None
+        since = watermark - self._lookback if watermark is not None else None
+
+        started = time.perf_counter()
+        try:
+            async with self._session_factory() as db:
+                batches = [
+                    batch
+                    async for batch in earthquake_repo.stream_rows_loaded_since(db, since, self._batch_size)
+                ]
+            snapshot = await asyncio.to_thread(_build_snapshot, old, batches, generation)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._retry_at = time.monotonic() + self._retry_secs
+            logger.warning("Columnar store refresh failed; serving from SQL: %s", e)
+            return
+
+        self._snapshot = snapshot
+        columnar_store_rows.set(len(snapshot))
+        columnar_store_refresh_seconds.labels(kind="incremental" if old else "full").observe(
+            time.perf_counter() - started
+        )
+
+    async def close(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+
+    def get_rows(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        min_magnitude: float | None = None,
+        max_magnitude: float | None = None,
+        bbox: BBox | None = None,
+        limit: int = 50,
+        offset: int = 0,
+        order: Literal["asc", "desc"] = "desc",
+        after: tuple[datetime, str] | None = None,
+    ) -> list[StoreRow] | None:
+        """
+        Same contract as earthquake_repo.get_earthquake_rows, or None when the store can't answer.
+
+        Masks are evaluated chunk by chunk from the requested end of the time
+        range, stopping once offset + limit rows have matched.
+        """
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+
+        lo, hi = snapshot.time_range(start, end)
+        if after:
+            bound = snapshot.keyset_bound(after, order)
+            if order == "asc":
+                lo = max(lo, bound)
+            else:
+                hi = min(hi, bound)
+
+        wanted = offset + limit
+        found = 0
+        picked = []
+        if order == "asc":
+            chunks = ((a, min(a + SCAN_CHUNK, hi)) for a in range(lo, hi, SCAN_CHUNK))
+        else:
+            chunks = ((max(b - SCAN_CHUNK, lo), b) for b in range(hi, lo, -SCAN_CHUNK))
+        for a, b in chunks:
+            indices = snapshot.match(a, b, min_magnitude, max_magnitude, bbox)
+            picked.append(indices if order == "asc" else indices[::-1])
+            found += len(indices)
+            if found >= wanted:
+                break
+
+        if not picked:
+            return []
+        return snapshot.rows(np.concatenate(picked)[offset:wanted])
+
+    def time_series(
+        self,
+        interval: stats_repo.TimeInterval,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        min_magnitude: float | None = None,
+        max_magnitude: float | None = None,
+        bbox: BBox | None = None,
+    ) -> list[TimeSeriesBucket] | None:
+        """Same contract as stats_repo.get_time_series, or None when the store can't answer."""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+
+        lo, hi = snapshot.time_range(start, end)
+        indices = snapshot.match(lo, hi, min_magnitude, max_magnitude, bbox)
+        if not len(indices):
+            return []
+
+        times = snapshot.time[indices]
+        if interval == "hour":
+            keys = times.astype("datetime64[h]")
+        elif interval == "week":
+            # date_trunc('week') starts weeks on Monday; 1970-01-01 was a Thursday
+            days = times.astype("datetime64[D]").astype(np.int64)
+            keys = (days - (days + 3) % 7).astype("datetime64[D]")
+        else:
+            keys = times.astype({"day": "datetime64[D]", "month": "datetime64[M]", "year": "datetime64[Y]"}[interval])
+
+        # Times are sorted, so each bucket is one contiguous run
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        stats_repo.check_bucket_count(len(starts), interval)
+        counts = np.diff(np.append(starts, len(keys)))
+        magnitudes = snapshot.magnitude[indices]
+        maxima = np.fmax.reduceat(magnitudes, starts)
+        sums = np.add.reduceat(np.nan_to_num(magnitudes), starts)
+        present = np.add.reduceat(~np.isnan(magnitudes), starts)
+
+        return [
+            stats_repo.build_time_series_bucket(
+                bucket_start,
+                count,
+                None if maximum != maximum else maximum,
+                total / n if n else None,
+            )
+            for bucket_start, count, maximum, total, n in zip(
+                keys[starts].astype("datetime64[us]").tolist(),
+                counts.tolist(),
+                maxima.tolist(),
+                sums.tolist(),
+                present.tolist(),
+            )
+        ]
+
+    def magnitude_histogram(
+        self,
+        bin_width: float,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        min_magnitude: float | None = None,
+        max_magnitude: float | None = None,
+        bbox: BBox | None = None,
+    ) -> list[MagnitudeBin] | None:
+        """Same contract as stats_repo.get_magnitude_histogram, or None when the store can't answer."""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+
+        lo, hi = snapshot.time_range(start, end)
+        magnitudes = snapshot.magnitude[snapshot.match(lo, hi, min_magnitude, max_magnitude, bbox)]
+        magnitudes = magnitudes[~np.isnan(magnitudes)]
+        # Same edge nudge as the SQL query
+        bins, counts = np.unique(np.floor(magnitudes / bin_width + 1e-9).astype(np.int64), return_counts=True)
+        return stats_repo.build_magnitude_bins(list(zip(bins.tolist(), counts.tolist())), bin_width)
+
+    def depth_histogram(
+        self,
+        edges: list[float],
+        start: datetime | None = None,
+        end: datetime | None = None,
+        min_magnitude: float | None = None,
+        max_magnitude: float | None = None,
+        bbox: BBox | None = None,
+    ) -> list[DepthBin] | None:
+        """Same contract as stats_repo.get_depth_histogram, or None when the store can't answer."""
+        snapshot = self._current()
+        if snapshot is None:
+            return None
+
+        lo, hi = snapshot.time_range(start, end)
+        depths = snapshot.depth_km[snapshot.match(lo, hi, min_magnitude, max_magnitude, bbox)]
+        depths = depths[~np.isnan(depths)]
+        # searchsorted(side="right") numbers buckets exactly like width_bucket
+        buckets, counts = np.unique(np.searchsorted(edges, depths, "right"), return_counts=True)
+        return stats_repo.build_depth_bins(dict(zip(buckets.tolist(), counts.tolist())), edges)
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from typing import Literal
+
+from sqlalchemy import Row
+
+ExportFormat = Literal["ndjson", "csv", "geojson"]
+
+EXPORT_COLUMNS = ("event_id", "time", "magnitude", "place", "latitude", "longitude", "depth_km", "url")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "geojson": "application/geo+json",
+}
+
+
+def _row_values(row: Row) -> tuple:
+    return (
+        row.id,
+        row.time.isoformat() if row.time else None,
+        row.magnitude,
+        row.place,
+        row.latitude,
+        row.longitude,
+        row.depth_km,
+        row.url,
+    )
+
+
+def _ndjson(batch: Sequence[Row]) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(row)))) + "\n" for row in batch)
+
+
+def _csv(batch: Sequence[Row]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_row_values(row) for row in batch)
+    return buffer.getvalue()
+
+
+def _geojson_feature(row: Row) -> str:
+    values = dict(zip(EXPORT_COLUMNS, _row_values(row)))
+    return json.dumps({
+        "type": "Feature",
+        "id": values.pop("event_id"),
+        "geometry": {
+            "type": "Point",
+            "coordinates": [values.pop("longitude"), values.pop("latitude"), values.pop("depth_km")],
+        },
+        "properties": values,
+    })
+
+
+async def _encode(batches: AsyncIterator[Sequence[Row]], fmt: ExportFormat) -> AsyncIterator[str]:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+    elif fmt == "geojson":
+        yield '{"type":"FeatureCollection","features":['
+
+    first = True
+    async for batch in batches:
+        if fmt == "ndjson":
+            yield _ndjson(batch)
+        elif fmt == "csv":
+            yield _csv(batch)
+        elif batch:
+            features = ",".join(_geojson_feature(row) for row in batch)
+            yield features if first else "," + features
+            first = False
+
+    if fmt == "geojson":
+        yield "]}"
+
+
+async def encode_export(
+    batches: AsyncIterator[Sequence[Row]], fmt: ExportFormat, gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Encode streamed row batches as NDJSON, CSV or a GeoJSON FeatureCollection.
+
+    Yields one chunk per batch, optionally gzip-compressed on the fly, so the
+    response is sent with chunked transfer and memory stays bounded by a batch.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31: gzip container
+    async for text_chunk in _encode(batches, fmt):
+        data = text_chunk.encode("utf-8")
+        if compressor is None:
+            yield data
+        else:
+            compressed = compressor.compress(data)
+            if compressed:
+                yield compressed
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from app.schemas import EarthquakeItem
+
+
+def features_digest(body: bytes) -> str:
+    """
+    Hash the features of a USGS GeoJSON body.
+
+    USGS stamps every response with metadata.generated, so only the bytes from
+    the "features" key onward are hashed; unchanged events give the same digest.
+    """
+    start = body.find(b'"features"')
+    return hashlib.sha256(body[start:] if start != -1 else body).hexdigest()
+
+
+class FetchCache:
+    """
+    On-disk cache of USGS responses keyed by normalized query parameters.
+
+    Each entry stores the ETag/Last-Modified validators, the features digest and
+    the raw body. Parsed results are kept in a small in-memory LRU keyed by
+    digest, so an unchanged response is neither re-parsed nor re-validated.
+
+    starttime and endtime are floored to time_bucket_secs in the key, so
+    now-relative windows (the live feed asks for "the last hour" on every poll)
+    share one entry per bucket instead of adding one per request. Validators
+    and bodies are only reused for the exact query they were stored for.
+    Entries expire ttl_secs after they were stored, and past max_entries the
+    oldest are evicted.
+    """
+
+    _TIME_PARAMS = ("starttime", "endtime")
+
+    def __init__(
+        self,
+        directory: str,
+        max_parsed: int = 32,
+        max_entries: int = 256,
+        ttl_secs: float = 3600,
+        time_bucket_secs: int = 60,
+    ):
+        self._directory = directory
+        self._max_parsed = max_parsed
+        self._max_entries = max_entries
+        self._ttl_secs = ttl_secs
+        self._time_bucket_secs = time_bucket_secs
+        self._parsed: OrderedDict[str, list[EarthquakeItem]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(params: dict) -> dict:
+        return {str(k).lower(): str(v) for k, v in params.items()}
+
+    @staticmethod
+    def _hash(normalized: dict) -> str:
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    def _bucket(self, value: str) -> str:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        epoch = parsed.replace(tzinfo=parsed.tzinfo or timezone.utc).timestamp()
+        return str(int(epoch // self._time_bucket_secs))
+
+    def key(self, params: dict) -> str:
+        """Cache key for a query: a hash of its normalized parameters, with times bucketed."""
+        normalized = self._normalize(params)
+        for name in self._TIME_PARAMS:
+            if name in normalized:
+                normalized[name] = self._bucket(normalized[name])
+        return self._hash(normalized)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self._directory, f"{key}{suffix}")
+
+    def _meta(self, key: str, params: dict | None = None) -> dict | None:
+        """The entry's metadata if it is unexpired and, given params, was stored for exactly that query."""
+        path = self._path(key, ".json")
+        try:
+            if os.stat(path).st_mtime + self._ttl_secs <= time.time():
+                return None
+            with open(path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if params is not None and meta.get("query") != self._hash(self._normalize(params)):
+            return None
+        return meta
+
+    def conditional_headers(self, key: str, params: dict) -> dict:
+        """Validators to send with the next request for this query."""
+        meta = self._meta(key, params)
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def get_parsed(self, digest: str) -> list[EarthquakeItem] | None:
+        with self._lock:
+            items = self._parsed.get(digest)
+            if items is not None:
+                self._parsed.move_to_end(digest)
+            return items
+
+    def put_parsed(self, digest: str, items: list[EarthquakeItem]) -> None:
+        with self._lock:
+            self._parsed[digest] = items
+            self._parsed.move_to_end(digest)
+            while len(self._parsed) > self._max_parsed:
+                self._parsed.popitem(last=False)
+
+    def cached(self, key: str, params: dict) -> tuple[str, bytes] | None:
+        """Return (digest, body) stored for this query, if any."""
+        meta = self._meta(key, params)
+        if meta is None:
+            return None
+        try:
+            with open(self._path(key, ".body"), "rb") as f:
+                return meta["digest"], f.read()
+        except FileNotFoundError:
+            return None
+
+    def digest_for(self, key: str) -> str | None:
+        meta = self._meta(key)
+        return meta.get("digest") if meta else None
+
+    def store(
+        self, key: str, params: dict, body: bytes, digest: str, etag: str | None, last_modified: str | None
+    ) -> None:
+        """Persist a response body and its validators (atomic per file), then evict old entries."""
+        os.makedirs(self._directory, exist_ok=True)
+        self._write(self._path(key, ".body"), body)
+        meta = {
+            "query": self._hash(self._normalize(params)),
+            "digest": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        # Written last: its mtime is the entry's age
+        self._write(self._path(key, ".json"), json.dumps(meta).encode())
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired entries, then the oldest, once over max_entries."""
+        now = time.time()
+        live = []
+        for entry in os.scandir(self._directory):
+            if not entry.name.endswith(".json"):
+                continue
+            key = entry.name[: -len(".json")]
+            try:
+                stored_at = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if stored_at + self._ttl_secs <= now:
+                self._remove(key)
+            else:
+                live.append((stored_at, key))
+        live.sort()
+        for _, key in live[: max(0, len(live) - self._max_entries)]:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        for suffix in (".json", ".body"):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.metrics import (
+    freshness_cache_hits_total,
+    freshness_cache_misses_total,
+    freshness_invalidations_total,
+)
+from app.repositories import earthquakes as earthquake_repo
+
+logger = logging.getLogger(__name__)
+
+
+class FreshnessCache:
+    """
+    In-process cache of the data_fresh_as_of watermark (MAX(time) of the data).
+
+    The value is reloaded when the TTL expires or when the loader signals new
+    data over Postgres LISTEN/NOTIFY, whichever comes first. Concurrent misses
+    share a single query.
+    """
+
+    def __init__(self, ttl_secs: float = 60):
+        self._ttl_secs = ttl_secs
+        self._value: datetime | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation; lets other caches detect new data."""
+        return self._generation
+
+    async def get(self, db: AsyncSession) -> datetime | None:
+        """Return the cached watermark, querying the database on a miss."""
+        if time.monotonic() < self._expires_at:
+            freshness_cache_hits_total.inc()
+            return self._value
+
+        async with self._lock:
+            # Another request may have refreshed it while we waited
+            if time.monotonic() < self._expires_at:
+                freshness_cache_hits_total.inc()
+                return self._value
+
+            freshness_cache_misses_total.inc()
+            generation = self._generation
+            value = await earthquake_repo.get_max_event_time(db)
+            # Don't cache a value read before an invalidation that arrived mid-query
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self._ttl_secs
+            return value
+
+    def invalidate(self) -> None:
+        """Drop the cached watermark so the next request reloads it."""
+        self._generation += 1
+        self._expires_at = 0.0
+        freshness_invalidations_total.inc()
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        logger.debug("Ingest notification on %s: %s", channel, payload)
+        self.invalidate()
+
+    async def listen(self, dsn: str, channel: str, retry_secs: float = 5.0) -> None:
+        """
+        LISTEN on the loader's channel and invalidate on every notification.
+
+        Runs until cancelled, reconnecting after connection loss. Notifications
+        sent while disconnected are lost, so each (re)connect also invalidates;
+        in between, the TTL bounds staleness.
+        """
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(channel, self._on_notify)
+                self.invalidate()
+                await closed.wait()
+                logger.warning("Freshness listener connection closed; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Freshness listener failed: %s", e)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(retry_secs)
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Literal, NamedTuple
+
+import orjson
+
+from app.metrics import (
+    live_feed_changes_total,
+    live_feed_dropped_subscribers_total,
+    live_feed_polls_total,
+    live_feed_subscribers,
+)
+from app.schemas import EarthquakeItem
+
+logger = logging.getLogger(__name__)
+
+ChangeKind = Literal["new", "updated"]
+
+# A poll returns the current events and where they came from (usgs, db_fallback)
+PollResult = tuple[list[EarthquakeItem], str]
+
+
+class Change(NamedTuple):
+    kind: ChangeKind
+    item: EarthquakeItem
+    encoded: bytes  # item as JSON, encoded once and shared by every subscriber
+
+
+class FeedMessage(NamedTuple):
+    type: Literal["snapshot", "changes", "heartbeat"]
+    seq: int  # Poll number the message reflects
+    body: bytes  # JSON object; b"{}" for heartbeats
+
+
+def _fingerprint(item: EarthquakeItem) -> tuple:
+    """Fields whose change makes an already-seen event an update."""
+    return (item.time, item.magnitude, item.place, item.latitude, item.longitude, item.depth_km, item.url)
+
+
+def _encode(item: EarthquakeItem) -> bytes:
+    return orjson.dumps(item.model_dump(mode="json"))
+
+
+@dataclass(eq=False)
+class Subscription:
+    """One connected client: its filters and the queue of change batches waiting to be sent."""
+
+    min_magnitude: float | None = None
+    bbox: tuple[float, float, float, float] | None = None
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    dropped: bool = False
+
+    def matches(self, item: EarthquakeItem) -> bool:
+        """Apply the subscriber's filters, with the same semantics as the SQL filters."""
+        if self.min_magnitude is not None and (item.magnitude is None or item.magnitude < self.min_magnitude):
+            return False
+        if self.bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            if item.latitude is None or item.longitude is None:
+                return False
+            if not min_lat <= item.latitude <= max_lat:
+                return False
+            if min_lon <= max_lon:
+                return min_lon <= item.longitude <= max_lon
+            # Crosses the antimeridian
+            return item.longitude >= min_lon or item.longitude <= max_lon
+        return True
+
+
+class LiveFeed:
+    """
+    One background poller shared by every push subscriber in this worker.
+
+    While anyone is subscribed, poll() runs every interval_secs. Each result
+    is diffed against the previous one by event_id, and only new and updated
+    events are pushed, filtered per subscriber. Upstream load is one poll per
+    interval per worker, however many clients are connected.
+
+    Subscribers get a snapshot of the current events first, then change
+    batches. Both are upserts keyed by event_id. A subscriber that falls
+    queue_size batches behind is dropped, and reconnects to a fresh snapshot.
+    """
+
+    def __init__(
+        self,
+        poll: Callable[[], Awaitable[PollResult]],
+        interval_secs: float = 10,
+        queue_size: int = 100,
+        heartbeat_secs: float = 15,
+    ):
+        self._poll = poll
+        self._interval_secs = interval_secs
+        self._queue_size = queue_size
+        self._heartbeat_secs = heartbeat_secs
+        self._events: dict[str, EarthquakeItem] = {}
+        self._encoded: dict[str, bytes] = {}
+        self._fingerprints: dict[str, tuple] = {}
+        self._subscribers: set[Subscription] = set()
+        self._seq = 0
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self, min_magnitude: float | None = None, bbox: tuple[float, float, float, float] | None = None
+    ) -> Subscription:
+        """Register a subscriber, starting the poller if it is the first."""
+        subscription = Subscription(min_magnitude, bbox, asyncio.Queue(maxsize=self._queue_size))
+        self._subscribers.add(subscription)
+        live_feed_subscribers.set(len(self._subscribers))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber, stopping the poller after the last one leaves."""
+        self._subscribers.discard(subscription)
+        live_feed_subscribers.set(len(self._subscribers))
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._reset()
+
+    def _reset(self) -> None:
+        """
+        Forget the last poll once nobody is watching.
+
+        The next subscriber then waits for a fresh poll instead of getting a
+        snapshot of however long ago the poller stopped, and that poll is a
+        new baseline rather than a burst of everything that changed meanwhile.
+        """
+        self._events = {}
+        self._encoded = {}
+        self._fingerprints = {}
+        self._ready.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                items, source = await self._poll()
+            except Exception as e:
+                live_feed_polls_total.labels(source="error").inc()
+                logger.warning("Live feed poll failed: %s", e)
+            else:
+                live_feed_polls_total.labels(source=source).inc()
+                self.apply(items)
+            await asyncio.sleep(self._interval_secs)
+
+    def apply(self, items: list[EarthquakeItem]) -> list[Change]:
+        """
+        Replace the current events with a poll result and broadcast the difference.
+
+        The first poll only sets the baseline for snapshots. Events missing
+        from a later poll (aged out of the window) are dropped silently.
+        """
+        changes = []
+        fingerprints = {}
+        for item in items:
+            fingerprint = _fingerprint(item)
+            fingerprints[item.event_id] = fingerprint
+            previous = self._fingerprints.get(item.event_id)
+            if previous == fingerprint:
+                continue
+            encoded = _encode(item)
+            self._encoded[item.event_id] = encoded
+            changes.append(Change("new" if previous is None else "updated", item, encoded))
+
+        first = not self._ready.is_set()
+        self._fingerprints = fingerprints
+        self._events = {item.event_id: item for item in items}
+        self._encoded = {event_id: self._encoded[event_id] for event_id in self._events}
+        self._seq += 1
+        self._ready.set()
+
+        if first or not changes:
+            return []
+        for change in changes:
+            live_feed_changes_total.labels(kind=change.kind).inc()
+        self._broadcast(changes)
+        return changes
+
+    def _broadcast(self, changes: list[Change]) -> None:
+        for subscription in list(self._subscribers):
+            matching = [change for change in changes if subscription.matches(change.item)]
+            if not matching:
+                continue
+            try:
+                subscription.queue.put_nowait((self._seq, matching))
+            except asyncio.QueueFull:
+                # Too slow to keep up: cut it loose rather than buffer without bound
+                live_feed_dropped_subscribers_total.inc()
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+
+    def snapshot(self, subscription: Subscription) -> FeedMessage:
+        """Current events matching the subscription, newest first."""
+        items = sorted(
+            (item for item in self._events.values() if subscription.matches(item)),
+            key=lambda item: (item.time, item.event_id),
+            reverse=True,
+        )
+        body = b'{"items":[' + b",".join(self._encoded[item.event_id] for item in items) + b"]}"
+        return FeedMessage("snapshot", self._seq, body)
+
+    @staticmethod
+    def changes_message(seq: int, changes: list[Change]) -> FeedMessage:
+        new = b",".join(change.encoded for change in changes if change.kind == "new")
+        updated = b",".join(change.encoded for change in changes if change.kind == "updated")
+        return FeedMessage("changes", seq, b'{"new":[' + new + b'],"updated":[' + updated + b"]}")
+
+    async def messages(self, subscription: Subscription) -> AsyncIterator[FeedMessage]:
+        """
+        Messages for one subscriber: a snapshot, then change batches, with heartbeats while idle.
+
+        Ends when the subscriber is dropped for falling behind. The caller must
+        unsubscribe when done.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), self._interval_secs * 2)
+        except asyncio.TimeoutError:
+            pass  # Upstream is failing; start from an empty snapshot
+        yield self.snapshot(subscription)
+
+        while not subscription.dropped:
+            try:
+                seq, changes = await asyncio.wait_for(subscription.queue.get(), self._heartbeat_secs)
+            except asyncio.TimeoutError:
+                if subscription.dropped:
+                    break
+                yield FeedMessage("heartbeat", self._seq, b"{}")
+                continue
+            yield self.changes_message(seq, changes)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._reset()
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Response
+
+from app.metrics import (
+    result_cache_bytes,
+    result_cache_entries,
+    result_cache_evictions_total,
+    result_cache_hits_total,
+    result_cache_misses_total,
+    result_cache_not_modified_total,
+)
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    body: bytes
+    etag: str
+    generation: int
+    expires_at: float
+
+    def response(self, if_none_match: str | None, cache_status: str) -> Response:
+        """Build the HTTP response, answering 304 when the client's ETag matches."""
+        headers = {"ETag": self.etag, "X-Cache": cache_status}
+        if etag_matches(if_none_match, self.etag):
+            result_cache_not_modified_total.inc()
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against a strong ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache of pre-serialized JSON responses.
+
+    Entries are keyed on the request path and its normalized query parameters.
+    Each entry records the ingest generation it was built under and is treated
+    as stale once new data has been loaded, as well as after ttl_secs.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl_secs: float = 30):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl_secs = ttl_secs
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, params: dict) -> str:
+        """Cache key for a request: path plus its validated parameters, sorted, without unset ones."""
+        normalized = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
+        return f"{path}?{normalized}"
+
+    def get(self, key: str, generation: int) -> CachedResult | None:
+        """Return a live entry for key, dropping it if expired or built before new data."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.generation != generation or entry.expires_at <= time.monotonic()):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                result_cache_misses_total.inc()
+                return None
+            self._entries.move_to_end(key)
+            result_cache_hits_total.inc()
+            return entry
+
+    def put(self, key: str, body: bytes, generation: int) -> CachedResult:
+        """Store a serialized response body under a strong ETag derived from its bytes."""
+        entry = CachedResult(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            generation=generation,
+            expires_at=time.monotonic() + self._ttl_secs,
+        )
+        if len(body) > self._max_bytes:
+            return entry
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                result_cache_evictions_total.inc()
+            self._emit_size()
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._emit_size()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        self._emit_size()
+
+    def _emit_size(self) -> None:
+        result_cache_entries.set(len(self._entries))
+        result_cache_bytes.set(self._bytes)
@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent upstream request durations.
+
+    Feeds the same samples as the usgs_request_duration_seconds histogram, but
+    over the last window requests only, so the derived timeout and hedge delay
+    follow current conditions instead of all-time averages.
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        min_timeout_secs: float = 0.5,
+        max_timeout_secs: float = 3.0,
+        p99_multiplier: float = 2.0,
+    ):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._min_timeout_secs = min_timeout_secs
+        self._max_timeout_secs = max_timeout_secs
+        self._p99_multiplier = p99_multiplier
+        self._lock = threading.Lock()
+
+    def observe(self, duration: float) -> None:
+        with self._lock:
+            self._samples.append(duration)
+
+    def quantile(self, q: float) -> float | None:
+        """The q-quantile of the window, or None until min_samples have been seen."""
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        """Per-attempt timeout: p99 times the multiplier, within [min, max]; max until warmed up."""
+        p99 = self.quantile(0.99)
+        if p99 is None:
+            return self._max_timeout_secs
+        return min(self._max_timeout_secs, max(self._min_timeout_secs, p99 * self._p99_multiplier))
+
+    def hedge_delay(self) -> float | None:
+        """How long to wait before hedging: the p95, or None until warmed up."""
+        return self.quantile(0.95)
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries (and hedges) to a share of first attempts.
+
+    Every request deposits ratio tokens and time adds min_per_sec more, up to
+    max_tokens; each retry spends one. During an outage retries dry up at
+    about ratio x request rate instead of multiplying the load on upstream.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_sec: float = 0.5, max_tokens: float = 10):
+        self._ratio = ratio
+        self._min_per_sec = min_per_sec
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount: float) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self._max_tokens, self._tokens + amount + elapsed * self._min_per_sec)
+
+    def record_request(self) -> None:
+        """Count a first attempt toward the retries it earns."""
+        with self._lock:
+            self._refill(self._ratio)
+
+    def try_spend(self) -> bool:
+        """Take one token for a retry or hedge; False if the budget is exhausted."""
+        with self._lock:
+            self._refill(0)
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def jittered_backoff(attempt: int, base_secs: float, max_secs: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(max_secs, base_secs * 2**attempt))
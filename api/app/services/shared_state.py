@@ -0,0 +1,332 @@
+"""
+State shared between uvicorn workers on one host.
+
+The circuit breaker keeps its state in a BreakerStore, and the /earthquakes/live
+micro-cache can mirror its entries into a SharedCache. SHARED_STATE_BACKEND
+selects the implementation:
+
+- memory: per-process state (one breaker per worker), the default
+- mmap: breaker state in a memory-mapped file, cache entries as files, both
+  under SHARED_STATE_DIR (a tmpfs such as /dev/shm keeps them in RAM)
+- redis: both in Redis at SHARED_STATE_REDIS_URL, through the asyncio client
+"""
+import fcntl
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from typing import TypeVar
+
+from app.metrics import shared_state_errors_total
+from app.settings import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class BreakerSnapshot:
+    state: str = "closed"  # closed, open, half_open
+    failure_count: int = 0
+    last_failure_time: float | None = None
+    probe_until: float | None = None  # Half-open probe in flight until this time
+
+
+class BreakerStore(ABC):
+    """Holds one BreakerSnapshot and applies read-modify-write updates to it atomically."""
+
+    name = "memory"
+
+    @abstractmethod
+    async def transact(self, fn: Callable[[BreakerSnapshot], T]) -> T:
+        """Run fn on the current snapshot, save any changes it makes, and return its result."""
+
+    def close(self) -> None:
+        pass
+
+
+class LocalBreakerStore(BreakerStore):
+    """Per-process state guarded by a thread lock."""
+
+    def __init__(self):
+        self._snapshot = BreakerSnapshot()
+        self._lock = threading.Lock()
+
+    async def transact(self, fn: Callable[[BreakerSnapshot], T]) -> T:
+        with self._lock:
+            return fn(self._snapshot)
+
+
+class MmapBreakerStore(BreakerStore):
+    """
+    State in a small memory-mapped file, locked with flock for each update.
+
+    Every process that maps the same path shares one breaker. An empty
+    (new) file reads as a closed breaker.
+    """
+
+    name = "mmap"
+
+    # magic, state, failure_count, last_failure_time, probe_until (NaN for None)
+    _LAYOUT = struct.Struct("<4sB3xidd")
+    _MAGIC = b"CB01"
+    _STATES = ("closed", "open", "half_open")
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._file_lock():
+            if os.fstat(self._fd).st_size < self._LAYOUT.size:
+                os.ftruncate(self._fd, self._LAYOUT.size)
+        self._map = mmap.mmap(self._fd, self._LAYOUT.size)
+        # flock is held per open file, so threads of this process also need a lock
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read(self) -> BreakerSnapshot:
+        magic, state, failure_count, last_failure_time, probe_until = self._LAYOUT.unpack_from(self._map)
+        if magic != self._MAGIC:
+            return BreakerSnapshot()
+        return BreakerSnapshot(
+            state=self._STATES[state],
+            failure_count=failure_count,
+            last_failure_time=None if math.isnan(last_failure_time) else last_failure_time,
+            probe_until=None if math.isnan(probe_until) else probe_until,
+        )
+
+    def _write(self, snapshot: BreakerSnapshot) -> None:
+        self._LAYOUT.pack_into(
+            self._map,
+            0,
+            self._MAGIC,
+            self._STATES.index(snapshot.state),
+            snapshot.failure_count,
+            math.nan if snapshot.last_failure_time is None else snapshot.last_failure_time,
+            math.nan if snapshot.probe_until is None else snapshot.probe_until,
+        )
+
+    async def transact(self, fn: Callable[[BreakerSnapshot], T]) -> T:
+        # Held for a few microseconds of local memory access, so it runs on the event loop
+        with self._lock, self._file_lock():
+            snapshot = self._read()
+            before = replace(snapshot)
+            result = fn(snapshot)
+            if snapshot != before:
+                self._write(snapshot)
+            return result
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class RedisBreakerStore(BreakerStore):
+    """
+    State as a JSON string in Redis, updated with WATCH/MULTI on an asyncio client.
+
+    An update that keeps losing the WATCH race to other workers is retried
+    max_attempts times. After that, or if Redis is unreachable, the breaker
+    keeps working on per-process state rather than failing or stalling the
+    request.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, key: str, max_attempts: int = 3):
+        self._client = client
+        self._key = key
+        self._max_attempts = max_attempts
+        self._fallback = LocalBreakerStore()
+
+    async def transact(self, fn: Callable[[BreakerSnapshot], T]) -> T:
+        from redis.exceptions import RedisError, WatchError
+
+        try:
+            async with self._client.pipeline() as pipe:
+                for _ in range(self._max_attempts):
+                    try:
+                        await pipe.watch(self._key)
+                        raw = await pipe.get(self._key)
+                        snapshot = BreakerSnapshot(**json.loads(raw)) if raw else BreakerSnapshot()
+                        before = replace(snapshot)
+                        result = fn(snapshot)
+                        pipe.multi()
+                        if snapshot != before:
+                            pipe.set(self._key, json.dumps(asdict(snapshot)))
+                        await pipe.execute()
+                        return result
+                    except WatchError:
+                        # Another worker updated the state first; retry on its version
+                        continue
+            shared_state_errors_total.labels(backend=self.name, op="breaker_conflict").inc()
+        except RedisError:
+            shared_state_errors_total.labels(backend=self.name, op="breaker").inc()
+        return await self._fallback.transact(fn)
+
+
+class SharedCache(ABC):
+    """Byte values with a TTL, visible to every worker."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Return the value for key if present and unexpired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_secs: float) -> None:
+        """Store value under key for ttl_secs."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every entry."""
+
+
+class DirectoryCache(SharedCache):
+    """
+    One file per entry in a directory, prefixed with its expiry time.
+
+    Writes are atomic renames, so readers never see a partial entry. On a
+    tmpfs such as /dev/shm the files are shared memory pages, so the file
+    operations run directly on the event loop.
+    """
+
+    _HEADER = struct.Struct("<d")  # expires_at (wall clock)
+
+    def __init__(self, directory: str, max_entries: int = 256):
+        self._directory = directory
+        self._max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, hashlib.sha256(key.encode()).hexdigest())
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < self._HEADER.size or self._HEADER.unpack_from(data)[0] <= time.time():
+            return None
+        return data[self._HEADER.size :]
+
+    async def set(self, key: str, value: bytes, ttl_secs: float) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self._HEADER.pack(time.time() + ttl_secs))
+            f.write(value)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired entries, then the oldest, once over max_entries."""
+        entries = [e for e in os.scandir(self._directory) if not e.name.endswith(".tmp")]
+        if len(entries) <= self._max_entries:
+            return
+        now = time.time()
+        live = []
+        for entry in entries:
+            try:
+                with open(entry.path, "rb") as f:
+                    expires_at = self._HEADER.unpack(f.read(self._HEADER.size))[0]
+                if expires_at > now:
+                    live.append((expires_at, entry.path))
+                    continue
+                os.remove(entry.path)
+            except (FileNotFoundError, struct.error):
+                continue
+        live.sort()
+        for _, path in live[: max(0, len(live) - self._max_entries)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def clear(self) -> None:
+        for entry in os.scandir(self._directory):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+class RedisCache(SharedCache):
+    """Entries as Redis strings with PX expiry, on an asyncio client; Redis errors read as misses."""
+
+    def __init__(self, client, prefix: str):
+        self._client = client
+        self._prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        from redis.exceptions import RedisError
+
+        try:
+            return await self._client.get(self._prefix + key)
+        except RedisError:
+            shared_state_errors_total.labels(backend="redis", op="cache").inc()
+            return None
+
+    async def set(self, key: str, value: bytes, ttl_secs: float) -> None:
+        from redis.exceptions import RedisError
+
+        try:
+            await self._client.set(self._prefix + key, value, px=max(1, int(ttl_secs * 1000)))
+        except RedisError:
+            shared_state_errors_total.labels(backend="redis", op="cache").inc()
+
+    async def clear(self) -> None:
+        from redis.exceptions import RedisError
+
+        try:
+            keys = [key async for key in self._client.scan_iter(match=f"{self._prefix}*")]
+            if keys:
+                await self._client.delete(*keys)
+        except RedisError:
+            shared_state_errors_total.labels(backend="redis", op="cache").inc()
+
+
+def _redis_client():
+    try:
+        import redis.asyncio
+    except ImportError as e:
+        raise RuntimeError("SHARED_STATE_BACKEND=redis requires the redis package") from e
+    timeout = settings.shared_state_redis_timeout_secs
+    return redis.asyncio.Redis.from_url(
+        settings.shared_state_redis_url, socket_timeout=timeout, socket_connect_timeout=timeout
+    )
+
+
+def breaker_store() -> BreakerStore:
+    """The circuit breaker store for the configured backend."""
+    if settings.shared_state_backend == "mmap":
+        return MmapBreakerStore(os.path.join(settings.shared_state_dir, "circuit_breaker"))
+    if settings.shared_state_backend == "redis":
+        return RedisBreakerStore(_redis_client(), f"{settings.shared_state_redis_prefix}circuit_breaker")
+    return LocalBreakerStore()
+
+
+def live_cache() -> SharedCache | None:
+    """The shared /earthquakes/live cache, or None to keep it per process."""
+    if not settings.live_cache_shared:
+        return None
+    if settings.shared_state_backend == "mmap":
+        return DirectoryCache(
+            os.path.join(settings.shared_state_dir, "live"), max_entries=settings.live_cache_max_entries
+        )
+    if settings.shared_state_backend == "redis":
+        return RedisCache(_redis_client(), f"{settings.shared_state_redis_prefix}live:")
+    return None
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any, Generic, NamedTuple, TypeVar
+
+import orjson
+
+from app.metrics import live_fetch_total
+from app.services.shared_state import SharedCache
+
+T = TypeVar("T")
+
+
+class FlightResult(NamedTuple, Generic[T]):
+    value: T
+    fetched_at: datetime
+    cache_status: str  # hit, coalesced, miss
+
+
+class SingleFlightCache(Generic[T]):
+    """
+    Request coalescing plus a short-TTL micro-cache for upstream fetches.
+
+    Concurrent calls with the same key share one in-flight fetch, run as its
+    own task so that a caller going away does not cancel it for the others.
+    Successful results are kept for ttl_secs; failures are not cached, and
+    every waiter of a failed flight sees the same exception.
+
+    With a shared cache, results are also published for other workers, as
+    encode(value) in a JSON envelope, and a local miss checks there before
+    fetching. Coalescing stays per process.
+    """
+
+    def __init__(
+        self,
+        ttl_secs: float = 5,
+        max_entries: int = 256,
+        shared: SharedCache | None = None,
+        encode: Callable[[T], Any] | None = None,
+        decode: Callable[[Any], T] | None = None,
+    ):
+        self._ttl_secs = ttl_secs
+        self._max_entries = max_entries
+        self._results: OrderedDict[str, tuple[float, T, datetime]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._shared = shared if ttl_secs > 0 else None
+        self._encode = encode or (lambda value: value)
+        self._decode = decode or (lambda data: data)
+
+    async def get(self, key: str) -> FlightResult[T] | None:
+        """Return a cached result that is still within its TTL."""
+        cached = self._results.get(key)
+        if cached is not None and cached[0] <= time.monotonic():
+            del self._results[key]
+            cached = None
+        if cached is None:
+            return await self._get_shared(key)
+        _, value, fetched_at = cached
+        self._results.move_to_end(key)
+        live_fetch_total.labels(result="hit").inc()
+        return FlightResult(value, fetched_at, "hit")
+
+    async def _get_shared(self, key: str) -> FlightResult[T] | None:
+        """Adopt another worker's result for key, keeping it locally for the rest of its TTL."""
+        if self._shared is None:
+            return None
+        raw = await self._shared.get(key)
+        if raw is None:
+            return None
+        envelope = orjson.loads(raw)
+        fetched_at = datetime.fromisoformat(envelope["fetched_at"])
+        remaining = self._ttl_secs - (datetime.utcnow() - fetched_at).total_seconds()
+        if remaining <= 0:
+            return None
+        value = self._decode(envelope["value"])
+        self._store(key, time.monotonic() + remaining, value, fetched_at)
+        live_fetch_total.labels(result="shared_hit").inc()
+        return FlightResult(value, fetched_at, "hit")
+
+    def _store(self, key: str, expires_at: float, value: T, fetched_at: datetime) -> None:
+        self._results[key] = (expires_at, value, fetched_at)
+        self._results.move_to_end(key)
+        while len(self._results) > self._max_entries:
+            self._results.popitem(last=False)
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a fetch for key is running, so fetch() would join it rather than start one."""
+        return key in self._inflight
+
+    async def fetch(self, key: str, fetcher: Callable[[], Awaitable[T]]) -> FlightResult[T]:
+        """Join the in-flight fetch for key, or start one."""
+        task = self._inflight.get(key)
+        if task is not None:
+            live_fetch_total.labels(result="coalesced").inc()
+            value, fetched_at = await asyncio.shield(task)
+            return FlightResult(value, fetched_at, "coalesced")
+
+        live_fetch_total.labels(result="miss").inc()
+        task = asyncio.create_task(self._run(key, fetcher))
+        self._inflight[key] = task
+        value, fetched_at = await asyncio.shield(task)
+        return FlightResult(value, fetched_at, "miss")
+
+    async def _run(self, key: str, fetcher: Callable[[], Awaitable[T]]) -> tuple[T, datetime]:
+        try:
+            value = await fetcher()
+            fetched_at = datetime.utcnow()
+            if self._ttl_secs > 0:
+                self._store(key, time.monotonic() + self._ttl_secs, value, fetched_at)
+            if self._shared is not None:
+                envelope = {"fetched_at": fetched_at.isoformat(), "value": self._encode(value)}
+                await self._shared.set(key, orjson.dumps(envelope), self._ttl_secs)
+            return value, fetched_at
+        finally:
+            self._inflight.pop(key, None)
+
+    async def clear(self) -> None:
+        self._results.clear()
+        if self._shared is not None:
+            await self._shared.clear()
@@ -1,12 +1,55 @@
+import asyncio
+import json
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 
 import httpx
 
-from app.metrics import usgs_request_duration_seconds, usgs_requests_total
+from app.metrics import (
+    usgs_adaptive_timeout_seconds,
+    usgs_connections_total,
+    usgs_fetch_cache_hits_total,
+    usgs_fetch_cache_misses_total,
+    usgs_hedged_requests_total,
+    usgs_pool_wait_seconds,
+    usgs_request_duration_seconds,
+    usgs_requests_total,
+    usgs_retry_budget_exhausted_total,
+)
 from app.schemas import EarthquakeItem
+from app.services.fetch_cache import FetchCache, features_digest
+from app.services.retry_policy import LatencyTracker, RetryBudget, jittered_backoff
 from app.settings import settings
 
+fetch_cache = (
+    FetchCache(
+        settings.usgs_cache_dir,
+        max_entries=settings.usgs_cache_max_entries,
+        ttl_secs=settings.usgs_cache_ttl_secs,
+        time_bucket_secs=settings.usgs_cache_time_bucket_secs,
+    )
+    if settings.usgs_cache_enabled
+    else None
+)
+
+# Recent USGS latencies, driving per-attempt timeouts and the hedge delay
+latency = LatencyTracker(
+    window=settings.usgs_latency_window,
+    min_samples=settings.usgs_latency_min_samples,
+    min_timeout_secs=settings.usgs_timeout_min_secs,
+    max_timeout_secs=settings.usgs_timeout_secs,
+    p99_multiplier=settings.usgs_timeout_p99_multiplier,
+)
+
+# Process-wide cap on retries and hedges, so an outage does not multiply upstream load
+retry_budget = RetryBudget(
+    ratio=settings.usgs_retry_budget_ratio,
+    min_per_sec=settings.usgs_retry_budget_min_per_sec,
+)
+
+# Shared keep-alive client; opened and closed by the app lifespan
+_client: httpx.AsyncClient | None = None
+
 
 class USGSClientError(Exception):
     """Error communicating with USGS API."""
@@ -14,28 +57,154 @@ class USGSClientError(Exception):
     pass
 
 
-def fetch_earthquakes(
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.usgs_timeout_secs,
+        limits=httpx.Limits(
+            max_connections=settings.usgs_max_connections,
+            max_keepalive_connections=settings.usgs_max_keepalive_connections,
+            keepalive_expiry=settings.usgs_keepalive_expiry_secs,
+        ),
+        http2=settings.usgs_http2,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared USGS client, creating it on first use outside the lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _new_client()
+    return _client
+
+
+async def open_client() -> None:
+    """Create the shared client; called on app startup."""
+    get_client()
+
+
+async def close_client() -> None:
+    """Close pooled connections; called on app shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _connection_trace():
+    """
+    httpcore trace hook recording whether a request opened a new connection or
+    reused a pooled one, and how long it waited before its connection was ready
+    to use (pool wait plus any TCP/TLS setup that had to start).
+    """
+    started = time.monotonic()
+    recorded = False
+
+    async def trace(event_name: str, info: dict) -> None:
+        nonlocal recorded
+        if recorded:
+            return
+        if event_name == "connection.connect_tcp.started":
+            kind = "new"
+        elif event_name.endswith(".send_request_headers.started"):
+            kind = "reused"
+        else:
+            return
+        recorded = True
+        usgs_connections_total.labels(kind=kind).inc()
+        usgs_pool_wait_seconds.observe(time.monotonic() - started)
+
+    return trace
+
+
+async def _timed_get(params: dict, headers: dict) -> httpx.Response:
+    """One USGS request; its duration is recorded even if it fails or is cancelled."""
+    request_start = time.monotonic()
+    try:
+        return await get_client().get(
+            settings.usgs_base_url,
+            params=params,
+            headers=headers,
+            extensions={"trace": _connection_trace()},
+        )
+    finally:
+        duration = time.monotonic() - request_start
+        usgs_request_duration_seconds.observe(duration)
+        latency.observe(duration)
+
+
+async def _hedged_get(params: dict, headers: dict, timeout: float) -> httpx.Response:
+    """
+    Send a request, and if it has not answered by the p95 latency, a second one.
+
+    The first response wins and the other request is cancelled. Hedges spend
+    retry budget, and are skipped when hedging is off, before the latency
+    window has warmed up, or when the hedge would start after the timeout.
+    """
+    primary = asyncio.create_task(_timed_get(params, headers))
+    hedge_delay = latency.hedge_delay() if settings.usgs_hedge_enabled else None
+    if hedge_delay is None or hedge_delay >= timeout:
+        return await asyncio.wait_for(primary, timeout)
+
+    deadline = time.monotonic() + timeout
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+        if done:
+            return primary.result()
+        if retry_budget.try_spend():
+            hedge = asyncio.create_task(_timed_get(params, headers))
+            pending.add(hedge)
+        else:
+            usgs_retry_budget_exhausted_total.labels(kind="hedge").inc()
+            hedge = None
+
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=deadline - time.monotonic(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise TimeoutError(f"USGS request exceeded {timeout:.2f}s")
+            for task in done:
+                if task.exception() is None:
+                    if hedge is not None:
+                        usgs_hedged_requests_total.labels(winner="hedge" if task is hedge else "primary").inc()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def fetch_earthquakes(
     start: datetime | None = None,
     end: datetime | None = None,
     min_magnitude: float | None = None,
     bbox: tuple[float, float, float, float] | None = None,
     limit: int = 50,
+    deadline: float | None = None,
 ) -> list[EarthquakeItem]:
     """
     Fetch earthquakes from USGS API.
 
+    Each attempt's timeout adapts to recent latency (see LatencyTracker), and
+    retries use jittered exponential backoff, drawing on a shared retry budget.
+    No attempt or backoff runs past the deadline.
+
     Args:
         start: Filter events after this time
         end: Filter events before this time
         min_magnitude: Minimum magnitude
         bbox: Bounding box as (min_lon, min_lat, max_lon, max_lat)
         limit: Maximum number of results
+        deadline: time.monotonic() value by which to give up
 
     Returns:
         List of EarthquakeItem objects
 
     Raises:
-        USGSClientError: If the request fails after retries
+        USGSClientError: If the request fails after retries or runs out of time
     """
     params: dict = {
         "format": "geojson",
@@ -56,58 +225,109 @@ def fetch_earthquakes(
         params["minlatitude"] = min_lat
         params["maxlatitude"] = max_lat
 
+    cache_key = fetch_cache.key(params) if fetch_cache else None
+    headers = await asyncio.to_thread(fetch_cache.conditional_headers, cache_key, params) if fetch_cache else {}
+
     last_exception: Exception | None = None
-    backoff_times = [0.5, 1.0]  # Exponential backoff delays
+    retry_budget.record_request()
 
     for attempt in range(settings.usgs_retry_max + 1):
-        request_start = time.monotonic()
+        timeout = latency.timeout()
+        usgs_adaptive_timeout_seconds.set(timeout)
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise last_exception or USGSClientError("Deadline exceeded before requesting USGS")
         try:
-            with httpx.Client(timeout=settings.usgs_timeout_secs) as client:
-                response = client.get(settings.usgs_base_url, params=params)
+            response = await _hedged_get(params, headers, timeout)
+
+            if response.status_code == 304 and fetch_cache:
+                cached = await asyncio.to_thread(fetch_cache.cached, cache_key, params)
+                if cached is not None:
+                    usgs_requests_total.labels(status="success").inc()
+                    usgs_fetch_cache_hits_total.labels(reason="not_modified").inc()
+                    return await _cached_items(*cached)
+                # Validators outlived their body (evicted or removed): not an upstream
+                # failure, so repeat once right away without them instead of retrying
+                headers = {}
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        raise TimeoutError("Deadline exceeded before repeating a 304 without cached body")
+                response = await _hedged_get(params, headers, timeout)
 
-                duration = time.monotonic() - request_start
-                usgs_request_duration_seconds.observe(duration)
+            if response.status_code == 429:
+                usgs_requests_total.labels(status="rate_limited").inc()
+                raise USGSClientError("Rate limited by USGS API")
 
-                if response.status_code == 429:
-                    usgs_requests_total.labels(status="rate_limited").inc()
-                    raise USGSClientError("Rate limited by USGS API")
+            if response.status_code >= 500:
+                usgs_requests_total.labels(status="failure").inc()
+                raise USGSClientError(f"USGS API server error: {response.status_code}")
 
-                if response.status_code >= 500:
-                    usgs_requests_total.labels(status="failure").inc()
-                    raise USGSClientError(f"USGS API server error: {response.status_code}")
+            response.raise_for_status()
+            usgs_requests_total.labels(status="success").inc()
 
-                response.raise_for_status()
-                data = response.json()
+            if fetch_cache is None:
+                return await asyncio.to_thread(_parse_body, response.content)
 
-                usgs_requests_total.labels(status="success").inc()
-                return _parse_geojson_features(data.get("features", []))
+            body = response.content
+            digest = features_digest(body)
+            if digest == await asyncio.to_thread(fetch_cache.digest_for, cache_key):
+                usgs_fetch_cache_hits_total.labels(reason="content_hash").inc()
+            else:
+                usgs_fetch_cache_misses_total.inc()
+                await asyncio.to_thread(
+                    fetch_cache.store,
+                    cache_key,
+                    params,
+                    body,
+                    digest,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+            return await _cached_items(digest, body)
 
-        except httpx.TimeoutException as e:
-            duration = time.monotonic() - request_start
-            usgs_request_duration_seconds.observe(duration)
+        except (httpx.TimeoutException, TimeoutError) as e:
             usgs_requests_total.labels(status="timeout").inc()
-            last_exception = USGSClientError(f"Request timeout: {e}")
+            last_exception = USGSClientError(f"Request timeout: {str(e) or f'no response within {timeout:.2f}s'}")
         except httpx.HTTPStatusError as e:
-            duration = time.monotonic() - request_start
-            usgs_request_duration_seconds.observe(duration)
             usgs_requests_total.labels(status="failure").inc()
             last_exception = USGSClientError(f"HTTP error: {e}")
         except httpx.RequestError as e:
-            duration = time.monotonic() - request_start
-            usgs_request_duration_seconds.observe(duration)
             usgs_requests_total.labels(status="failure").inc()
             last_exception = USGSClientError(f"Request error: {e}")
         except USGSClientError:
             # Already tracked above (rate_limited or server error)
             raise
 
-        # Apply backoff before retry (if not last attempt)
-        if attempt < settings.usgs_retry_max and attempt < len(backoff_times):
-            time.sleep(backoff_times[attempt])
+        if attempt == settings.usgs_retry_max:
+            break
+        # Retry only if the backoff leaves time for another attempt and the budget allows it
+        delay = jittered_backoff(attempt, settings.usgs_backoff_base_secs, settings.usgs_backoff_max_secs)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            break
+        if not retry_budget.try_spend():
+            usgs_retry_budget_exhausted_total.labels(kind="retry").inc()
+            break
+        await asyncio.sleep(delay)
 
     raise last_exception or USGSClientError("Unknown error")
 
 
+async def _cached_items(digest: str, body: bytes) -> list[EarthquakeItem]:
+    """Return parsed items for a body, parsing only if this content is new."""
+    items = fetch_cache.get_parsed(digest)
+    if items is None:
+        # Parsing a large response is CPU-bound; keep it off the event loop
+        items = await asyncio.to_thread(_parse_body, body)
+        fetch_cache.put_parsed(digest, items)
+    return items
+
+
+def _parse_body(body: bytes) -> list[EarthquakeItem]:
+    return _parse_geojson_features(json.loads(body).get("features", []))
+
+
 def _parse_geojson_features(features: list[dict]) -> list[EarthquakeItem]:
     """Parse USGS GeoJSON features into EarthquakeItem objects."""
     items = []
@@ -117,9 +337,11 @@ def _parse_geojson_features(features: list[dict]) -> list[EarthquakeItem]:
         geometry = feature.get("geometry", {})
         coordinates = geometry.get("coordinates", [None, None, None])
 
-        # USGS time is in milliseconds since epoch
+        # USGS time is in milliseconds since epoch; naive UTC like the database rows
         time_ms = props.get("time")
-        event_time = datetime.fromtimestamp(time_ms / 1000) if time_ms else None
+        event_time = (
+            datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc).replace(tzinfo=None) if time_ms else None
+        )
 
         items.append(
             EarthquakeItem(
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -9,20 +11,103 @@ class Settings(BaseSettings):
     db_host: str = "postgres"
     db_port: int = 5432
     db_schema: str = "transformed_data"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
 
     # USGS API configuration
     usgs_base_url: str = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-    usgs_timeout_secs: int = 3
+    usgs_timeout_secs: float = 3  # Per-attempt timeout cap, and the timeout until latency is known
     usgs_retry_max: int = 2
 
+    # Latency-aware USGS requests: timeout = clamp(p99 x multiplier, min, usgs_timeout_secs)
+    # over the last usgs_latency_window requests; optional hedge after the p95
+    usgs_timeout_min_secs: float = 0.5
+    usgs_timeout_p99_multiplier: float = 2.0
+    usgs_latency_window: int = 200
+    usgs_latency_min_samples: int = 20
+    usgs_hedge_enabled: bool = False
+    usgs_backoff_base_secs: float = 0.25
+    usgs_backoff_max_secs: float = 2.0
+    # Retries and hedges allowed per request, plus a trickle per second (per worker)
+    usgs_retry_budget_ratio: float = 0.2
+    usgs_retry_budget_min_per_sec: float = 0.5
+
+    # Shared USGS connection pool
+    usgs_max_connections: int = 20
+    usgs_max_keepalive_connections: int = 10
+    usgs_keepalive_expiry_secs: float = 30
+    usgs_http2: bool = False
+
+    # USGS fetch cache (conditional requests + content hash)
+    usgs_cache_enabled: bool = True
+    usgs_cache_dir: str = "/tmp/usgs_cache"
+    usgs_cache_max_entries: int = 256
+    usgs_cache_ttl_secs: float = 3600
+    usgs_cache_time_bucket_secs: int = 60  # starttime/endtime granularity of cache keys
+
+    # /earthquakes/live end-to-end target: USGS gets live_slo_secs minus the DB fallback reserve
+    live_slo_secs: float = 4.0
+    live_fallback_reserve_secs: float = 1.0
+
+    # /earthquakes/live request coalescing and micro-cache (0 disables the cache, not coalescing)
+    live_cache_ttl_secs: float = 5
+    live_cache_max_entries: int = 256
+
+    # /earthquakes/live/stream (SSE) and /earthquakes/live/ws: one poller per worker, running while clients are connected
+    live_feed_interval_secs: float = 10
+    live_feed_window_secs: float = 3600
+    live_feed_limit: int = 500
+    live_feed_queue_size: int = 100
+    live_feed_heartbeat_secs: float = 15
+
+    # Freshness watermark cache (invalidated by the loader's NOTIFY)
+    freshness_ttl_secs: float = 60
+    freshness_listen_enabled: bool = True
+    ingest_notify_channel: str = "earthquake_ingest"
+
+    # Query result cache (LRU + TTL, invalidated by the freshness watermark)
+    result_cache_enabled: bool = True
+    result_cache_max_entries: int = 1024
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    result_cache_ttl_secs: float = 30
+
+    # /earthquakes/export server-side cursor batch size
+    export_batch_size: int = 2000
+
+    # /earthquakes/stats/timeseries upper bound on returned buckets
+    stats_max_buckets: int = 5000
+
+    # /earthquakes/clusters: highest zoom in the agg_quake_grid dbt model, and a cap on returned cells
+    cluster_max_zoom: int = 10
+    cluster_max_cells: int = 10000
+
+    # In-process NumPy copy of stg_earthquakes (refreshed on ingest NOTIFY, SQL fallback while stale)
+    columnar_store_enabled: bool = False
+    columnar_store_max_staleness_secs: float = 300
+    columnar_store_lookback_secs: float = 3600
+
     # Circuit breaker configuration
     cb_failure_threshold: int = 5
     cb_recovery_secs: int = 60
+    cb_probe_timeout_secs: float = 30
+
+    # State shared across workers: the circuit breaker, and the /earthquakes/live
+    # micro-cache when live_cache_shared (memory keeps both per process)
+    shared_state_backend: Literal["memory", "mmap", "redis"] = "memory"
+    shared_state_dir: str = "/dev/shm/earthquake-api"
+    shared_state_redis_url: str = "redis://localhost:6379/0"
+    shared_state_redis_prefix: str = "earthquake-api:"
+    shared_state_redis_timeout_secs: float = 0.1
+    live_cache_shared: bool = True
 
     @property
     def database_url(self) -> str:
         return f"postgresql://{self.db_user}:{self.db_pass}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def async_database_url(self) -> str:
+        return self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
     class Config:
         env_file = ".env"
         case_sensitive = False
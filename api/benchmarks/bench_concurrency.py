@@ -0,0 +1,177 @@
+"""
+Concurrency benchmark for the API under mixed DB and live traffic.
+
+With --serve, starts a stub USGS server with a fixed response delay and the
+API itself with USGS_BASE_URL pointed at the stub; with --base-url, targets a
+running API and whatever USGS endpoint it is configured with. Then runs a closed-loop
+load of --concurrency clients for --duration seconds. A --live-ratio share of
+requests go to /earthquakes/live; the rest go to /earthquakes (Postgres).
+
+The API needs a reachable database (DB_* env vars) with the dbt staging table.
+To compare two builds, run once per checkout with the same flags:
+
+    python -m benchmarks.bench_concurrency --serve --concurrency 200 --duration 20 --output async.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+STUB_FEATURES = [
+    {
+        "type": "Feature",
+        "id": f"stub{i:05d}",
+        "properties": {"mag": 4.5, "place": "Stub place", "time": 1704067200000 + i * 1000, "url": None},
+        "geometry": {"type": "Point", "coordinates": [140.0, 35.0, 10.0]},
+    }
+    for i in range(50)
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _stub_app(delay: float):
+    """ASGI app standing in for the USGS query endpoint."""
+    body = json.dumps({"type": "FeatureCollection", "metadata": {}, "features": STUB_FEATURES}).encode()
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def _start_process(args: list[str], env: dict | None = None) -> subprocess.Popen:
+    return subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=10.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+async def _worker(client: httpx.AsyncClient, deadline: float, live_ratio: float, results: list) -> None:
+    rng = random.Random()
+    while time.monotonic() < deadline:
+        kind = "live" if rng.random() < live_ratio else "db"
+        path = "/earthquakes/live?limit=20" if kind == "live" else f"/earthquakes?limit=20&offset={rng.randrange(0, 500)}"
+        started = time.monotonic()
+        try:
+            response = await client.get(path)
+            status = response.status_code
+            source = response.json().get("source") if status == 200 else None
+        except httpx.HTTPError as e:
+            status, source = type(e).__name__, None
+        results.append((kind, status, source, time.monotonic() - started))
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _summarize(results: list, elapsed: float) -> dict:
+    summary = {"requests": len(results), "elapsed_secs": round(elapsed, 2), "rps": round(len(results) / elapsed, 1)}
+    for kind in ("db", "live"):
+        latencies = [r[3] for r in results if r[0] == kind and r[1] == 200]
+        errors = {}
+        for r in results:
+            if r[0] == kind and r[1] != 200:
+                errors[str(r[1])] = errors.get(str(r[1]), 0) + 1
+        fallbacks = sum(1 for r in results if r[0] == kind and r[2] == "db_fallback")
+        if not latencies:
+            summary[kind] = {"ok": 0, "errors": errors}
+            continue
+        summary[kind] = {
+            "ok": len(latencies),
+            "errors": errors,
+            "fallbacks": fallbacks,
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        }
+    return summary
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, live_ratio: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results: list = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(*(_worker(client, deadline, live_ratio, results) for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+    return _summarize(results, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mixed DB/live concurrency benchmark for the Earthquake API.")
+    parser.add_argument("--base-url", help="Benchmark an already running API instead of starting one.")
+    parser.add_argument("--serve", action="store_true", help="Start the API and a stub USGS server for the run.")
+    parser.add_argument("--concurrency", type=int, default=100, help="Concurrent clients.")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per run.")
+    parser.add_argument("--live-ratio", type=float, default=0.3, help="Share of requests sent to /earthquakes/live.")
+    parser.add_argument("--usgs-delay", type=float, default=0.2, help="Stub USGS response delay in seconds (--serve).")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file.")
+    args = parser.parse_args()
+    if not args.base_url and not args.serve:
+        parser.error("pass --base-url or --serve")
+
+    processes = []
+    try:
+        base_url = args.base_url
+        if args.serve:
+            stub_port = _free_port()
+            stub_code = (
+                "import uvicorn; from benchmarks.bench_concurrency import _stub_app; "
+                f"uvicorn.run(_stub_app({args.usgs_delay}), port={stub_port}, log_level='error')"
+            )
+            processes.append(_start_process([sys.executable, "-c", stub_code]))
+            _wait_ready(f"http://127.0.0.1:{stub_port}/")
+
+            api_port = _free_port()
+            env = dict(os.environ, USGS_BASE_URL=f"http://127.0.0.1:{stub_port}/", USGS_CACHE_ENABLED="false")
+            processes.append(_start_process(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"],
+                env=env,
+            ))
+            base_url = f"http://127.0.0.1:{api_port}"
+            _wait_ready(f"{base_url}/health")
+
+        summary = asyncio.run(run_load(base_url, args.concurrency, args.duration, args.live_ratio))
+        summary.update(concurrency=args.concurrency, live_ratio=args.live_ratio, usgs_delay_secs=args.usgs_delay)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
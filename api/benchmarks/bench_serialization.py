@@ -0,0 +1,126 @@
+"""
+Microbenchmark for /earthquakes response serialization.
+
+Compares the model path (an EarthquakeItem per row, wrapped in
+EarthquakeListResponse, re-validated against response_model as FastAPI does,
+then rendered by JSONResponse) with the fast path (row dicts encoded once by
+orjson). No database or server is needed; rows are synthetic.
+
+    python -m benchmarks.bench_serialization --rows 200 --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas import EarthquakeItem, EarthquakeListResponse
+from app.serialization import list_response_content
+
+RESPONSE_FIELD = create_response_field(name="Response_list_earthquakes", type_=EarthquakeListResponse)
+
+
+def _rows(count: int) -> list[SimpleNamespace]:
+    base = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id=f"us7000{i:04d}",
+            time=base - timedelta(seconds=i * 37),
+            magnitude=round(2.5 + (i % 50) / 10, 1),
+            place=f"{i % 90} km NE of Somewhere, Region",
+            latitude=35.0 + i / 1000,
+            longitude=140.0 - i / 1000,
+            depth_km=10.0 + i % 30,
+            url=f"https://earthquake.usgs.gov/earthquakes/eventpage/us7000{i:04d}",
+        )
+        for i in range(count)
+    ]
+
+
+async def _model_path(rows: list) -> bytes:
+    items = [
+        EarthquakeItem(
+            event_id=row.id,
+            time=row.time,
+            place=row.place,
+            magnitude=row.magnitude,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            depth_km=row.depth_km,
+            url=row.url,
+        )
+        for row in rows
+    ]
+    model = EarthquakeListResponse(
+        source="db",
+        data_fresh_as_of=rows[0].time,
+        count=len(items),
+        limit=len(items),
+        offset=0,
+        items=items,
+    )
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=model, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def _fast_path(rows: list) -> bytes:
+    content = list_response_content(
+        rows, source="db", data_fresh_as_of=rows[0].time, limit=len(rows), offset=0
+    )
+    return orjson.dumps(content)
+
+
+async def _time(fn, rows: list, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn(rows)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "mean_us": round(statistics.fmean(samples) * 1e6, 1),
+        "p50_us": round(ordered[len(ordered) // 2] * 1e6, 1),
+        "p99_us": round(ordered[int(len(ordered) * 0.99)] * 1e6, 1),
+    }
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    rows = _rows(args.rows)
+    # Both paths must produce the same document
+    assert json.loads(await _model_path(rows)) == json.loads(await _fast_path(rows))
+
+    await _time(_model_path, rows, args.iterations // 10)
+    await _time(_fast_path, rows, args.iterations // 10)
+    model = _summary(await _time(_model_path, rows, args.iterations))
+    fast = _summary(await _time(_fast_path, rows, args.iterations))
+    return {
+        "rows": args.rows,
+        "iterations": args.iterations,
+        "model_path": model,
+        "fast_path": fast,
+        "speedup": round(model["mean_us"] / fast["mean_us"], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialization microbenchmark for /earthquakes.")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per response")
+    parser.add_argument("--iterations", type=int, default=2000, help="Timed iterations per path")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(_run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
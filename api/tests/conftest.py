@@ -1,10 +1,20 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app.main import app, live_flights, result_cache
 
 
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI app."""
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Keep cached responses from leaking between tests."""
+    if result_cache is not None:
+        result_cache.clear()
+    asyncio.run(live_flights.clear())
@@ -0,0 +1,33 @@
+from unittest.mock import patch
+
+from app.repositories.tiles import _cell_conditions, quadkey, tile_xy
+
+
+def test_tile_xy_web_mercator():
+    """Test tile numbering: x from the antimeridian eastwards, y from the top southwards."""
+    assert tile_xy(0.0, 0.0, 1) == (1, 1)
+    assert tile_xy(-180.0, 90.0, 3) == (0, 0)  # poles clamp to the edge rows
+    assert tile_xy(180.0, -90.0, 3) == (7, 7)
+    assert tile_xy(-122.4, 37.8, 10) == (163, 395)
+
+
+def test_quadkey():
+    """Test quadkeys against the Bing Maps tile system example."""
+    assert quadkey(3, 5, 3) == "213"
+    assert quadkey(0, 0, 0) == ""
+
+
+def test_antimeridian_bbox_selects_both_edges():
+    """Test that a bbox crossing the antimeridian wraps the x range."""
+    conditions, params = _cell_conditions(6, (170.0, -50.0, -170.0, 50.0))
+    assert "(x >= :x0 OR x <= :x1)" in conditions
+    assert (params["x0"], params["x1"], params["y0"], params["y1"]) == (62, 1, 21, 42)
+
+
+def test_zoom_above_grid_returns_400(client):
+    """Test that zooms finer than the precomputed grid are rejected."""
+    with patch("app.main.tiles_repo.get_clusters") as mock_get:
+        response = client.get("/earthquakes/clusters?zoom=11")
+
+    assert response.status_code == 400
+    mock_get.assert_not_called()
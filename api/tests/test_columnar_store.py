@@ -0,0 +1,165 @@
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.repositories import earthquakes as earthquake_repo
+from app.services.columnar_store import ColumnarStore, _build_snapshot
+from app.services.freshness import FreshnessCache
+from app.settings import settings
+
+EPOCH = datetime(1970, 1, 1)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def _row(event_id, when, magnitude=4.0, lat=10.0, lon=20.0, depth=10.0, loaded=None):
+    """A row shaped like stream_rows_loaded_since's output."""
+    time_us = (when - EPOCH) // timedelta(microseconds=1)
+    loaded_us = ((loaded or when) - EPOCH) // timedelta(microseconds=1)
+    return (event_id, time_us, f"near {event_id}", magnitude, lat, lon, depth, None, loaded_us)
+
+
+ROWS = [
+    _row("a", datetime(2024, 1, 1, 0, 0), magnitude=2.0),
+    _row("c", datetime(2024, 1, 2, 0, 0), magnitude=5.5, lon=179.5),
+    _row("b", datetime(2024, 1, 2, 0, 0), magnitude=6.0, lon=-179.5),
+    _row("d", datetime(2024, 1, 8, 12, 0), magnitude=None, depth=None),
+    _row("e", datetime(2024, 2, 1, 0, 0), magnitude=4.5, depth=800.0),
+]
+
+
+def _store(rows=ROWS) -> tuple[ColumnarStore, FreshnessCache]:
+    freshness = FreshnessCache()
+    store = ColumnarStore(freshness, session_factory=None)
+    store._snapshot = _build_snapshot(None, [rows], freshness.generation)
+    return store, freshness
+
+
+def test_rows_sorted_by_time_then_id():
+    """Test that pages follow ORDER BY time, id in both directions."""
+    store, _ = _store()
+    assert [r.id for r in store.get_rows(order="desc", limit=10)] == ["e", "d", "c", "b", "a"]
+    assert [r.id for r in store.get_rows(order="asc", limit=2, offset=1)] == ["b", "c"]
+
+
+def test_keyset_continues_within_tied_times():
+    """Test that a cursor on a tied timestamp resumes at the next id."""
+    store, _ = _store()
+    after = (datetime(2024, 1, 2), "b")
+    assert [r.id for r in store.get_rows(order="asc", after=after)] == ["c", "d", "e"]
+    assert [r.id for r in store.get_rows(order="desc", after=after)] == ["a"]
+
+
+def test_filters_match_sql_semantics():
+    """Test magnitude bounds, NULL exclusion, aware time bounds and antimeridian bboxes."""
+    store, _ = _store()
+    assert [r.id for r in store.get_rows(min_magnitude=4.5, order="asc")] == ["b", "c", "e"]
+    start = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert [r.id for r in store.get_rows(start=start, max_magnitude=5.5, order="asc")] == ["c", "e"]
+    assert [r.id for r in store.get_rows(bbox=(179.0, 0.0, -179.0, 20.0), order="asc")] == ["b", "c"]
+
+    row = store.get_rows(order="asc", start=datetime(2024, 1, 8))[0]
+    assert row.magnitude is None and row.depth_km is None and row.time == datetime(2024, 1, 8, 12, 0)
+
+
+def test_incremental_refresh_replaces_revised_events():
+    """Test that a revised event replaces its old row, even when its time moved."""
+    store, _ = _store()
+    revised = _row("a", datetime(2024, 3, 1), magnitude=3.0)
+    store._snapshot = _build_snapshot(store._snapshot, [[revised]], 0)
+
+    rows = store.get_rows(order="asc", limit=10)
+    assert [r.id for r in rows] == ["b", "c", "d", "e", "a"]
+    assert rows[-1].magnitude == 3.0
+
+
+def test_stale_snapshot_falls_back_and_refreshes():
+    """Test that an ingest notification makes queries return None and starts a refresh."""
+    store, freshness = _store()
+    freshness.invalidate()
+
+    with patch.object(store, "schedule_refresh") as mock_refresh:
+        assert store.get_rows() is None
+    mock_refresh.assert_called_once()
+
+
+def test_aggregations():
+    """Test Monday-based weeks, magnitude bins and open-ended depth bins."""
+    store, _ = _store()
+
+    weeks = store.time_series("week")
+    assert [(b.start, b.count) for b in weeks] == [
+        (datetime(2024, 1, 1), 3),
+        (datetime(2024, 1, 8), 1),
+        (datetime(2024, 1, 29), 1),
+    ]
+    assert weeks[0].max_magnitude == 6.0 and weeks[1].max_magnitude is None
+
+    bins = store.magnitude_histogram(bin_width=1.0)
+    assert [(b.magnitude, b.count, b.cumulative_count) for b in bins] == [(2.0, 1, 4), (4.0, 1, 3), (5.0, 1, 2), (6.0, 1, 1)]
+
+    depths = store.depth_histogram([0, 70, 300, 700])
+    assert [(b.min_km, b.max_km, b.count) for b in depths] == [(0, 70, 3), (70, 300, 0), (300, 700, 0), (700, None, 1)]
+
+
+# Ids whose order differs between byte order and linguistic collations (case, punctuation, digits)
+TIED_IDS = ["us7000a", "US7000b", "us-7000c", "us_7000d", "us7000A", "ak0241", "Ak0241x", "nc7"]
+TIED_AT = datetime(2999, 1, 1)
+
+
+def _keyset_pages(fetch, order, limit=3):
+    """Ids from paging with cursors taken from each page's last row."""
+    ids, after = [], None
+    while True:
+        page = fetch(order=order, limit=limit, after=after)
+        ids.extend(r.id for r in page)
+        if len(page) < limit:
+            return ids
+        after = (page[-1].time, page[-1].id)
+
+
+def test_tied_times_order_ids_by_code_point():
+    """Test that ids on one timestamp sort like COLLATE "C", which the SQL queries use."""
+    store, _ = _store([_row(event_id, TIED_AT) for event_id in TIED_IDS])
+    assert _keyset_pages(store.get_rows, "asc") == sorted(TIED_IDS)
+    assert _keyset_pages(store.get_rows, "desc") == sorted(TIED_IDS, reverse=True)
+
+    query, _ = earthquake_repo.list_query(after=(TIED_AT, "us7000a"))
+    assert '(time, id COLLATE "C") <' in query.text
+    assert 'ORDER BY time DESC, id COLLATE "C" DESC' in query.text
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+async def test_sql_and_store_agree_on_tied_times():
+    """Test that keyset pages over tied timestamps match between Postgres and the store."""
+    engine = create_async_engine(TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(
+                text(f"INSERT INTO {settings.db_schema}.stg_earthquakes (id, time, magnitude) VALUES (:id, :time, 4.0)"),
+                [{"id": event_id, "time": TIED_AT} for event_id in TIED_IDS],
+            )
+
+            async def sql_page(order, limit, after):
+                query, params = earthquake_repo.list_query(start=TIED_AT, order=order, limit=limit, after=after)
+                return (await conn.execute(query, params)).fetchall()
+
+            async def sql_pages(order, limit=3):
+                ids, after = [], None
+                while True:
+                    page = await sql_page(order, limit, after)
+                    ids.extend(r.id for r in page)
+                    if len(page) < limit:
+                        return ids
+                    after = (page[-1].time, page[-1].id)
+
+            store, _ = _store([_row(event_id, TIED_AT) for event_id in TIED_IDS])
+            for order in ("asc", "desc"):
+                assert await sql_pages(order) == _keyset_pages(store.get_rows, order)
+            await conn.rollback()
+    finally:
+        await engine.dispose()
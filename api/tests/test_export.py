@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+ROWS = [
+    SimpleNamespace(
+        id=f"ev{i}",
+        time=datetime(2024, 1, 1, 0, i),
+        place=f"place {i}",
+        magnitude=4.0 + i / 10,
+        latitude=35.0,
+        longitude=140.0,
+        depth_km=10.0,
+        url=None,
+    )
+    for i in range(5)
+]
+
+
+def _stream(**kwargs):
+    async def batches():
+        yield ROWS[:2]
+        yield ROWS[2:]
+
+    return batches()
+
+
+def test_export_ndjson(client):
+    """Test that NDJSON export emits one JSON object per row across batches."""
+    with patch("app.main.earthquake_repo.stream_earthquakes", side_effect=_stream):
+        response = client.get("/earthquakes/export?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["event_id"] for line in lines] == ["ev0", "ev1", "ev2", "ev3", "ev4"]
+
+
+def test_export_csv_gzip(client):
+    """Test that gzip CSV export decompresses to a header plus one line per row."""
+    with patch("app.main.earthquake_repo.stream_earthquakes", side_effect=_stream):
+        response = client.get("/earthquakes/export?format=csv&gzip=true")
+
+    # httpx decodes Content-Encoding: gzip transparently
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][0] == "event_id"
+    assert len(rows) == 6
+
+
+def test_export_geojson_is_one_feature_collection(client):
+    """Test that GeoJSON batches are joined into a single valid FeatureCollection."""
+    with patch("app.main.earthquake_repo.stream_earthquakes", side_effect=_stream):
+        response = client.get("/earthquakes/export?format=geojson")
+
+    collection = response.json()
+    assert collection["type"] == "FeatureCollection"
+    assert len(collection["features"]) == 5
+    assert collection["features"][0]["geometry"]["coordinates"] == [140.0, 35.0, 10.0]
+
+
+def test_export_format_validation(client):
+    """Test that an unknown export format returns 422."""
+    response = client.get("/earthquakes/export?format=xml")
+    assert response.status_code == 422
@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.metrics import usgs_requests_total
+from app.services import usgs_client
+from app.services.fetch_cache import FetchCache, features_digest
+from app.services.retry_policy import RetryBudget
+
+FEATURE = {
+    "id": "us7000abcd",
+    "properties": {"time": 1704067200000, "mag": 5.1, "place": "Somewhere", "url": None},
+    "geometry": {"coordinates": [10.0, 20.0, 30.0]},
+}
+
+
+def _body(generated: int) -> bytes:
+    return json.dumps(
+        {"type": "FeatureCollection", "metadata": {"generated": generated}, "features": [FEATURE]}
+    ).encode()
+
+
+def _mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_features_digest_ignores_metadata():
+    """Test that bodies differing only in metadata hash the same."""
+    assert features_digest(_body(1)) == features_digest(_body(2))
+
+
+@pytest.mark.asyncio
+async def test_not_modified_served_from_cache(tmp_path):
+    """Test that a 304 response is answered from the cached body."""
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=_body(1), headers={"ETag": '"v1"'})
+
+    with patch.object(usgs_client, "fetch_cache", FetchCache(str(tmp_path))), patch.object(
+        usgs_client, "_client", _mock_client(handler)
+    ):
+        first = await usgs_client.fetch_earthquakes(limit=1)
+        second = await usgs_client.fetch_earthquakes(limit=1)
+
+    assert seen_headers == [None, '"v1"']
+    assert [item.event_id for item in second] == ["us7000abcd"]
+    assert second is first  # parsed result reused, not re-parsed
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_reuses_parsed_items(tmp_path):
+    """Test that a changed body with identical features skips parsing."""
+    generated = iter([1, 2])
+
+    def handler(request):
+        return httpx.Response(200, content=_body(next(generated)))
+
+    with patch.object(usgs_client, "fetch_cache", FetchCache(str(tmp_path))), patch.object(
+        usgs_client, "_client", _mock_client(handler)
+    ):
+        first = await usgs_client.fetch_earthquakes(limit=1)
+        with patch.object(usgs_client, "_parse_geojson_features") as mock_parse:
+            second = await usgs_client.fetch_earthquakes(limit=1)
+
+    mock_parse.assert_not_called()
+    assert second is first
+
+
+def test_rolling_window_keys_share_a_bucket(tmp_path):
+    """Test that start times within one bucket map to one entry, and validators stay per query."""
+    cache = FetchCache(str(tmp_path), time_bucket_secs=60)
+    first = {"format": "geojson", "starttime": "2024-01-01T10:00:05"}
+    second = {"format": "geojson", "starttime": "2024-01-01T10:00:35.123456"}
+    later = {"format": "geojson", "starttime": "2024-01-01T10:01:05"}
+
+    assert cache.key(first) == cache.key(second) != cache.key(later)
+
+    key = cache.key(first)
+    cache.store(key, first, b"body", "digest", etag='"v1"', last_modified=None)
+    assert cache.conditional_headers(key, first) == {"If-None-Match": '"v1"'}
+    assert cache.conditional_headers(key, second) == {}
+    assert cache.cached(key, second) is None
+    assert cache.digest_for(key) == "digest"
+
+
+def test_entries_evicted_by_count_and_age(tmp_path):
+    """Test that the oldest entries go past max_entries and expired ones stop being served."""
+    cache = FetchCache(str(tmp_path), max_entries=2, ttl_secs=60)
+    params = [{"limit": i} for i in range(3)]
+    for age, p in zip((30, 20, 10), params):
+        key = cache.key(p)
+        cache.store(key, p, b"body", f"digest{p['limit']}", etag=None, last_modified=None)
+        stored_at = time.time() - age
+        os.utime(tmp_path / f"{key}.json", (stored_at, stored_at))
+
+    cache.store(cache.key(params[2]), params[2], b"body", "digest2", etag=None, last_modified=None)
+    assert cache.digest_for(cache.key(params[0])) is None
+    assert cache.digest_for(cache.key(params[1])) == "digest1"
+    assert len(list(tmp_path.iterdir())) == 4
+
+    expired = time.time() - 61
+    os.utime(tmp_path / f"{cache.key(params[1])}.json", (expired, expired))
+    assert cache.digest_for(cache.key(params[1])) is None
+    assert cache.cached(cache.key(params[1]), params[1]) is None
+
+
+@pytest.mark.asyncio
+async def test_not_modified_without_body_repeats_unconditionally(tmp_path):
+    """Test that a 304 whose body is gone is re-requested at once, without spending retries."""
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=_body(1), headers={"ETag": '"v1"'})
+
+    cache = FetchCache(str(tmp_path))
+    budget = RetryBudget(ratio=0, min_per_sec=0, max_tokens=0)
+    with patch.object(usgs_client, "fetch_cache", cache), patch.object(
+        usgs_client, "_client", _mock_client(handler)
+    ), patch.object(usgs_client, "retry_budget", budget):
+        await usgs_client.fetch_earthquakes(limit=1)
+        key = cache.key({"format": "geojson", "limit": 1, "orderby": "time"})
+        os.remove(os.path.join(str(tmp_path), f"{key}.body"))
+
+        failures_before = usgs_requests_total.labels(status="failure")._value.get()
+        items = await usgs_client.fetch_earthquakes(limit=1)
+
+    assert seen_headers == [None, '"v1"', None]
+    assert [item.event_id for item in items] == ["us7000abcd"]
+    assert usgs_requests_total.labels(status="failure")._value.get() == failures_before
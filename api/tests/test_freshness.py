@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.services.freshness import FreshnessCache
+
+FRESH = datetime(2024, 1, 1, 12, 0)
+
+
+@pytest.mark.asyncio
+async def test_watermark_cached_until_invalidated():
+    """Test that the watermark is queried once, then again only after invalidation."""
+    cache = FreshnessCache(ttl_secs=60)
+    with patch("app.services.freshness.earthquake_repo.get_max_event_time") as mock_time:
+        mock_time.return_value = FRESH
+        assert await cache.get(db=None) == FRESH
+        assert await cache.get(db=None) == FRESH
+        assert mock_time.await_count == 1
+
+        cache._on_notify(None, 0, "earthquake_ingest", "{}")
+        await cache.get(db=None)
+        assert mock_time.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_watermark_expires_after_ttl():
+    """Test that the TTL bounds staleness when no notification arrives."""
+    cache = FreshnessCache(ttl_secs=0)
+    with patch("app.services.freshness.earthquake_repo.get_max_event_time") as mock_time:
+        mock_time.return_value = FRESH
+        await cache.get(db=None)
+        await cache.get(db=None)
+        assert mock_time.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_query():
+    """Test that simultaneous misses wait for a single database query."""
+    cache = FreshnessCache(ttl_secs=60)
+
+    async def slow_max_time(db):
+        await asyncio.sleep(0.01)
+        return FRESH
+
+    with patch("app.services.freshness.earthquake_repo.get_max_event_time", side_effect=slow_max_time) as mock_time:
+        results = await asyncio.gather(*(cache.get(db=None) for _ in range(10)))
+
+    assert results == [FRESH] * 10
+    assert mock_time.await_count == 1
@@ -1,5 +1,10 @@
+import asyncio
 from unittest.mock import patch
 
+import httpx
+import pytest
+
+from app.main import app, circuit_breaker
 from app.services.usgs_client import USGSClientError
 
 
@@ -28,3 +33,98 @@ def test_live_limit_validation(client):
     """Test that live endpoint validates limit parameter."""
     response = client.get("/earthquakes/live?limit=201")
     assert response.status_code == 422
+
+
+def _slow_fetch(items, delay=0.05):
+    async def fetch(**kwargs):
+        await asyncio.sleep(delay)
+        return items
+
+    return fetch
+
+
+@pytest.mark.asyncio
+async def test_concurrent_live_requests_share_one_fetch():
+    """Test that identical concurrent /live calls coalesce into one USGS fetch."""
+    with patch("app.main.fetch_usgs_earthquakes", side_effect=_slow_fetch([])) as mock_fetch:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/earthquakes/live?limit=5") for _ in range(10)))
+
+    statuses = sorted(r.json()["cache_status"] for r in responses)
+    assert mock_fetch.await_count == 1
+    assert statuses == ["coalesced"] * 9 + ["miss"]
+
+
+def test_live_result_reused_from_micro_cache(client):
+    """Test that a repeated /live call within the TTL is served from cache."""
+    with patch("app.main.fetch_usgs_earthquakes") as mock_fetch:
+        mock_fetch.return_value = []
+        first = client.get("/earthquakes/live?limit=5").json()
+        second = client.get("/earthquakes/live?limit=5").json()
+
+    assert mock_fetch.await_count == 1
+    assert (first["cache_status"], second["cache_status"]) == ("miss", "hit")
+    assert second["data_fresh_as_of"] == first["data_fresh_as_of"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_failure_counts_once_on_breaker():
+    """Test that a failed shared fetch records a single breaker failure."""
+    await circuit_breaker.reset()
+
+    async def failing_fetch(**kwargs):
+        await asyncio.sleep(0.05)
+        raise USGSClientError("Connection timeout")
+
+    with patch("app.main.fetch_usgs_earthquakes", side_effect=failing_fetch), patch(
+        "app.main.earthquake_repo.get_earthquakes", return_value=[]
+    ), patch("app.main.earthquake_repo.get_max_event_time", return_value=None):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/earthquakes/live?limit=5") for _ in range(5)))
+
+    assert all(r.json()["source"] == "db_fallback" for r in responses)
+    assert (await circuit_breaker.get_status())["failure_count"] == 1
+    await circuit_breaker.reset()
+
+
+@pytest.mark.asyncio
+async def test_half_open_requests_join_the_probe():
+    """Test that requests arriving while the half-open probe runs share its result."""
+    await circuit_breaker.reset()
+    await circuit_breaker._store.transact(lambda snapshot: setattr(snapshot, "state", "half_open"))
+
+    with patch("app.main.fetch_usgs_earthquakes", side_effect=_slow_fetch([])) as mock_fetch:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/earthquakes/live?limit=5") for _ in range(5)))
+
+    assert mock_fetch.await_count == 1
+    assert all(r.json()["source"] == "usgs" for r in responses)
+    assert sorted(r.json()["cache_status"] for r in responses) == ["coalesced"] * 4 + ["miss"]
+    assert (await circuit_breaker.get_state()).value == "closed"
+    await circuit_breaker.reset()
+
+
+@pytest.mark.asyncio
+async def test_live_reads_breaker_once_per_request():
+    """Test that a micro-cache hit costs one breaker read, and a miss no extra state reads."""
+    await circuit_breaker.reset()
+    store = circuit_breaker._store
+    transact = store.transact
+    calls = []
+
+    async def counting_transact(fn):
+        calls.append(fn)
+        return await transact(fn)
+
+    with patch.object(store, "transact", counting_transact), patch(
+        "app.main.fetch_usgs_earthquakes", side_effect=_slow_fetch([], delay=0)
+    ):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = (await client.get("/earthquakes/live?limit=5")).json()
+            misses = len(calls)
+            second = (await client.get("/earthquakes/live?limit=5")).json()
+
+    assert (first["cache_status"], second["cache_status"]) == ("miss", "hit")
+    assert misses == 2  # claim, then record_success
+    assert len(calls) - misses == 1
+    assert first["breaker_state"] == second["breaker_state"] == "closed"
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.schemas import EarthquakeItem
+from app.services.live_feed import LiveFeed
+
+
+def _item(event_id: str, magnitude: float = 4.0, longitude: float = 10.0) -> EarthquakeItem:
+    return EarthquakeItem(
+        event_id=event_id, time=datetime(2024, 1, 1), magnitude=magnitude, latitude=0.0, longitude=longitude
+    )
+
+
+async def _no_poll():
+    # Tests drive the feed with apply(); keep the background poller out of the way
+    await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_apply_pushes_only_new_and_updated_events():
+    """Test that the first poll is a baseline and later polls push only the differences."""
+    feed = LiveFeed(_no_poll)
+    subscription = feed.subscribe()
+
+    assert feed.apply([_item("a"), _item("b")]) == []
+    changes = feed.apply([_item("a"), _item("b", magnitude=4.5), _item("c")])
+
+    assert [(c.kind, c.item.event_id) for c in changes] == [("updated", "b"), ("new", "c")]
+    assert feed.apply([_item("a"), _item("b", magnitude=4.5), _item("c")]) == []
+    assert subscription.queue.qsize() == 1
+    await feed.close()
+
+
+@pytest.mark.asyncio
+async def test_changes_filtered_per_subscriber():
+    """Test that each subscriber only receives events matching its filters, across the antimeridian."""
+    feed = LiveFeed(_no_poll)
+    strong = feed.subscribe(min_magnitude=5)
+    pacific = feed.subscribe(bbox=(170.0, -10.0, -170.0, 10.0))
+    feed.apply([])
+
+    feed.apply([_item("big", magnitude=6.0), _item("fiji", longitude=179.5), _item("samoa", longitude=-172.0)])
+
+    _, strong_changes = strong.queue.get_nowait()
+    _, pacific_changes = pacific.queue.get_nowait()
+    assert [c.item.event_id for c in strong_changes] == ["big"]
+    assert [c.item.event_id for c in pacific_changes] == ["fiji", "samoa"]
+    await feed.close()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_then_changes_messages():
+    """Test that a subscriber gets the current events first, then change batches."""
+    feed = LiveFeed(_no_poll)
+    subscription = feed.subscribe()
+    feed.apply([_item("a")])
+    messages = feed.messages(subscription)
+
+    snapshot = await anext(messages)
+    feed.apply([_item("a"), _item("b")])
+    changes = await anext(messages)
+
+    assert snapshot.type == "snapshot" and b'"event_id":"a"' in snapshot.body
+    assert changes.type == "changes" and changes.body.startswith(b'{"new":[{"event_id":"b"')
+    await messages.aclose()
+    await feed.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_dropped():
+    """Test that a subscriber whose queue fills up is dropped instead of buffering forever."""
+    feed = LiveFeed(_no_poll, queue_size=1)
+    subscription = feed.subscribe()
+    feed.apply([])
+
+    feed.apply([_item("a")])
+    feed.apply([_item("a"), _item("b")])
+
+    assert subscription.dropped
+    assert feed.subscriber_count == 0
+    await asyncio.sleep(0)  # let the stopped poller finish cancelling
+
+
+@pytest.mark.asyncio
+async def test_one_poller_for_all_subscribers():
+    """Test that upstream polls do not scale with subscribers, and stop when the last one leaves."""
+    polls = 0
+
+    async def poll():
+        nonlocal polls
+        polls += 1
+        return [_item("a")], "usgs"
+
+    feed = LiveFeed(poll, interval_secs=0.05)
+    subscriptions = [feed.subscribe() for _ in range(50)]
+    await asyncio.sleep(0.12)
+    for subscription in subscriptions:
+        feed.unsubscribe(subscription)
+    polls_at_last_unsubscribe = polls
+    await asyncio.sleep(0.1)
+
+    assert 1 <= polls_at_last_unsubscribe <= 4
+    assert polls == polls_at_last_unsubscribe
+
+
+@pytest.mark.asyncio
+async def test_state_reset_when_poller_stops():
+    """Test that a subscriber arriving after the poller stopped waits for a fresh baseline."""
+    feed = LiveFeed(_no_poll)
+    subscription = feed.subscribe()
+    feed.apply([_item("a")])
+    feed.unsubscribe(subscription)
+
+    subscription = feed.subscribe()
+    assert feed.snapshot(subscription).body == b'{"items":[]}'
+    assert feed.apply([_item("a", magnitude=5.0), _item("b")]) == []
+    assert subscription.queue.empty()
+    await feed.close()
+
+
+def test_stream_rejects_invalid_bbox(client):
+    """Test that stream filters are validated before the stream starts."""
+    response = client.get("/earthquakes/live/stream?bbox=1,2,3")
+    assert response.status_code == 422
@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.repositories import nearby
+from app.repositories.nearby import MAX_DISTANCE_KM, get_nearby, radius_bbox
+
+
+def test_radius_bbox_around_point():
+    """Test that the box spans the radius in latitude and widens in longitude away from the equator."""
+    min_lon, min_lat, max_lon, max_lat = radius_bbox(60.0, 10.0, 111.19508)
+    assert min_lat == pytest.approx(59.0) and max_lat == pytest.approx(61.0)
+    assert min_lon == pytest.approx(10.0 - 2.0, abs=0.01) and max_lon == pytest.approx(10.0 + 2.0, abs=0.01)
+
+
+def test_radius_bbox_wraps_antimeridian():
+    """Test that a circle crossing the antimeridian gives a box with min_lon > max_lon."""
+    min_lon, _, max_lon, _ = radius_bbox(0.0, 179.5, 200)
+    assert min_lon == pytest.approx(177.7, abs=0.05)
+    assert max_lon == pytest.approx(-178.7, abs=0.05)
+
+
+def test_radius_bbox_covering_pole_is_unbounded():
+    """Test that a circle containing a pole needs every longitude, so no box is returned."""
+    assert radius_bbox(89.5, 0.0, 100) is None
+    assert radius_bbox(0.0, 0.0, MAX_DISTANCE_KM) is None
+
+
+@pytest.mark.asyncio
+async def test_knn_expands_radius_until_k_found():
+    """Test that k-nearest search doubles the radius until enough events are found."""
+    results = {100.0: ["a"], 200.0: ["a", "b"], 400.0: ["a", "b", "c"]}
+    search = AsyncMock(side_effect=lambda db, lat, lon, radius, k, **filters: results[radius])
+
+    with patch.object(nearby, "_search", search):
+        items, radius = await get_nearby(db=None, lat=0.0, lon=0.0, k=3)
+
+    assert items == ["a", "b", "c"]
+    assert radius == 400.0
+
+
+@pytest.mark.asyncio
+async def test_knn_stops_at_whole_globe():
+    """Test that k-nearest search returns what it has once the whole globe is covered."""
+    search = AsyncMock(return_value=["a"])
+
+    with patch.object(nearby, "_search", search):
+        items, radius = await get_nearby(db=None, lat=0.0, lon=0.0, k=10)
+
+    assert items == ["a"]
+    assert radius == MAX_DISTANCE_KM
+
+
+def test_near_requires_valid_point(client):
+    """Test that out-of-range coordinates are rejected before querying."""
+    with patch("app.main.nearby_repo.get_nearby") as mock_get:
+        response = client.get("/earthquakes/near?lat=91&lon=0")
+
+    assert response.status_code == 422
+    mock_get.assert_not_called()
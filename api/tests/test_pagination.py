@@ -0,0 +1,66 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def _row(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=f"ev{i}",
+        time=datetime(2024, 1, 1, 0, i),
+        magnitude=None,
+        place=None,
+        latitude=None,
+        longitude=None,
+        depth_km=None,
+        url=None,
+    )
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes to the position it was encoded from."""
+    cursor = encode_cursor(datetime(2024, 1, 1, 12, 30), "us7000abcd", "desc")
+    assert decode_cursor(cursor, "desc") == (datetime(2024, 1, 1, 12, 30), "us7000abcd")
+
+
+def test_cursor_rejects_other_order():
+    """Test that a cursor issued for desc cannot be used with asc."""
+    cursor = encode_cursor(datetime(2024, 1, 1), "ev1", "desc")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "asc")
+
+
+def test_invalid_cursor_returns_400(client):
+    """Test that a malformed cursor returns 400."""
+    response = client.get("/earthquakes?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_cursor_with_offset_returns_400(client):
+    """Test that cursor and offset cannot be combined."""
+    cursor = encode_cursor(datetime(2024, 1, 1), "ev1", "desc")
+    response = client.get(f"/earthquakes?cursor={cursor}&offset=10")
+    assert response.status_code == 400
+
+
+def test_next_cursor_points_after_last_row(client):
+    """Test that next_cursor is set when more rows exist and feeds the keyset predicate."""
+    with patch("app.main.earthquake_repo.get_earthquake_rows") as mock_get, patch(
+        "app.main.earthquake_repo.get_max_event_time"
+    ) as mock_time:
+        mock_get.return_value = [_row(3), _row(2), _row(1)]
+        mock_time.return_value = None
+
+        response = client.get("/earthquakes?limit=2")
+        data = response.json()
+        assert [item["event_id"] for item in data["items"]] == ["ev3", "ev2"]
+        assert mock_get.call_args.kwargs["limit"] == 3
+
+        client.get(f"/earthquakes?limit=2&cursor={data['next_cursor']}")
+        assert mock_get.call_args.kwargs["after"] == (datetime(2024, 1, 1, 0, 2), "ev2")
+
+        mock_get.return_value = [_row(1)]
+        assert client.get("/earthquakes?limit=2&min_magnitude=1").json()["next_cursor"] is None
@@ -0,0 +1,84 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.main import freshness_cache
+from app.schemas import EarthquakeItem
+from app.services.result_cache import ResultCache
+
+ITEM = EarthquakeItem(event_id="us7000abcd", time=datetime(2024, 1, 1, 12, 0), magnitude=5.1)
+ROW = SimpleNamespace(
+    id="us7000abcd",
+    time=datetime(2024, 1, 1, 12, 0),
+    magnitude=5.1,
+    place=None,
+    latitude=None,
+    longitude=None,
+    depth_km=None,
+    url=None,
+)
+
+
+def test_repeat_request_served_from_cache(client):
+    """Test that an identical query is answered without a second DB call."""
+    with patch("app.main.earthquake_repo.get_earthquake_rows") as mock_get, patch(
+        "app.main.earthquake_repo.get_max_event_time"
+    ) as mock_time:
+        mock_get.return_value = [ROW]
+        mock_time.return_value = None
+
+        first = client.get("/earthquakes?limit=10&min_magnitude=4")
+        second = client.get("/earthquakes?min_magnitude=4.0&limit=10")
+
+    assert mock_get.await_count == 1
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_conditional_request_returns_304(client):
+    """Test that If-None-Match with the current ETag gets 304 without a DB call."""
+    with patch("app.main.earthquake_repo.get_earthquake_by_id") as mock_get:
+        mock_get.return_value = ITEM
+        etag = client.get("/earthquakes/us7000abcd").headers["ETag"]
+        response = client.get("/earthquakes/us7000abcd", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert mock_get.await_count == 1
+
+
+def test_ingest_invalidates_cached_results(client):
+    """Test that entries built before new data was loaded are not served."""
+    with patch("app.main.earthquake_repo.get_earthquake_by_id") as mock_get:
+        mock_get.return_value = ITEM
+        client.get("/earthquakes/us7000abcd")
+        freshness_cache.invalidate()
+        response = client.get("/earthquakes/us7000abcd")
+
+    assert response.headers["X-Cache"] == "MISS"
+    assert mock_get.await_count == 2
+
+
+def test_not_found_is_not_cached(client):
+    """Test that 404 responses are not stored."""
+    with patch("app.main.earthquake_repo.get_earthquake_by_id") as mock_get:
+        mock_get.return_value = None
+        assert client.get("/earthquakes/missing").status_code == 404
+        assert client.get("/earthquakes/missing").status_code == 404
+
+    assert mock_get.await_count == 2
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that capacity is enforced by evicting the least recently used entry."""
+    cache = ResultCache(max_entries=2, ttl_secs=60)
+    cache.put("a", b"1", generation=0)
+    cache.put("b", b"2", generation=0)
+    cache.get("a", generation=0)
+    cache.put("c", b"3", generation=0)
+
+    assert cache.get("b", generation=0) is None
+    assert cache.get("a", generation=0) is not None
+    assert cache.get("c", generation=0) is not None
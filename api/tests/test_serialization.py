@@ -0,0 +1,61 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+
+from app.schemas import EarthquakeItem, EarthquakeListResponse
+from app.serialization import list_response_content
+
+ROWS = [
+    SimpleNamespace(
+        id="us7000abcd",
+        time=datetime(2024, 1, 1, 12, 0, 0, 123456),
+        magnitude=5.1,
+        place="10 km S of Somewhere",
+        latitude=20.0,
+        longitude=-155.25,
+        depth_km=10.0,
+        url="https://earthquake.usgs.gov/earthquakes/eventpage/us7000abcd",
+    ),
+    SimpleNamespace(
+        id="ci40000001",
+        time=datetime(2024, 1, 1, 11, 59),
+        magnitude=None,
+        place=None,
+        latitude=None,
+        longitude=None,
+        depth_km=None,
+        url=None,
+    ),
+]
+
+
+def test_fast_path_matches_model_serialization():
+    """Test that rows serialized directly give the same JSON as the Pydantic models."""
+    fresh = datetime(2024, 1, 1, 12, 5)
+    model = EarthquakeListResponse(
+        source="db",
+        data_fresh_as_of=fresh,
+        count=len(ROWS),
+        limit=2,
+        offset=0,
+        items=[
+            EarthquakeItem(
+                event_id=row.id,
+                time=row.time,
+                magnitude=row.magnitude,
+                place=row.place,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                depth_km=row.depth_km,
+                url=row.url,
+            )
+            for row in ROWS
+        ],
+        next_cursor="abc",
+    )
+    content = list_response_content(
+        ROWS, source="db", data_fresh_as_of=fresh, limit=2, offset=0, next_cursor="abc"
+    )
+
+    assert orjson.dumps(content) == model.model_dump_json().encode()
@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+from app.services.shared_state import DirectoryCache, MmapBreakerStore
+from app.services.single_flight import SingleFlightCache
+
+
+def _worker_breaker(path, **kwargs) -> CircuitBreaker:
+    """A breaker as one uvicorn worker would open it: its own mapping of the shared file."""
+    return CircuitBreaker(store=MmapBreakerStore(str(path)), **kwargs)
+
+
+def _record_failures(path, count):
+    async def record():
+        breaker = _worker_breaker(path, failure_threshold=1000)
+        for _ in range(count):
+            await breaker.record_failure()
+
+    asyncio.run(record())
+
+
+@pytest.mark.asyncio
+async def test_failures_from_all_workers_count_toward_one_threshold(tmp_path):
+    """Test that workers sharing the mmap store trip the breaker together."""
+    path = tmp_path / "circuit_breaker"
+    worker_a = _worker_breaker(path, failure_threshold=3)
+    worker_b = _worker_breaker(path, failure_threshold=3)
+
+    await worker_a.record_failure()
+    await worker_b.record_failure()
+    assert await worker_a.get_state() == CircuitState.CLOSED
+    await worker_b.record_failure()
+
+    assert await worker_a.get_state() == CircuitState.OPEN
+    assert await worker_a.should_allow_request() is False
+
+
+def test_concurrent_processes_do_not_lose_updates(tmp_path):
+    """Test that flock serializes updates from separate processes."""
+    path = tmp_path / "circuit_breaker"
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_record_failures, args=(path, 200)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert asyncio.run(_worker_breaker(path).get_status())["failure_count"] == 800
+
+
+@pytest.mark.asyncio
+async def test_half_open_allows_one_probe_per_host(tmp_path):
+    """Test that only one worker gets the half-open trial call, and a failed trial reopens."""
+    path = tmp_path / "circuit_breaker"
+    worker_a = _worker_breaker(path, failure_threshold=1, recovery_secs=0)
+    worker_b = _worker_breaker(path, failure_threshold=1, recovery_secs=0)
+    await worker_a.record_failure()
+
+    assert await worker_a.should_allow_request() is True
+    assert await worker_b.should_allow_request() is False
+    assert await worker_a.should_allow_request() is False
+
+    # The failed trial reopens the breaker; with recovery_secs=0 the next trial is up for grabs
+    await worker_a.record_failure()
+    assert (await worker_b.get_status())["failure_count"] == 2
+    assert await worker_b.should_allow_request() is True
+
+
+@pytest.mark.asyncio
+async def test_abandoned_probe_is_released(tmp_path):
+    """Test that a probe that never reports back stops blocking after probe_timeout_secs."""
+    breaker = _worker_breaker(
+        tmp_path / "circuit_breaker", failure_threshold=1, recovery_secs=0, probe_timeout_secs=0.05
+    )
+    await breaker.record_failure()
+
+    assert await breaker.should_allow_request() is True
+    assert await breaker.should_allow_request() is False
+    await asyncio.sleep(0.06)
+    assert await breaker.should_allow_request() is True
+
+
+@pytest.mark.asyncio
+async def test_success_closes_open_breaker():
+    """Test that a success recorded while open (a call that predates the trip) closes the breaker."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_secs=60)
+    await breaker.record_failure()
+    assert await breaker.get_state() == CircuitState.OPEN
+
+    await breaker.record_success()
+    assert await breaker.get_state() == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_directory_cache_expires_entries(tmp_path):
+    """Test that entries are readable until their TTL passes."""
+    cache = DirectoryCache(str(tmp_path))
+    await cache.set("/earthquakes/live?limit=5", b"payload", ttl_secs=0.05)
+
+    assert await cache.get("/earthquakes/live?limit=5") == b"payload"
+    await asyncio.sleep(0.06)
+    assert await cache.get("/earthquakes/live?limit=5") is None
+
+
+@pytest.mark.asyncio
+async def test_live_result_shared_between_workers(tmp_path):
+    """Test that a result fetched by one worker is a hit in another without refetching."""
+    worker_a = SingleFlightCache(ttl_secs=5, shared=DirectoryCache(str(tmp_path)))
+    worker_b = SingleFlightCache(ttl_secs=5, shared=DirectoryCache(str(tmp_path)))
+
+    async def fetch():
+        return [{"event_id": "us7000abcd"}]
+
+    first = await worker_a.fetch("key", fetch)
+    second = await worker_b.get("key")
+
+    assert second is not None
+    assert second.cache_status == "hit"
+    assert second.value == first.value
+    assert second.fetched_at == first.fetched_at
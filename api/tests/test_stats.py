@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.repositories import stats as stats_repo
+from app.schemas import MagnitudeBin
+
+
+def _db(rows):
+    result = MagicMock()
+    result.fetchall.return_value = rows
+    db = AsyncMock()
+    db.execute.return_value = result
+    return db
+
+
+@pytest.mark.asyncio
+async def test_magnitude_histogram_cumulative_counts():
+    """Test that cumulative_count is N(M >= bin) and bins are labelled by lower edge."""
+    db = _db([SimpleNamespace(bin=42, count=5), SimpleNamespace(bin=43, count=3), SimpleNamespace(bin=45, count=1)])
+
+    bins = await stats_repo.get_magnitude_histogram(db, bin_width=0.1)
+
+    assert [(b.magnitude, b.count, b.cumulative_count) for b in bins] == [(4.2, 5, 9), (4.3, 3, 4), (4.5, 1, 1)]
+
+
+def test_b_value_recovers_gutenberg_richter_slope():
+    """Test that a histogram drawn from log10 N = a - b M gives back b and Mc."""
+    bin_width = 0.1
+    bins = [MagnitudeBin(magnitude=2.0, count=100, cumulative_count=0)]  # incomplete below Mc
+    for k in range(40):
+        magnitude = round(2.5 + k * bin_width, 1)
+        bins.append(MagnitudeBin(magnitude=magnitude, count=round(10 ** (6 - magnitude)), cumulative_count=0))
+
+    completeness, b_value = stats_repo.estimate_b_value(bins, bin_width)
+
+    assert completeness == 2.5
+    assert b_value == pytest.approx(1.0, abs=0.05)
+
+
+def test_b_value_needs_enough_events():
+    """Test that no b-value is reported from a handful of events."""
+    bins = [MagnitudeBin(magnitude=4.0, count=3, cumulative_count=3)]
+    assert stats_repo.estimate_b_value(bins, 0.1) == (4.0, None)
+
+
+@pytest.mark.asyncio
+async def test_depth_histogram_keeps_empty_ranges():
+    """Test that every edge range is returned and out-of-range bins only when populated."""
+    db = _db([SimpleNamespace(bucket=1, count=7), SimpleNamespace(bucket=4, count=2)])
+
+    bins = await stats_repo.get_depth_histogram(db, edges=[0, 70, 300, 700])
+
+    assert [(b.min_km, b.max_km, b.count) for b in bins] == [
+        (0, 70, 7),
+        (70, 300, 0),
+        (300, 700, 0),
+        (700, None, 2),
+    ]
+
+
+def test_depth_bins_must_ascend(client):
+    """Test that non-ascending depth edges are rejected."""
+    assert client.get("/earthquakes/stats/depth?bins=70,0").status_code == 400
+
+
+def test_too_many_time_buckets_returns_400(client):
+    """Test that an oversized time series is rejected rather than returned."""
+    with patch("app.main.stats_repo.get_time_series", side_effect=stats_repo.TooManyBucketsError("too many")):
+        response = client.get("/earthquakes/stats/timeseries?interval=hour")
+
+    assert response.status_code == 400
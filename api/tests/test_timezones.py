@@ -0,0 +1,85 @@
+"""
+Aware timestamps (?start=...Z) must reach asyncpg as the naive UTC the columns hold.
+
+The endpoint tests need a database with the dbt-built tables, so they only run
+when TEST_DATABASE_URL is set; DB_SCHEMA selects the schema as for the API.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import get_db
+from app.main import app
+from app.pagination import encode_cursor
+from app.repositories.earthquakes import list_query, naive_utc
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def test_naive_utc_converts_aware_values():
+    """Test that aware datetimes become naive UTC and naive ones pass through."""
+    aware = datetime(2024, 1, 1, 2, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert naive_utc(aware) == datetime(2024, 1, 1, 0, 30)
+    assert naive_utc(datetime(2024, 1, 1)) == datetime(2024, 1, 1)
+    assert naive_utc(None) is None
+
+
+def test_list_query_binds_naive_times():
+    """Test that filter and cursor binds are naive whatever the request carried."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    _, params = list_query(start=start, end=start, after=(start, "ev1"))
+    assert all(params[name].tzinfo is None for name in ("start", "end", "after_time"))
+
+
+@pytest_asyncio.fixture
+async def db_client():
+    engine = create_async_engine(TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+@pytest.mark.parametrize("suffix", ["Z", "+00:00", "-05:00"])
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/earthquakes",
+        "/earthquakes/stats/timeseries?interval=month",
+        "/earthquakes/stats/magnitude",
+        "/earthquakes/stats/depth",
+        "/earthquakes/near?lat=0&lon=0&radius_km=20000",
+        "/earthquakes/clusters?zoom=2",
+    ],
+)
+async def test_aware_timestamps_accepted(db_client, path, suffix):
+    """Test that every filtered endpoint answers ISO timestamps with a UTC offset."""
+    separator = "&" if "?" in path else "?"
+    response = await db_client.get(
+        path + separator, params={"start": f"2000-01-01T00:00:00{suffix}", "end": f"2100-01-01T00:00:00{suffix}"}
+    )
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+async def test_aware_cursor_accepted(db_client):
+    """Test that a keyset cursor carrying an offset is bound as naive UTC."""
+    cursor = encode_cursor(datetime(2100, 1, 1, tzinfo=timezone.utc), "ev", "desc")
+    response = await db_client.get("/earthquakes", params={"cursor": cursor, "limit": 1})
+    assert response.status_code == 200, response.text
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.metrics import usgs_connections_total
+from app.services import usgs_client
+from app.services.retry_policy import LatencyTracker, RetryBudget, jittered_backoff
+from app.services.usgs_client import USGSClientError
+from app.settings import settings
+
+EMPTY_BODY = json.dumps({"type": "FeatureCollection", "features": []}).encode()
+
+
+def _count(kind: str) -> float:
+    return usgs_connections_total.labels(kind=kind)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_trace_counts_new_connection_once():
+    """Test that a request opening a connection is counted as new, not also as reused."""
+    new_before, reused_before = _count("new"), _count("reused")
+    trace = usgs_client._connection_trace()
+    await trace("connection.connect_tcp.started", {})
+    await trace("http11.send_request_headers.started", {})
+
+    assert _count("new") == new_before + 1
+    assert _count("reused") == reused_before
+
+
+@pytest.mark.asyncio
+async def test_trace_counts_pooled_connection_as_reused():
+    """Test that a request going straight to sending headers reused a pooled connection."""
+    reused_before = _count("reused")
+    trace = usgs_client._connection_trace()
+    await trace("http2.send_request_headers.started", {})
+
+    assert _count("reused") == reused_before + 1
+
+
+@pytest.mark.asyncio
+async def test_client_shared_until_closed():
+    """Test that calls share one client and a closed client is replaced."""
+    await usgs_client.close_client()
+    client = usgs_client.get_client()
+    assert usgs_client.get_client() is client
+
+    await usgs_client.close_client()
+    assert usgs_client.get_client() is not client
+    await usgs_client.close_client()
+
+
+def _warm_tracker(latency_secs: float) -> LatencyTracker:
+    tracker = LatencyTracker(min_samples=20)
+    for _ in range(20):
+        tracker.observe(latency_secs)
+    return tracker
+
+
+@contextmanager
+def _patched_client(handler, tracker=None, budget=None):
+    """Patch the client module to use handler, no fetch cache, and the given latency/budget state."""
+    with patch.object(
+        usgs_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    ), patch.object(usgs_client, "fetch_cache", None), patch.object(
+        usgs_client, "latency", tracker or LatencyTracker()
+    ), patch.object(usgs_client, "retry_budget", budget or RetryBudget()):
+        yield
+
+
+def test_timeout_adapts_to_recent_latency():
+    """Test that the timeout is the cap until warmed up, then p99 x multiplier within bounds."""
+    tracker = LatencyTracker(
+        window=20, min_samples=20, min_timeout_secs=0.5, max_timeout_secs=3.0, p99_multiplier=2.0
+    )
+    assert tracker.timeout() == 3.0
+    assert tracker.hedge_delay() is None
+
+    for _ in range(20):
+        tracker.observe(0.4)
+    assert tracker.timeout() == pytest.approx(0.8)
+
+    for _ in range(20):
+        tracker.observe(0.01)
+    assert tracker.timeout() == 0.5  # clamped to the minimum
+
+
+def test_retry_budget_tracks_request_share():
+    """Test that retries are limited to the earned share of requests."""
+    budget = RetryBudget(ratio=0.5, min_per_sec=0, max_tokens=1)
+    assert budget.try_spend() is True
+    assert budget.try_spend() is False
+
+    budget.record_request()
+    assert budget.try_spend() is False
+    budget.record_request()
+    assert budget.try_spend() is True
+
+
+def test_jittered_backoff_within_cap():
+    """Test that backoff is spread over [0, min(max, base * 2^attempt)]."""
+    delays = [jittered_backoff(5, base_secs=0.25, max_secs=2.0) for _ in range(200)]
+    assert all(0 <= d <= 2.0 for d in delays)
+    assert max(delays) - min(delays) > 0.5
+
+
+@pytest.mark.asyncio
+async def test_hedge_answers_when_primary_is_slow():
+    """Test that a hedge sent after the p95 returns before a stalled first request."""
+    calls = []
+
+    async def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, content=EMPTY_BODY)
+
+    started = time.monotonic()
+    with patch.object(settings, "usgs_hedge_enabled", True), _patched_client(handler, _warm_tracker(0.02)):
+        items = await usgs_client.fetch_earthquakes(limit=1)
+
+    assert items == []
+    assert len(calls) == 2
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_total_time():
+    """Test that a hung upstream fails by the deadline instead of after every retry."""
+
+    async def handler(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, content=EMPTY_BODY)
+
+    started = time.monotonic()
+    with _patched_client(handler), pytest.raises(USGSClientError, match="timeout"):
+        await usgs_client.fetch_earthquakes(limit=1, deadline=started + 0.2)
+
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retry_budget_skips_retries():
+    """Test that no retries are sent once the retry budget is spent."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("refused", request=request)
+
+    budget = RetryBudget(ratio=0, min_per_sec=0, max_tokens=0)
+    with _patched_client(handler, budget=budget), pytest.raises(USGSClientError):
+        await usgs_client.fetch_earthquakes(limit=1)
+
+    assert len(calls) == 1
+
+
+def test_parsed_times_are_naive_utc(monkeypatch):
+    """Test that event times match the database's naive UTC whatever the local timezone."""
+    monkeypatch.setenv("TZ", "America/Los_Angeles")
+    time.tzset()
+    try:
+        items = usgs_client._parse_geojson_features(
+            [{"id": "us1", "properties": {"time": 1700000000000}, "geometry": {"coordinates": [1, 2, 3]}}]
+        )
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert items[0].time == datetime(2023, 11, 14, 22, 13, 20)
+    assert items[0].time.tzinfo is None
@@ -0,0 +1,222 @@
+"""
+End-to-end ingest benchmark: synthetic USGS payload -> local FDSN stand-in
+-> fetch/parse -> load into a local Postgres.
+
+Each (strategy, size) case runs in a fresh process so peak RSS is measured
+per case. Results are printed as a table and written as JSON for comparing
+loader strategies across commits.
+
+WARNING: every case truncates raw_data.raw_earthquakes in the database
+configured by the DB_* environment variables. Point it at a scratch database
+and pass --allow-truncate.
+
+Usage:
+    python -m benchmarks.bench_ingest --events 1000,10000,100000 --allow-truncate --output bench_results.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator
+
+import requests
+
+from benchmarks.fdsn_server import FDSNStandIn
+
+STRATEGIES = ("rowwise", "bulk", "stream")
+
+
+class CountingCursor:
+    """Cursor proxy that counts statements sent to the server (DB round trips)."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.round_trips = 0
+
+    def execute(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def copy_expert(self, *args, **kwargs):
+        self.round_trips += 1
+        return self._cursor.copy_expert(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedIterator:
+    """Wraps an iterator and accumulates the time spent producing items."""
+
+    def __init__(self, iterable: Iterable):
+        self._iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rowwise_load(features: Iterable[Dict], cursor, f):
+    """Baseline: one INSERT ... ON CONFLICT statement per feature (two with cold payload storage)."""
+    query = """
+        INSERT INTO raw_data.raw_earthquakes (
+            id, time, updated, place, magnitude, longitude, latitude, depth_km, url,
+            event_type, sig, tsunami, mag_type, raw_json
+        )
+        VALUES (%s, to_timestamp(%s / 1000), to_timestamp(%s / 1000.0), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """ + f.REVISION_CONFLICT_CLAUSE
+    payload_query = """
+        INSERT INTO raw_data.raw_earthquake_payloads (id, updated, payload, payload_zlib)
+        VALUES (%s, to_timestamp(%s / 1000.0), %s, %s)
+        ON CONFLICT (id) DO UPDATE SET
+            updated = EXCLUDED.updated, payload = EXCLUDED.payload, payload_zlib = EXCLUDED.payload_zlib
+    """
+    inline = f.RAW_JSON_STORAGE == "inline"
+    months = set()
+    count = 0
+    for feature in features:
+        row = f._feature_to_row(feature)
+        month = datetime.utcfromtimestamp(row[1] / 1000).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if month not in months:
+            f.ensure_month_partitions(cursor, [month])
+            months.add(month)
+        cursor.execute(query, row[:13] + (row[13] if inline else None,))
+        if not inline:
+            cursor.execute(payload_query, (row[0], row[2], row[13], row[14]))
+        count += 1
+    return f.LoadResult(count, 0, 0)
+
+
+def run_case(strategy: str, base_url: str, batch_size: int) -> Dict:
+    """Run one benchmark case; meant to execute in a fresh process."""
+    import fetch_usgs_data as f
+
+    f.USGS_BASE_URL = base_url
+    conn = f.connect_db()
+    try:
+        with conn.cursor() as cursor:
+            f.ensure_raw_table(cursor)
+            cursor.execute("TRUNCATE raw_data.raw_earthquakes, raw_data.raw_earthquake_payloads")
+        conn.commit()
+
+        baseline_rss = _peak_rss_mb()
+        cursor = CountingCursor(conn.cursor())
+        params = {"format": "geojson"}
+        started = time.perf_counter()
+
+        if strategy == "stream":
+            features = TimedIterator(f.stream_query_features(params))
+            result = f.stream_insert_earthquake_data(features, cursor, batch_size=batch_size)
+            parse_secs = features.seconds
+        else:
+            parse_started = time.perf_counter()
+            response = requests.get(f.USGS_BASE_URL, params=params)
+            response.raise_for_status()
+            data = response.json()
+            parse_secs = time.perf_counter() - parse_started
+            if strategy == "bulk":
+                result = f.bulk_insert_earthquake_data(data, cursor, batch_size=batch_size)
+            else:
+                result = _rowwise_load(data["features"], cursor, f)
+
+        conn.commit()
+        cursor.round_trips += 1
+        total_secs = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    rows = result.inserted + result.updated + result.skipped
+    load_secs = max(total_secs - parse_secs, 1e-9)
+    return {
+        "strategy": strategy,
+        "events": rows,
+        "batch_size": batch_size if strategy != "rowwise" else None,
+        "parse_secs": round(parse_secs, 4),
+        "load_secs": round(load_secs, 4),
+        "total_secs": round(total_secs, 4),
+        "load_rows_per_sec": round(rows / load_secs, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "db_round_trips": cursor.round_trips,
+        "inserted": result.inserted,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the USGS ingest path against a local Postgres.")
+    parser.add_argument("--events", default="1000,10000", help="Comma-separated catalog sizes (1k-1M).")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help=f"Comma-separated subset of {STRATEGIES}.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="COPY batch size for bulk/stream.")
+    parser.add_argument("--rowwise-max", type=int, default=50000, help="Skip the rowwise baseline above this size.")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file.")
+    parser.add_argument("--allow-truncate", action="store_true", help="Confirm raw_data.raw_earthquakes may be truncated.")
+    args = parser.parse_args()
+
+    if not args.allow_truncate:
+        parser.error("the benchmark truncates raw_data.raw_earthquakes; pass --allow-truncate to confirm")
+
+    sizes = [int(size) for size in args.events.split(",")]
+    strategies = [strategy.strip() for strategy in args.strategies.split(",")]
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    for size in sizes:
+        with FDSNStandIn(size) as server:
+            for strategy in strategies:
+                if strategy == "rowwise" and size > args.rowwise_max:
+                    continue
+                with context.Pool(1) as pool:
+                    result = pool.apply(run_case, (strategy, server.base_url, args.batch_size))
+                results.append(result)
+                print(
+                    f"{strategy:>8} {size:>9} events | parse {result['parse_secs']:8.3f}s"
+                    f" | load {result['load_rows_per_sec']:>10.0f} rows/s"
+                    f" | peak RSS {result['peak_rss_mb']:7.1f} MB"
+                    f" | round trips {result['db_round_trips']:>8}"
+                )
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Local stand-in for the USGS FDSN event service.
+
+Serves a deterministic synthetic catalog of `events` events, one every
+`spacing_ms`, from benchmarks.synthetic. Supports the parts of the API the
+ingest path uses: /query (format=geojson, starttime, endtime, limit) and
+/count (format=geojson). Responses are streamed with chunked transfer.
+"""
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import CATALOG_START_MS, iter_feature_collection
+
+QUERY_PATH = "/fdsnws/event/1/query"
+COUNT_PATH = "/fdsnws/event/1/count"
+MAX_EVENTS = 20000
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Streaming clients close the connection once they have the features array
+        pass
+
+
+def _parse_time_ms(value: str) -> int:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+class FDSNStandIn:
+    """
+    Threaded HTTP server exposing a synthetic catalog.
+    Args:
+        events (int): Catalog size.
+        spacing_ms (int): Milliseconds between consecutive events.
+        seed (int): Catalog seed.
+        enforce_cap (bool): Reject queries over 20,000 events, like USGS does.
+    """
+
+    def __init__(self, events: int, spacing_ms: int = 60_000, seed: int = 0, enforce_cap: bool = False):
+        self.events = events
+        self.spacing_ms = spacing_ms
+        self.seed = seed
+        self.enforce_cap = enforce_cap
+        self.requests = 0
+        self._server = _QuietServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{QUERY_PATH}"
+
+    def index_range(self, params: dict) -> Tuple[int, int]:
+        """Catalog indexes [start, stop) matching a query's time bounds."""
+        start, stop = 0, self.events
+        if "starttime" in params:
+            offset = _parse_time_ms(params["starttime"]) - CATALOG_START_MS
+            start = max(start, -(-offset // self.spacing_ms))
+        if "endtime" in params:
+            offset = _parse_time_ms(params["endtime"]) - CATALOG_START_MS
+            stop = min(stop, offset // self.spacing_ms + 1)
+        if "limit" in params:
+            stop = min(stop, start + int(params["limit"]))
+        return start, max(start, stop)
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stand_in.requests += 1
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                start, stop = stand_in.index_range(params)
+
+                if url.path == COUNT_PATH:
+                    body = json.dumps({"count": stop - start, "maxAllowed": MAX_EVENTS}).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                if url.path != QUERY_PATH:
+                    self.send_error(404)
+                    return
+                if stand_in.enforce_cap and stop - start > MAX_EVENTS:
+                    self.send_error(400, f"{stop - start} matching events exceeds search limit of {MAX_EVENTS}")
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pending = []
+                pending_size = 0
+                for chunk in iter_feature_collection(start, stop, seed=stand_in.seed, spacing_ms=stand_in.spacing_ms):
+                    pending.append(chunk)
+                    pending_size += len(chunk)
+                    if pending_size >= 64 * 1024:
+                        self._write_chunk("".join(pending).encode())
+                        pending, pending_size = [], 0
+                if pending:
+                    self._write_chunk("".join(pending).encode())
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FDSNStandIn":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FDSNStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Serve a synthetic USGS FDSN event endpoint.")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--spacing-ms", type=int, default=60_000)
+    args = parser.parse_args()
+    with FDSNStandIn(args.events, spacing_ms=args.spacing_ms) as server:
+        print(f"Serving {args.events} events at {server.base_url}")
+        while True:
+            time.sleep(3600)
@@ -0,0 +1,133 @@
+"""
+Synthetic USGS GeoJSON generator for ingest benchmarks.
+
+Events are deterministic for a given seed and index, so any slice of the
+catalog (e.g. one FDSN query window) can be generated on demand without
+materializing the whole thing.
+"""
+import json
+import math
+import random
+from datetime import datetime, timezone
+from typing import Dict, Iterator, TextIO
+
+# Catalog epoch and spacing; event i happens at CATALOG_START_MS + i * spacing_ms
+CATALOG_START_MS = int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+# Seismically active areas (lon, lat, spread in degrees) to get a realistic spatial skew
+HOTSPOTS = [
+    (142.0, 38.0, 6.0),    # Japan
+    (-72.0, -30.0, 8.0),   # Chile
+    (120.0, 0.0, 10.0),    # Indonesia
+    (-150.0, 60.0, 8.0),   # Alaska
+    (-118.0, 35.0, 4.0),   # California
+    (28.0, 38.0, 5.0),     # Turkey / Aegean
+]
+NETWORKS = ["us", "ak", "ci", "nc", "hv", "nn", "uw"]
+MAG_TYPES = ["mb", "mww", "ml", "md", "mwr"]
+
+
+def make_feature(index: int, seed: int = 0, spacing_ms: int = 60_000, min_magnitude: float = 2.5) -> Dict:
+    """
+    Build the index-th synthetic event as a USGS-shaped GeoJSON feature.
+    Args:
+        index (int): Position in the catalog.
+        seed (int): Catalog seed.
+        spacing_ms (int): Milliseconds between consecutive events.
+        min_magnitude (float): Smallest magnitude generated.
+    Returns:
+        dict: GeoJSON feature with the full USGS property set.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    net = NETWORKS[index % len(NETWORKS)]
+    code = f"{seed:02d}{index:010d}"
+    event_time = CATALOG_START_MS + index * spacing_ms
+
+    if rng.random() < 0.7:
+        lon0, lat0, spread = rng.choice(HOTSPOTS)
+        lon = max(-180.0, min(180.0, rng.gauss(lon0, spread)))
+        lat = max(-90.0, min(90.0, rng.gauss(lat0, spread)))
+    else:
+        lon = rng.uniform(-180.0, 180.0)
+        lat = math.degrees(math.asin(rng.uniform(-1.0, 1.0)))
+    depth = round(min(700.0, rng.expovariate(1 / 35.0)), 3)
+    # Gutenberg-Richter with b = 1
+    mag = round(min(9.5, min_magnitude + rng.expovariate(math.log(10))), 1)
+
+    place = f"{rng.randint(1, 300)} km {rng.choice(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW'])} of Synthetic {index % 997}"
+    event_id = f"{net}{code}"
+    return {
+        "type": "Feature",
+        "properties": {
+            "mag": mag,
+            "place": place,
+            "time": event_time,
+            "updated": event_time + rng.randint(60_000, 86_400_000),
+            "tz": None,
+            "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/{event_id}",
+            "detail": f"https://earthquake.usgs.gov/fdsnws/event/1/query?eventid={event_id}&format=geojson",
+            "felt": rng.choice([None, None, rng.randint(1, 500)]),
+            "cdi": rng.choice([None, round(rng.uniform(1, 8), 1)]),
+            "mmi": rng.choice([None, round(rng.uniform(1, 8), 3)]),
+            "alert": rng.choice([None, None, None, "green", "yellow"]),
+            "status": rng.choice(["reviewed", "automatic"]),
+            "tsunami": 1 if mag >= 7 and rng.random() < 0.3 else 0,
+            "sig": int(mag * 100),
+            "net": net,
+            "code": code,
+            "ids": f",{event_id},",
+            "sources": f",{net},",
+            "types": ",origin,phase-data,",
+            "nst": rng.randint(10, 200),
+            "dmin": round(rng.uniform(0, 20), 3),
+            "rms": round(rng.uniform(0.1, 1.5), 2),
+            "gap": rng.randint(10, 250),
+            "magType": rng.choice(MAG_TYPES),
+            "type": "earthquake",
+            "title": f"M {mag} - {place}",
+        },
+        "geometry": {"type": "Point", "coordinates": [round(lon, 4), round(lat, 4), depth]},
+        "id": event_id,
+    }
+
+
+def iter_features(start: int, stop: int, seed: int = 0, spacing_ms: int = 60_000) -> Iterator[Dict]:
+    """Yield events start..stop-1 of the synthetic catalog."""
+    for index in range(start, stop):
+        yield make_feature(index, seed=seed, spacing_ms=spacing_ms)
+
+
+def iter_feature_collection(start: int, stop: int, seed: int = 0, spacing_ms: int = 60_000) -> Iterator[str]:
+    """
+    Yield a USGS FeatureCollection for events start..stop-1 as text chunks.
+    Memory use is one feature at a time, so 1M-event payloads are fine.
+    """
+    metadata = {
+        "generated": CATALOG_START_MS,
+        "url": "http://localhost/fdsnws/event/1/query",
+        "title": "USGS Earthquakes (synthetic)",
+        "status": 200,
+        "api": "1.14.1",
+        "count": stop - start,
+    }
+    yield '{"type":"FeatureCollection","metadata":' + json.dumps(metadata) + ',"features":['
+    for offset, feature in enumerate(iter_features(start, stop, seed=seed, spacing_ms=spacing_ms)):
+        yield ("," if offset else "") + json.dumps(feature)
+    yield '],"bbox":[-180,-90,0,180,90,700]}'
+
+
+def write_feature_collection(fp: TextIO, count: int, seed: int = 0) -> None:
+    """Write a synthetic FeatureCollection with `count` events to a text file."""
+    for chunk in iter_feature_collection(0, count, seed=seed):
+        fp.write(chunk)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Write a synthetic USGS GeoJSON payload to stdout.")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_feature_collection(sys.stdout, args.events, seed=args.seed)
@@ -3,13 +3,23 @@ from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 import sys
 import os
-import json
+import re
 
 # Add root path to import fetch_usgs_data
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
-from fetch_usgs_data import fetch_earthquake_data, insert_earthquake_data
-import psycopg2
+from fetch_usgs_data import (
+    STAGING_DIR,
+    build_incremental_params,
+    connect_db,
+    ensure_raw_table,
+    fetch_to_staging_file,
+    mark_fetch_cache_loaded,
+    read_staging_file,
+    run_backfill_from_context,
+    set_watermark,
+    stream_insert_earthquake_data,
+)
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -31,36 +41,82 @@ with DAG(
     tags=["earthquake", "usgs", "postgres"],
 ) as dag:
 
+    def is_backfill(context) -> bool:
+        dag_conf = context["dag_run"].conf or {}
+        return bool(dag_conf.get("backfill"))
+
+    def setup_schema(**context):
+        """
+        Create or migrate the partitioned raw table once per run, outside the load path.
+        """
+        conn = connect_db()
+        try:
+            with conn.cursor() as cursor:
+                ensure_raw_table(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+
     def extract_data(**context):
         """
-        Fetch earthquake data and push it to XCom.
+        Stream earthquake data into a gzipped NDJSON staging file and push its path to XCom.
+        Scheduled runs only fetch events updated since the stored watermark, and
+        content that is unchanged since the last successful load is not staged.
+        Pass {"refresh": true} in the run conf to bypass the fetch cache.
+        Backfill runs fetch inside the load task, window by window.
         """
-        data = fetch_earthquake_data(**context)
-        # Store as JSON string (XCom only handles small, serializable data)
-        # Warning: XCom has size limits (~48KB). Large payloads can fail silently.
-        context['ti'].xcom_push(key='earthquake_data', value=json.dumps(data))
+        if is_backfill(context):
+            return
+        conn = connect_db()
+        try:
+            with conn.cursor() as cursor:
+                params, watermark = build_incremental_params(cursor, **context)
+            conn.commit()
+        finally:
+            conn.close()
+
+        run_id = re.sub(r"[^A-Za-z0-9_.-]", "_", context["run_id"])
+        path = os.path.join(STAGING_DIR, f"{dag.dag_id}_{run_id}.ndjson.gz")
+        use_cache = not (context["dag_run"].conf or {}).get("refresh")
+        staged = fetch_to_staging_file(params, path, use_cache=use_cache)
+        staged["watermark"] = watermark
+        # Only the path and checksum go through XCom; the payload stays on disk.
+        context['ti'].xcom_push(key='staging_file', value=staged)
 
     def load_data(**context):
         """
-        Pull earthquake data from XCom and insert into Postgres.
+        Stream earthquake data from the staging file and upsert it into Postgres.
+        With {"backfill": true} in the run conf, run the windowed backfill instead.
         """
-        json_data = context['ti'].xcom_pull(task_ids='extract_earthquake_data', key='earthquake_data')
-        data = json.loads(json_data)
+        if is_backfill(context):
+            run_backfill_from_context(**context)
+            return
+
+        staged = context['ti'].xcom_pull(task_ids='extract_earthquake_data', key='staging_file')
+        if staged.get("unchanged"):
+            return
 
         try:
-            with psycopg2.connect(
-                    dbname=os.getenv("DB_NAME"),
-                    user=os.getenv("DB_USER"),
-                    password=os.getenv("DB_PASS"),
-                    host=os.getenv("DB_HOST"),
-                    port=os.getenv("DB_PORT")
-            ) as conn:
+            with connect_db() as conn:
                 with conn.cursor() as cursor:
-                    insert_earthquake_data(data, cursor)
+                    features = read_staging_file(staged["path"], sha256=staged["sha256"])
+                    result = stream_insert_earthquake_data(features, cursor)
+                    # Advance the watermark in the same transaction as the rows
+                    if staged.get("watermark") and result.max_updated_ms is not None:
+                        set_watermark(cursor, staged["watermark"], result.max_updated_ms)
                 conn.commit()
         except Exception as e:
             raise RuntimeError(f"Failed to load earthquake data: {e}")
 
+        mark_fetch_cache_loaded(staged["cache"])
+        # Keep the file until the load has committed so a retry can reuse it.
+        os.remove(staged["path"])
+
+    schema_task = PythonOperator(
+        task_id="ensure_raw_schema",
+        python_callable=setup_schema,
+    )
+
     extract_task = PythonOperator(
         task_id="extract_earthquake_data",
         python_callable=extract_data,
@@ -71,4 +127,4 @@ with DAG(
         python_callable=load_data,
     )
 
-    extract_task >> load_task
+    schema_task >> extract_task >> load_task
@@ -0,0 +1,15 @@
+{#
+  Months agg_quake_grid must recompute: those holding events the loader touched
+  since the grid's newest loaded_at (minus the staging lookback), plus the months
+  those events were in before a revision moved them (previous_time).
+#}
+{% macro quake_grid_stale_months(grid) %}
+  select distinct date_trunc('month', t)::date
+  from {{ ref('stg_earthquakes') }}
+  cross join lateral unnest(array[time, previous_time]) as t
+  where t is not null
+    and loaded_at > (
+      select coalesce(max(loaded_at), '-infinity'::timestamp)
+      from {{ grid }}
+    ) - interval '{{ var('stg_incremental_lookback', '1 hour') }}'
+{% endmacro %}
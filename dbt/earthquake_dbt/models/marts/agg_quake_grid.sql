@@ -0,0 +1,70 @@
+-- Per-zoom grid aggregates for the clustered quake map
+-- One row per (zoom, Web Mercator tile x/y, month); the API sums months for a time range.
+-- Incremental runs recompute only months that hold events the loader touched since the last run,
+-- and the months revised events were moved out of (see quake_grid_stale_months).
+
+{% set zooms = var('quake_grid_zooms', [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]) %}
+
+{#- delete+insert only clears months present in the new rows. A month whose last
+    event moved away produces none, so the pre_hook clears stale months up front. -#}
+
+{{
+  config(
+    materialized='incremental',
+    unique_key='month',
+    incremental_strategy='delete+insert',
+    pre_hook="{% if is_incremental() %}delete from {{ this }} where month in ({{ quake_grid_stale_months(this) }}){% endif %}",
+    indexes=[
+      {'columns': ['zoom', 'x', 'y']},
+    ],
+    post_hook=[
+      "analyze {{ this }}",
+      "select pg_notify('{{ var('ingest_notify_channel', 'earthquake_ingest') }}', '{{ this }}')",
+    ],
+  )
+}}
+
+with events as (
+  select
+    date_trunc('month', time)::date as month,
+    magnitude,
+    latitude,
+    longitude,
+    -- Web Mercator stops at +-85.05112878 degrees
+    radians(greatest(least(latitude, 85.05112878), -85.05112878)) as lat_rad,
+    loaded_at
+  from {{ ref('stg_earthquakes') }}
+  where latitude is not null and longitude is not null
+  {% if is_incremental() %}
+    and date_trunc('month', time)::date in ({{ quake_grid_stale_months(this) }})
+  {% endif %}
+),
+projected as (
+  -- Tile fractions in [0, 1]: x grows east from the antimeridian, y grows south from the top
+  select
+    month,
+    magnitude,
+    latitude,
+    longitude,
+    loaded_at,
+    (longitude + 180) / 360 as fx,
+    (1 - ln(tan(lat_rad) + 1 / cos(lat_rad)) / pi()) / 2 as fy
+  from events
+),
+zooms as (
+  select unnest(array[{{ zooms | join(', ') }}]) as zoom
+)
+
+select
+  zoom,
+  least(greatest(floor(fx * power(2, zoom)), 0), power(2, zoom) - 1)::int as x,
+  least(greatest(floor(fy * power(2, zoom)), 0), power(2, zoom) - 1)::int as y,
+  month,
+  count(*) as quake_count,
+  max(magnitude) as max_magnitude,
+  sum(latitude) as sum_latitude,
+  sum(longitude) as sum_longitude,
+  max(loaded_at) as loaded_at
+from projected
+cross join zooms
+group by 1, 2, 3, 4
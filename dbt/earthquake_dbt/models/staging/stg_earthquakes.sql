@@ -1,11 +1,50 @@
 --- staging cleaned data from raw
+-- Materialized for the API: indexes match its filters, ORDER BY time, id and keyset paging.
+-- Incremental runs only re-read rows the loader touched since the last run
+-- (minus a lookback for loads still in flight then); `dbt run --full-refresh` rebuilds it.
+
+{{
+  config(
+    materialized='incremental',
+    unique_key='id',
+    indexes=[
+      {'columns': ['id'], 'unique': True},
+      {'columns': ['time', 'id']},
+      {'columns': ['magnitude']},
+      {'columns': ['(point(longitude, latitude))'], 'type': 'gist'},
+    ],
+    post_hook=[
+      "analyze {{ this }}",
+      "select pg_notify('{{ var('ingest_notify_channel', 'earthquake_ingest') }}', '{{ this }}')",
+    ],
+  )
+}}
 
 with source as (
-  select * from raw_data.raw_earthquakes
+  -- hot columns only; the raw payload stays out of this model. It is in raw_json
+  -- (RAW_JSON_STORAGE=inline, the default) or in raw_data.raw_earthquake_payloads (cold modes)
+  select
+    r.id, r.time, r.updated, r.place, r.magnitude, r.latitude, r.longitude, r.depth_km, r.url,
+    r.event_type, r.sig, r.tsunami, r.mag_type, r.loaded_at,
+    {% if is_incremental() %}
+    -- Where a revision moved the event from; agg_quake_grid recomputes that month too
+    case when prior.time <> r.time then prior.time else prior.previous_time end as previous_time
+    {% else %}
+    null::timestamp as previous_time
+    {% endif %}
+  from raw_data.raw_earthquakes r
+  {% if is_incremental() %}
+  left join {{ this }} prior on prior.id = r.id
+  where r.loaded_at > (
+    select coalesce(max(loaded_at), '-infinity'::timestamp)
+    from {{ this }}
+  ) - interval '{{ var('stg_incremental_lookback', '1 hour') }}'
+  {% endif %}
 ),
 renamed as (
   select
-    id,
+    -- Byte order, as the API's keyset cursors and columnar store compare ids; the (time, id) index inherits it
+    id collate "C" as id,
     time,
     to_char(time, 'YYYY-MM-DD') as date,
     to_char(time, 'YYYY-MM') as year_month,
@@ -15,7 +54,14 @@ renamed as (
     latitude,
     longitude,
     depth_km,
-    url
+    url,
+    updated,
+    event_type,
+    sig,
+    tsunami,
+    mag_type,
+    loaded_at,
+    previous_time
   from source
   where magnitude is not null
 )
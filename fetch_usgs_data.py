@@ -1,12 +1,19 @@
 import requests
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import execute_values
+import codecs
+import gzip
+import hashlib
+import io
+import json
+import zlib
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from dotenv import load_dotenv
 import os
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Load environment variables from .env
 load_dotenv()
@@ -18,6 +25,58 @@ DB_PASS = os.getenv("DB_PASS")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 
+# --- USGS API config ---
+USGS_BASE_URL = os.getenv("USGS_BASE_URL", "https://earthquake.usgs.gov/fdsnws/event/1/query")
+# Bytes read from the HTTP body per chunk in streaming mode.
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(64 * 1024)))
+# FDSN caps a single query at 20,000 events; backfill windows are sized below this.
+USGS_MAX_EVENTS = int(os.getenv("USGS_MAX_EVENTS", "20000"))
+
+# --- Backfill config ---
+BACKFILL_WINDOW_DAYS = int(os.getenv("BACKFILL_WINDOW_DAYS", "30"))
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+# Windows are never split below this size, even if USGS still reports too many events.
+BACKFILL_MIN_WINDOW = timedelta(minutes=1)
+
+# --- Staging config ---
+# Extract tasks write gzipped NDJSON here; must be shared by extract and load workers.
+STAGING_DIR = os.getenv("STAGING_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "staging"))
+
+# --- Fetch cache config ---
+# Per-query ETag/Last-Modified and content hashes, used to skip unchanged re-fetches.
+FETCH_CACHE_DIR = os.getenv("FETCH_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "usgs"))
+# Append-only hit/miss log inside FETCH_CACHE_DIR, aggregated by fetch_cache_stats
+FETCH_CACHE_STATS_FILE = "stats.log"
+# Incremental query parameters that change every run and are left out of the cache key
+INCREMENTAL_CACHE_IGNORED_PARAMS = ("updatedafter", "starttime")
+
+# --- Bulk load config ---
+# Rows per COPY batch; bounds the size of the in-memory COPY buffer.
+COPY_BATCH_SIZE = int(os.getenv("COPY_BATCH_SIZE", "5000"))
+STAGE_COLUMNS = (
+    "id", "time_ms", "updated_ms", "place", "magnitude", "longitude", "latitude", "depth_km", "url",
+    "event_type", "sig", "tsunami", "mag_type", "raw_json", "payload_zlib"
+)
+
+# Postgres LISTEN/NOTIFY channel signalled when a load changes raw_earthquakes
+INGEST_NOTIFY_CHANNEL = os.getenv("INGEST_NOTIFY_CHANNEL", "earthquake_ingest")
+
+# --- Raw payload storage ---
+# inline:          full feature in raw_earthquakes.raw_json (wide hot table)
+# cold:            full feature in raw_data.raw_earthquake_payloads, hot raw_json is NULL
+# cold_pruned:     as cold, minus keys already promoted to hot columns
+# cold_compressed: as cold_pruned, zlib-compressed into payload_zlib (BYTEA)
+RAW_JSON_STORAGE_MODES = ("inline", "cold", "cold_pruned", "cold_compressed")
+RAW_JSON_STORAGE = os.getenv("RAW_JSON_STORAGE", "inline")
+if RAW_JSON_STORAGE not in RAW_JSON_STORAGE_MODES:
+    raise ValueError(f"RAW_JSON_STORAGE must be one of {RAW_JSON_STORAGE_MODES}, got {RAW_JSON_STORAGE!r}")
+# GeoJSON properties stored as hot columns; pruned payloads drop them
+PROMOTED_PROPERTIES = ("mag", "place", "time", "updated", "url", "type", "sig", "tsunami", "magType")
+
+# --- Incremental ingestion config ---
+# How far back incremental runs look for revised events (USGS defaults starttime to 30 days ago).
+INCREMENTAL_LOOKBACK_DAYS = int(os.getenv("INCREMENTAL_LOOKBACK_DAYS", "90"))
+
 # --- Logging setup ---
 logging.basicConfig(
     level=logging.INFO,
@@ -26,54 +85,425 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def fetch_earthquake_data(**context):
+def connect_db():
     """
-    Fetch earthquake data from USGS Earthquake API with configurable date range and magnitude
+    Open a new psycopg2 connection using the DB_* environment variables.
+    """
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASS,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+
+class LoadResult(NamedTuple):
+    """Row counts from a bulk load, plus the newest USGS `updated` value seen (epoch ms)."""
+    inserted: int
+    updated: int
+    skipped: int
+    max_updated_ms: Optional[int] = None
+
+
+def build_query_params(**context) -> Dict:
+    """
+    Build USGS query parameters from the DAG run conf, falling back to CLI-style kwargs.
     Returns:
-        dict: Parsed JSON response (GeoJSON format).
+        dict: Query parameters for the FDSN event endpoint.
     """
-    dag_conf = context.get("dag_run").conf or {}
+    dag_run = context.get("dag_run")
+    dag_conf = (dag_run.conf if dag_run else None) or {}
 
     start_date = dag_conf.get("start_date")
     end_date = dag_conf.get("end_date")
-    min_magnitude = float(dag_conf.get("min_magnitude", 4.5))
+    min_magnitude = float(dag_conf.get("min_magnitude", context.get("min_magnitude", 4.5)))
     # Use default if no dates are passed
     if not start_date or not end_date:
         end = datetime.utcnow()
-        start = end - timedelta(days=7)
+        start = end - timedelta(days=int(context.get("days_back", 7)))
         start_date = start.strftime('%Y-%m-%d')
         end_date = end.strftime('%Y-%m-%d')
 
-    url = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-    params = {
+    return {
         "format": "geojson",
         "starttime": start_date,
         "endtime": end_date,
         "minmagnitude": min_magnitude
     }
 
-    logger.info(f"Fetching earthquake data from {start_date} to {end_date}...")
-    response = requests.get(url, params=params)
+
+def fetch_earthquake_data(**context):
+    """
+    Fetch earthquake data from USGS Earthquake API with configurable date range and magnitude
+    Returns:
+        dict: Parsed JSON response (GeoJSON format).
+    """
+    params = build_query_params(**context)
+
+    logger.info(f"Fetching earthquake data from {params['starttime']} to {params['endtime']}...")
+    response = requests.get(USGS_BASE_URL, params=params)
     response.raise_for_status()
     logger.info(f"Successfully fetched data.")
     return response.json()
 
 
-def insert_earthquake_data(data: Dict, cursor) -> None:
+def iter_geojson_features(chunks: Iterable[bytes]) -> Iterator[Dict]:
     """
-    Insert parsed earthquake records into Postgres.
+    Incrementally parse the "features" array of a GeoJSON FeatureCollection.
+    Only the current chunk and the feature being decoded are held in memory.
+    Args:
+        chunks (iterable): Raw response body as byte chunks.
+    Yields:
+        dict: One GeoJSON feature at a time.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_features = False
+    chunks = iter(chunks)
+    exhausted = False
+
+    while True:
+        if not exhausted:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                buffer += utf8.decode(b"", final=True)
+            else:
+                buffer += utf8.decode(chunk)
+
+        if not in_features:
+            # USGS emits "features" as a top-level key right after "metadata".
+            key_pos = buffer.find('"features"')
+            start = buffer.find("[", key_pos) if key_pos != -1 else -1
+            if start == -1:
+                if exhausted:
+                    return
+                # Keep a tail in case the key is split across chunks.
+                buffer = buffer[-len('"features"'):] if key_pos == -1 else buffer[key_pos:]
+                continue
+            buffer = buffer[start + 1:]
+            in_features = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos >= len(buffer):
+                break
+            try:
+                feature, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+                break  # Feature continues in the next chunk
+            yield feature
+        buffer = buffer[pos:]
+
+        if exhausted:
+            raise ValueError("Truncated GeoJSON payload: features array was not closed")
+
+
+def stream_earthquake_features(**context) -> Iterator[Dict]:
+    """
+    Stream earthquake features from the USGS API without materializing the payload.
+    Yields:
+        dict: One GeoJSON feature at a time.
+    """
+    params = build_query_params(**context)
+
+    logger.info(f"Streaming earthquake data from {params['starttime']} to {params['endtime']}...")
+    yield from stream_query_features(params)
+
+
+def stream_query_features(params: Dict) -> Iterator[Dict]:
+    """
+    Stream features for an explicit set of USGS query parameters.
+    """
+    with requests.get(USGS_BASE_URL, params=params, stream=True) as response:
+        response.raise_for_status()
+        yield from iter_geojson_features(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+
+
+def file_sha256(path: str) -> str:
+    """
+    Compute the SHA-256 hex digest of a file without reading it into memory.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_staging_file(features: Iterable[Dict], path: str) -> Dict:
+    """
+    Write GeoJSON features to a gzipped, line-delimited JSON staging file.
+    The file is written under a temporary name and renamed once complete.
+    Args:
+        features (iterable): GeoJSON features.
+        path (str): Destination path (conventionally *.ndjson.gz).
+    Returns:
+        dict: {"path", "sha256", "content_sha256", "count"} describing the staged file.
+        sha256 covers the file on disk; content_sha256 covers the uncompressed
+        features only, so it is stable across gzip headers and USGS metadata.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    content_digest = hashlib.sha256()
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for feature in features:
+            line = json.dumps(feature) + "\n"
+            f.write(line)
+            content_digest.update(line.encode("utf-8"))
+            count += 1
+    os.replace(tmp_path, path)
+
+    logger.info(f"Staged {count} features to {path}.")
+    return {
+        "path": path,
+        "sha256": file_sha256(path),
+        "content_sha256": content_digest.hexdigest(),
+        "count": count,
+    }
+
+
+def read_staging_file(path: str, sha256: str = None) -> Iterator[Dict]:
+    """
+    Stream GeoJSON features back from a staging file written by write_staging_file.
+    Args:
+        path (str): Staging file path.
+        sha256 (str): Expected checksum; verified before any feature is yielded.
+    Yields:
+        dict: One GeoJSON feature at a time.
+    """
+    if sha256 is not None and file_sha256(path) != sha256:
+        raise ValueError(f"Checksum mismatch for staging file {path}")
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def fetch_cache_key(params: Dict) -> str:
+    """
+    Cache key for a USGS query: a hash of its normalized parameters.
+    Incremental queries (those with updatedafter) drop updatedafter and
+    starttime, which move with the watermark on every run, so successive
+    scheduled runs share one entry. That is safe because a hit still needs a
+    304 or a body hashing to the content that was last loaded.
+    """
+    normalized = {str(k).lower(): str(v) for k, v in params.items()}
+    if "updatedafter" in normalized:
+        normalized = {k: v for k, v in normalized.items() if k not in INCREMENTAL_CACHE_IGNORED_PARAMS}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _fetch_cache_path(key: str) -> str:
+    return os.path.join(FETCH_CACHE_DIR, f"{key}.json")
+
+
+def read_fetch_cache_entry(key: str) -> Optional[Dict]:
+    """
+    Read the cache entry for a query key, or None if it has never been fetched.
+    """
+    try:
+        with open(_fetch_cache_path(key), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_fetch_cache_entry(key: str, entry: Dict) -> None:
+    os.makedirs(FETCH_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_fetch_cache_path(key)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, _fetch_cache_path(key))
+
+
+def _count_fetch_cache_result(key: str, hit: bool) -> None:
+    # One short O_APPEND write per result: concurrent workers never lose a count
+    os.makedirs(FETCH_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(FETCH_CACHE_DIR, FETCH_CACHE_STATS_FILE), "a", encoding="utf-8") as f:
+        f.write(f"{'hit' if hit else 'miss'} {key}\n")
+
+
+def fetch_cache_stats() -> Dict:
+    """
+    Aggregate the fetch cache hit/miss log and count the stored entries.
+    Reads the whole cache directory, so call it on demand, not per fetch.
+    Returns:
+        dict: {"entries", "hits", "misses"}.
+    """
+    stats = {"entries": 0, "hits": 0, "misses": 0}
+    if not os.path.isdir(FETCH_CACHE_DIR):
+        return stats
+    stats["entries"] = sum(1 for name in os.listdir(FETCH_CACHE_DIR) if name.endswith(".json"))
+    try:
+        with open(os.path.join(FETCH_CACHE_DIR, FETCH_CACHE_STATS_FILE), encoding="utf-8") as f:
+            for line in f:
+                result = line.split(" ", 1)[0]
+                if result == "hit":
+                    stats["hits"] += 1
+                elif result == "miss":
+                    stats["misses"] += 1
+    except FileNotFoundError:
+        pass
+    return stats
+
+
+def mark_fetch_cache_loaded(cache_info: Dict) -> None:
+    """
+    Record that the content described by cache_info has been committed to Postgres.
+    Only loaded content can short-circuit later fetches.
+    Args:
+        cache_info (dict): The "cache" dict returned by fetch_to_staging_file.
+    """
+    entry = read_fetch_cache_entry(cache_info["key"]) or {}
+    entry.update(cache_info)
+    entry["loaded"] = True
+    entry["loaded_at"] = datetime.utcnow().isoformat()
+    _write_fetch_cache_entry(cache_info["key"], entry)
+
+
+def fetch_to_staging_file(params: Dict, path: str, use_cache: bool = True) -> Dict:
+    """
+    Fetch a USGS query into a staging file, skipping content that is already loaded.
+    A conditional request (If-None-Match / If-Modified-Since) is sent when a
+    previous response was loaded; a 304, or a body whose features hash to the
+    same content as last time, is reported as unchanged and nothing is staged.
+    Args:
+        params (dict): USGS query parameters.
+        path (str): Staging file destination.
+        use_cache (bool): Set to False to always download and load.
+    Returns:
+        dict: write_staging_file metadata plus "cache" info, or
+        {"unchanged": True, "count": 0} when there is nothing new to load.
+    """
+    key = fetch_cache_key(params)
+    entry = read_fetch_cache_entry(key) if use_cache else None
+    loaded = bool(entry and entry.get("loaded"))
+
+    headers = {}
+    if loaded and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if loaded and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    with requests.get(USGS_BASE_URL, params=params, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            _count_fetch_cache_result(key, hit=True)
+            logger.info("USGS returned 304 Not Modified; skipping load.")
+            return {"unchanged": True, "count": 0}
+        response.raise_for_status()
+        staged = write_staging_file(iter_geojson_features(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)), path)
+        cache_info = {
+            "key": key,
+            "params": params,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_sha256": staged["content_sha256"],
+        }
+
+    if not use_cache:
+        staged["cache"] = cache_info
+        return staged
+
+    if loaded and entry.get("content_sha256") == staged["content_sha256"]:
+        _count_fetch_cache_result(key, hit=True)
+        os.remove(path)
+        logger.info("USGS content unchanged since last load; skipping.")
+        return {"unchanged": True, "count": 0}
+
+    _count_fetch_cache_result(key, hit=False)
+    staged["cache"] = cache_info
+    return staged
+
+
+# Promoted GeoJSON properties added as hot columns after the table was first created
+PROMOTED_COLUMN_TYPES = (
+    ("event_type", "TEXT"),
+    ("sig", "INTEGER"),
+    ("tsunami", "INTEGER"),
+    ("mag_type", "TEXT"),
+)
+
+# Columns ensure_raw_table adds to tables created by older versions
+ADDED_COLUMN_TYPES = PROMOTED_COLUMN_TYPES + (
+    # Bumped whenever a row's hot columns change; the incremental dbt staging model reads it
+    ("loaded_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+)
+
+
+def ensure_raw_table(cursor) -> None:
+    """
+    Create the raw_data schema and the month-partitioned raw_earthquakes table.
+    Run once per DAG run / CLI invocation, not per load. A pre-existing
+    unpartitioned raw_earthquakes table is migrated in place.
     Args:
-        data (dict): USGS API data.
         cursor: Active psycopg2 cursor.
     """
     logger.info("Ensuring raw_earthquakes table exists...")
     # Create schema if it doesn't exist
     cursor.execute("CREATE SCHEMA IF NOT EXISTS raw_data")
-    # Create table inside the raw_data schema
+
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS raw_data.raw_earthquakes (
+        SELECT c.relkind
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'raw_data' AND c.relname = 'raw_earthquakes'
+    """)
+    row = cursor.fetchone()
+    if row is None or row[0] != "p":
+        _create_partitioned_raw_table(cursor, legacy=row is not None)
+
+    # ALTER TABLE takes an ACCESS EXCLUSIVE lock even when the column exists,
+    # so only columns that are actually missing are added
+    cursor.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'raw_data' AND table_name = 'raw_earthquakes'
+    """)
+    existing = {column for (column,) in cursor.fetchall()}
+    for column, column_type in ADDED_COLUMN_TYPES:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE raw_data.raw_earthquakes ADD COLUMN IF NOT EXISTS {column} {column_type}")
+
+    # Serves ORDER BY time, id and keyset pagination in the API; cascades to every partition
+    cursor.execute("CREATE INDEX IF NOT EXISTS raw_earthquakes_time_id_idx ON raw_data.raw_earthquakes (time, id)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS raw_data.raw_earthquake_payloads (
             id TEXT PRIMARY KEY,
-            time TIMESTAMP,
+            updated TIMESTAMP,
+            payload JSONB,
+            payload_zlib BYTEA
+        );
+    """)
+
+
+def _create_partitioned_raw_table(cursor, legacy: bool) -> None:
+    """
+    Create the partitioned raw_earthquakes table, migrating a legacy heap table if present.
+    """
+    if legacy:
+        logger.info("Migrating raw_earthquakes to a month-partitioned table...")
+        # Tables created before revision tracking lack the USGS `updated` column
+        cursor.execute("ALTER TABLE raw_data.raw_earthquakes ADD COLUMN IF NOT EXISTS updated TIMESTAMP")
+        cursor.execute("ALTER TABLE raw_data.raw_earthquakes RENAME TO raw_earthquakes_unpartitioned")
+        cursor.execute("ALTER INDEX IF EXISTS raw_data.raw_earthquakes_pkey RENAME TO raw_earthquakes_unpartitioned_pkey")
+
+    # Partition key must be part of the primary key, so events are keyed on (id, time)
+    cursor.execute("""
+        CREATE TABLE raw_data.raw_earthquakes (
+            id TEXT NOT NULL,
+            time TIMESTAMP NOT NULL,
             place TEXT,
             magnitude FLOAT,
             longitude FLOAT,
@@ -81,44 +511,820 @@ def insert_earthquake_data(data: Dict, cursor) -> None:
             depth_km FLOAT,
             url TEXT,
             raw_json JSONB,
-            inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+            inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated TIMESTAMP,
+            PRIMARY KEY (id, time)
+        ) PARTITION BY RANGE (time);
     """)
 
-    insert_query = """
-        INSERT INTO raw_data.raw_earthquakes (
-            id, time, place, magnitude, longitude, latitude, depth_km, url, raw_json
-        )
-        VALUES (
-            %s, to_timestamp(%s / 1000), %s, %s, %s, %s, %s, %s, %s
+    if legacy:
+        cursor.execute("SELECT COUNT(*) FROM raw_data.raw_earthquakes_unpartitioned")
+        total = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT DISTINCT date_trunc('month', time)
+            FROM raw_data.raw_earthquakes_unpartitioned
+            WHERE time IS NOT NULL
+        """)
+        ensure_month_partitions(cursor, [month for (month,) in cursor.fetchall()])
+        cursor.execute("""
+            INSERT INTO raw_data.raw_earthquakes (
+                id, time, place, magnitude, longitude, latitude, depth_km, url, raw_json, inserted_at, updated
+            )
+            SELECT id, time, place, magnitude, longitude, latitude, depth_km, url, raw_json, inserted_at, updated
+            FROM raw_data.raw_earthquakes_unpartitioned
+            WHERE time IS NOT NULL
+        """)
+        migrated = cursor.rowcount
+        logger.info(f"Migrated {migrated} rows into the partitioned table.")
+
+        # Rows without a time have no partition; keep them aside instead of dropping them
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS raw_data.raw_earthquakes_null_time
+            (LIKE raw_data.raw_earthquakes_unpartitioned)
+        """)
+        cursor.execute("""
+            INSERT INTO raw_data.raw_earthquakes_null_time
+            SELECT * FROM raw_data.raw_earthquakes_unpartitioned
+            WHERE time IS NULL
+        """)
+        quarantined = cursor.rowcount
+        if quarantined:
+            logger.warning(f"Moved {quarantined} rows without a time to raw_data.raw_earthquakes_null_time.")
+
+        if migrated + quarantined != total:
+            raise RuntimeError(
+                f"Legacy migration accounted for {migrated + quarantined} of {total} rows; "
+                "keeping raw_earthquakes_unpartitioned"
+            )
+        cursor.execute("DROP TABLE raw_data.raw_earthquakes_unpartitioned")
+
+
+def _partition_name(month: datetime) -> str:
+    return f"raw_earthquakes_p{month:%Y_%m}"
+
+
+def ensure_month_partitions(cursor, months: Iterable[datetime]) -> None:
+    """
+    Create monthly partitions of raw_earthquakes that don't exist yet.
+    Attached partitions are read from the catalog on every call rather than
+    cached, so a partition detached or dropped elsewhere, or created in a
+    rolled-back transaction, is never mistaken for a live one. DDL is only
+    issued for months that are missing.
+    Args:
+        cursor: Active psycopg2 cursor.
+        months (iterable): Any timestamps; each one's calendar month is ensured.
+    """
+    months = list(months)
+    if not months:
+        return
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'raw_data.raw_earthquakes'::regclass
+    """)
+    attached = {name for (name,) in cursor.fetchall()}
+    for month in months:
+        month_start = datetime(month.year, month.month, 1)
+        name = _partition_name(month_start)
+        if name in attached:
+            continue
+        cursor.execute("SELECT to_regclass(%s)", (f"raw_data.{name}",))
+        if cursor.fetchone()[0] is not None:
+            # CREATE TABLE IF NOT EXISTS would skip it and the insert would find no partition
+            raise RuntimeError(
+                f"raw_data.{name} exists but is detached from raw_earthquakes; "
+                "re-attach or drop it before loading that month"
+            )
+        month_end = datetime(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS raw_data.{name}
+            PARTITION OF raw_data.raw_earthquakes
+            FOR VALUES FROM (%s) TO (%s)
+        """, (month_start, month_end))
+        attached.add(name)
+
+
+def ensure_partitions_for_range(cursor, start: datetime, end: datetime) -> None:
+    """
+    Create every monthly partition covering [start, end].
+    Backfills call this up front so concurrent workers never issue partition DDL.
+    """
+    months = []
+    month = datetime(start.year, start.month, 1)
+    while month <= end:
+        months.append(month)
+        month = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+    ensure_month_partitions(cursor, months)
+
+
+def detach_partitions_before(cursor, before: datetime) -> List[str]:
+    """
+    Detach monthly partitions that end on or before `before`.
+    Detached partitions become standalone tables in raw_data that can be
+    archived (e.g. pg_dump -t) and dropped without touching live data.
+    Args:
+        cursor: Active psycopg2 cursor.
+        before (datetime): Partitions for months before this one are detached.
+    Returns:
+        list: Names of the detached tables.
+    """
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace n ON n.oid = parent.relnamespace
+        WHERE n.nspname = 'raw_data' AND parent.relname = 'raw_earthquakes'
+        ORDER BY child.relname
+    """)
+    cutoff = _partition_name(datetime(before.year, before.month, 1))
+    detached = []
+    for (name,) in cursor.fetchall():
+        if name.startswith("raw_earthquakes_p") and name < cutoff:
+            cursor.execute(f"ALTER TABLE raw_data.raw_earthquakes DETACH PARTITION raw_data.{name}")
+            detached.append(name)
+    logger.info(f"Detached {len(detached)} partitions before {cutoff}.")
+    return detached
+
+
+def compact_raw_json(cursor, batch_size: int = COPY_BATCH_SIZE, storage: str = None) -> int:
+    """
+    Move raw_json of already-loaded events out of the hot table.
+    Fills the promoted columns from the stored feature, writes the payload to
+    raw_data.raw_earthquake_payloads in the given storage mode and clears the
+    hot raw_json. Commit per call; a VACUUM FULL (or pg_repack) of the
+    raw_earthquakes partitions afterwards returns the freed TOAST space.
+    Args:
+        cursor: Active psycopg2 cursor.
+        batch_size (int): Rows rewritten per round trip.
+        storage (str): Cold storage mode; defaults to RAW_JSON_STORAGE.
+    Returns:
+        int: Number of events compacted.
+    """
+    storage = storage or RAW_JSON_STORAGE
+    if storage == "inline":
+        raise ValueError("compact_raw_json needs a cold RAW_JSON_STORAGE mode")
+
+    compacted = 0
+    while True:
+        cursor.execute("""
+            SELECT id, time, updated, raw_json
+            FROM raw_data.raw_earthquakes
+            WHERE raw_json IS NOT NULL
+            LIMIT %s
+        """, (batch_size,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        payloads = []
+        promoted = []
+        for event_id, event_time, updated, feature in rows:
+            props = feature.get("properties") or {}
+            payloads.append((event_id, updated) + _payload_columns(feature, storage))
+            promoted.append((event_id, event_time, props.get("type"), props.get("sig"),
+                             props.get("tsunami"), props.get("magType")))
+
+        execute_values(cursor, """
+            INSERT INTO raw_data.raw_earthquake_payloads (id, updated, payload, payload_zlib)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                updated = EXCLUDED.updated,
+                payload = EXCLUDED.payload,
+                payload_zlib = EXCLUDED.payload_zlib
+            WHERE raw_data.raw_earthquake_payloads.updated IS NULL
+                OR EXCLUDED.updated > raw_data.raw_earthquake_payloads.updated
+        """, payloads, template="(%s, %s, %s::jsonb, %s)")
+        execute_values(cursor, """
+            UPDATE raw_data.raw_earthquakes r SET
+                event_type = COALESCE(r.event_type, v.event_type),
+                sig = COALESCE(r.sig, v.sig::integer),
+                tsunami = COALESCE(r.tsunami, v.tsunami::integer),
+                mag_type = COALESCE(r.mag_type, v.mag_type),
+                raw_json = NULL,
+                loaded_at = CURRENT_TIMESTAMP
+            FROM (VALUES %s) AS v (id, time, event_type, sig, tsunami, mag_type)
+            WHERE r.id = v.id AND r.time = v.time
+        """, promoted)
+        compacted += len(rows)
+        logger.info(f"Compacted {compacted} events so far...")
+
+    logger.info(f"Compacted raw_json of {compacted} events into raw_earthquake_payloads.")
+    return compacted
+
+
+# Existing events are only overwritten by a strictly newer USGS revision.
+REVISION_CONFLICT_CLAUSE = """
+    ON CONFLICT (id, time) DO UPDATE SET
+        updated = EXCLUDED.updated,
+        place = EXCLUDED.place,
+        magnitude = EXCLUDED.magnitude,
+        longitude = EXCLUDED.longitude,
+        latitude = EXCLUDED.latitude,
+        depth_km = EXCLUDED.depth_km,
+        url = EXCLUDED.url,
+        event_type = EXCLUDED.event_type,
+        sig = EXCLUDED.sig,
+        tsunami = EXCLUDED.tsunami,
+        mag_type = EXCLUDED.mag_type,
+        raw_json = EXCLUDED.raw_json,
+        loaded_at = CURRENT_TIMESTAMP
+    WHERE raw_data.raw_earthquakes.updated IS NULL
+        OR EXCLUDED.updated > raw_data.raw_earthquakes.updated
+"""
+
+
+def insert_earthquake_data(data: Dict, cursor) -> LoadResult:
+    """
+    Insert parsed earthquake records into Postgres.
+    Kept for existing callers; delegates to bulk_insert_earthquake_data.
+    Callers run ensure_raw_table once beforehand.
+    Args:
+        data (dict): USGS API data.
+        cursor: Active psycopg2 cursor.
+    """
+    return bulk_insert_earthquake_data(data, cursor)
+
+
+def prune_feature(feature: Dict) -> Dict:
+    """
+    Drop the parts of a GeoJSON feature that are already stored as hot columns
+    (id, coordinates and PROMOTED_PROPERTIES), keeping everything else.
+    """
+    props = feature.get("properties") or {}
+    return {"properties": {k: v for k, v in props.items() if k not in PROMOTED_PROPERTIES}}
+
+
+def _payload_columns(feature: Dict, storage: str) -> Tuple:
+    """
+    Encode the raw payload for a storage mode as (raw_json, payload_zlib).
+    """
+    if storage in ("inline", "cold"):
+        return json.dumps(feature), None
+    pruned = json.dumps(prune_feature(feature), separators=(",", ":"))
+    if storage == "cold_pruned":
+        return pruned, None
+    return None, zlib.compress(pruned.encode("utf-8"))
+
+
+def _feature_to_row(feature: Dict, storage: str = None) -> Tuple:
+    """
+    Flatten a GeoJSON feature into a staging row (column order of STAGE_COLUMNS).
+    """
+    props = feature.get("properties") or {}
+    geom = feature.get("geometry") or {}
+    coordinates = geom.get("coordinates") or [None, None, None]
+    coordinates = list(coordinates) + [None] * (3 - len(coordinates))
+
+    return (
+        feature.get("id"),
+        props.get("time"),
+        props.get("updated"),
+        props.get("place"),
+        props.get("mag"),
+        coordinates[0],  # longitude
+        coordinates[1],  # latitude
+        coordinates[2],  # depth
+        props.get("url"),
+        props.get("type"),
+        props.get("sig"),
+        props.get("tsunami"),
+        props.get("magType"),
+    ) + _payload_columns(feature, storage or RAW_JSON_STORAGE)
+
+
+def _copy_field(value) -> str:
+    """
+    Encode a single value for COPY ... FROM STDIN (text format).
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        # bytea hex input; the backslash itself is escaped for COPY
+        return "\\\\x" + value.hex()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _ensure_stage_table(cursor) -> None:
+    """
+    Create the session-local staging table used by the COPY loader.
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS raw_earthquakes_stage (
+            id TEXT,
+            time_ms BIGINT,
+            updated_ms BIGINT,
+            place TEXT,
+            magnitude FLOAT,
+            longitude FLOAT,
+            latitude FLOAT,
+            depth_km FLOAT,
+            url TEXT,
+            event_type TEXT,
+            sig INTEGER,
+            tsunami INTEGER,
+            mag_type TEXT,
+            raw_json JSONB,
+            payload_zlib BYTEA
+        ) ON COMMIT DROP;
+    """)
+
+
+def _copy_and_merge(rows: List[Tuple], cursor) -> Tuple[int, int]:
+    """
+    COPY one batch of rows into the staging table and merge it into raw_earthquakes.
+    Returns:
+        tuple: (inserted, updated) row counts.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor.execute("TRUNCATE raw_earthquakes_stage")
+    cursor.copy_expert(
+        f"COPY raw_earthquakes_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN",
+        buffer,
+    )
+
+    cursor.execute("""
+        SELECT DISTINCT date_trunc('month', to_timestamp(time_ms / 1000)::timestamp)
+        FROM raw_earthquakes_stage
+        WHERE time_ms IS NOT NULL
+    """)
+    ensure_month_partitions(cursor, [month for (month,) in cursor.fetchall()])
+
+    # A revision that moves an event's time changes its partition key:
+    # drop the stale row so the newer one is inserted in the right partition.
+    cursor.execute("""
+        DELETE FROM raw_data.raw_earthquakes r
+        USING raw_earthquakes_stage s
+        WHERE r.id = s.id
+            AND r.time <> to_timestamp(s.time_ms / 1000)
+            AND (r.updated IS NULL OR to_timestamp(s.updated_ms / 1000.0) > r.updated)
+    """)
+    moved = cursor.rowcount
+
+    # DISTINCT ON keeps the newest revision when a batch holds the same id twice.
+    # A row left under the same id at another time survived the DELETE, so it is at
+    # least as new: the incoming revision is stale and must not add a second row.
+    # All CTEs share one snapshot, so the final join reflects the table before the
+    # upsert (xmax can't be read back from a partitioned table).
+    cursor.execute("""
+        WITH latest AS (
+            SELECT DISTINCT ON (s.id)
+                s.id, to_timestamp(s.time_ms / 1000)::timestamp AS time,
+                to_timestamp(s.updated_ms / 1000.0) AS updated,
+                s.place, s.magnitude, s.longitude, s.latitude, s.depth_km, s.url,
+                s.event_type, s.sig, s.tsunami, s.mag_type,
+                CASE WHEN %(inline)s THEN s.raw_json END AS raw_json
+            FROM raw_earthquakes_stage s
+            WHERE s.time_ms IS NOT NULL
+            ORDER BY s.id, s.updated_ms DESC NULLS LAST
+        ),
+        incoming AS (
+            SELECT l.*
+            FROM latest l
+            WHERE NOT EXISTS (
+                SELECT 1 FROM raw_data.raw_earthquakes r
+                WHERE r.id = l.id AND r.time <> l.time
+            )
+        ),
+        merged AS (
+            INSERT INTO raw_data.raw_earthquakes (
+                id, time, updated, place, magnitude, longitude, latitude, depth_km, url,
+                event_type, sig, tsunami, mag_type, raw_json
+            )
+            SELECT
+                id, time, updated, place, magnitude, longitude, latitude, depth_km, url,
+                event_type, sig, tsunami, mag_type, raw_json
+            FROM incoming
+    """ + REVISION_CONFLICT_CLAUSE + """
+            RETURNING id, time
         )
-        ON CONFLICT (id) DO NOTHING
+        SELECT
+            COUNT(*) FILTER (WHERE r.id IS NULL),
+            COUNT(*) FILTER (WHERE r.id IS NOT NULL)
+        FROM merged m
+        LEFT JOIN raw_data.raw_earthquakes r ON r.id = m.id AND r.time = m.time
+    """, {"inline": RAW_JSON_STORAGE == "inline"})
+    inserted, updated = cursor.fetchone()
+
+    if RAW_JSON_STORAGE != "inline":
+        cursor.execute("""
+            INSERT INTO raw_data.raw_earthquake_payloads (id, updated, payload, payload_zlib)
+            SELECT DISTINCT ON (id) id, to_timestamp(updated_ms / 1000.0), raw_json, payload_zlib
+            FROM raw_earthquakes_stage
+            WHERE time_ms IS NOT NULL
+            ORDER BY id, updated_ms DESC NULLS LAST
+            ON CONFLICT (id) DO UPDATE SET
+                updated = EXCLUDED.updated,
+                payload = EXCLUDED.payload,
+                payload_zlib = EXCLUDED.payload_zlib
+            WHERE raw_data.raw_earthquake_payloads.updated IS NULL
+                OR EXCLUDED.updated > raw_data.raw_earthquake_payloads.updated
+        """)
+
+    return inserted - moved, updated + moved
+
+
+def load_earthquake_rows(rows: Iterable[Tuple], cursor, batch_size: int = COPY_BATCH_SIZE) -> LoadResult:
+    """
+    Bulk load staging rows into Postgres via COPY and a set-based merge.
+    New ids are inserted; existing ids are updated only when the incoming
+    USGS `updated` timestamp is newer, otherwise they are skipped.
+    Args:
+        rows (iterable): Rows as produced by _feature_to_row.
+        cursor: Active psycopg2 cursor.
+        batch_size (int): Rows per COPY batch.
+    Returns:
+        LoadResult: Inserted, updated and skipped counts.
     """
+    _ensure_stage_table(cursor)
 
-    logger.info("Inserting earthquake records into Postgres...")
-    count = 0
-    for feature in data.get("features", []):
-        props = feature.get("properties", {})
-        geom = feature.get("geometry", {})
-        coordinates = geom.get("coordinates", [None, None, None])
-        quake_id = feature.get("id", None)
-
-        values = (
-            quake_id,
-            props.get("time"),
-            props.get("place"),
-            props.get("mag"),
-            coordinates[0],  # longitude
-            coordinates[1],  # latitude
-            coordinates[2],  # depth
-            props.get("url"),
-            Json(feature)
+    inserted = 0
+    updated = 0
+    total = 0
+    max_updated_ms = None
+    batch: List[Tuple] = []
+
+    def flush() -> None:
+        nonlocal inserted, updated, total
+        batch_inserted, batch_updated = _copy_and_merge(batch, cursor)
+        inserted += batch_inserted
+        updated += batch_updated
+        total += len(batch)
+
+    for row in rows:
+        row_updated_ms = row[2]
+        if row_updated_ms is not None and (max_updated_ms is None or row_updated_ms > max_updated_ms):
+            max_updated_ms = row_updated_ms
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+
+    if inserted or updated:
+        notify_ingest(cursor, inserted, updated)
+    return LoadResult(inserted, updated, total - inserted - updated, max_updated_ms)
+
+
+def notify_ingest(cursor, inserted: int, updated: int) -> None:
+    """
+    Signal INGEST_NOTIFY_CHANNEL that raw_earthquakes changed.
+    Postgres delivers the notification only when the surrounding transaction
+    commits, so listeners (the API freshness cache) never see rolled-back loads.
+    """
+    payload = json.dumps({"inserted": inserted, "updated": updated})
+    cursor.execute("SELECT pg_notify(%s, %s)", (INGEST_NOTIFY_CHANNEL, payload))
+
+
+def bulk_insert_earthquake_data(data: Dict, cursor, batch_size: int = COPY_BATCH_SIZE) -> LoadResult:
+    """
+    Insert parsed earthquake records into Postgres using COPY.
+    Args:
+        data (dict): USGS API data.
+        cursor: Active psycopg2 cursor.
+        batch_size (int): Rows per COPY batch.
+    Returns:
+        LoadResult: Inserted, updated and skipped counts.
+    """
+    logger.info("Bulk loading earthquake records into Postgres...")
+    rows = (_feature_to_row(feature) for feature in data.get("features", []))
+    result = load_earthquake_rows(rows, cursor, batch_size=batch_size)
+
+    logger.info(f"{result.inserted} records inserted, {result.updated} updated, {result.skipped} skipped (unchanged).")
+    return result
+
+
+def stream_insert_earthquake_data(features: Iterable[Dict], cursor, batch_size: int = COPY_BATCH_SIZE) -> LoadResult:
+    """
+    Load a stream of GeoJSON features into Postgres in fixed-size COPY batches.
+    Peak memory is bounded by batch_size regardless of how many features arrive.
+    Args:
+        features (iterable): GeoJSON features, e.g. from stream_earthquake_features.
+        cursor: Active psycopg2 cursor.
+        batch_size (int): Rows per COPY batch.
+    Returns:
+        LoadResult: Inserted, updated and skipped counts.
+    """
+    logger.info("Streaming earthquake records into Postgres...")
+    rows = (_feature_to_row(feature) for feature in features)
+    result = load_earthquake_rows(rows, cursor, batch_size=batch_size)
+
+    logger.info(f"{result.inserted} records inserted, {result.updated} updated, {result.skipped} skipped (unchanged).")
+    return result
+
+
+def ensure_watermark_table(cursor) -> None:
+    """
+    Create the table holding per-stream ingestion high-water marks.
+    Args:
+        cursor: Active psycopg2 cursor.
+    """
+    cursor.execute("CREATE SCHEMA IF NOT EXISTS raw_data")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS raw_data.ingest_watermarks (
+            name TEXT PRIMARY KEY,
+            high_water_mark TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def watermark_name(min_magnitude: float) -> str:
+    """Name of the watermark tracking incremental runs for a magnitude threshold."""
+    return f"usgs_events_min_mag_{min_magnitude}"
+
+
+def get_watermark(cursor, name: str) -> Optional[datetime]:
+    """
+    Read a high-water mark (UTC, naive), or None if the stream has never run.
+    """
+    cursor.execute("SELECT high_water_mark FROM raw_data.ingest_watermarks WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(cursor, name: str, max_updated_ms: int) -> None:
+    """
+    Advance a high-water mark to the newest USGS `updated` value loaded.
+    The mark never moves backwards.
+    """
+    value = datetime.utcfromtimestamp(max_updated_ms / 1000)
+    cursor.execute("""
+        INSERT INTO raw_data.ingest_watermarks (name, high_water_mark)
+        VALUES (%s, %s)
+        ON CONFLICT (name) DO UPDATE SET
+            high_water_mark = GREATEST(raw_data.ingest_watermarks.high_water_mark, EXCLUDED.high_water_mark),
+            updated_at = CURRENT_TIMESTAMP
+    """, (name, value))
+    logger.info(f"Watermark {name} advanced to {value.isoformat()}.")
+
+
+def build_incremental_params(cursor, **context) -> Tuple[Dict, Optional[str]]:
+    """
+    Build USGS query parameters for an incremental run.
+    Runs with explicit start/end dates are fetched as-is. Otherwise, once a
+    watermark exists, only events updated after it are requested.
+    Watermarked queries are sized with the count method first: USGS silently
+    truncates results past USGS_MAX_EVENTS, and loading a truncated page would
+    advance the watermark past events that were never fetched.
+    Args:
+        cursor: Active psycopg2 cursor.
+    Returns:
+        tuple: (query params, watermark name to advance after loading or None).
+    Raises:
+        RuntimeError: If the query would return more than USGS_MAX_EVENTS events.
+    """
+    params = build_query_params(**context)
+    dag_run = context.get("dag_run")
+    dag_conf = (dag_run.conf if dag_run else None) or {}
+    if dag_conf.get("start_date") and dag_conf.get("end_date"):
+        return params, None
+
+    ensure_watermark_table(cursor)
+    name = watermark_name(params["minmagnitude"])
+    high_water_mark = get_watermark(cursor, name)
+    if high_water_mark is None:
+        logger.info(f"No watermark {name} yet; fetching the default window.")
+    else:
+        lookback = high_water_mark - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+        params = {
+            "format": "geojson",
+            "updatedafter": high_water_mark.isoformat(timespec="milliseconds"),
+            "starttime": lookback.strftime('%Y-%m-%d'),
+            "minmagnitude": params["minmagnitude"]
+        }
+
+    count = count_query(params)
+    if count > USGS_MAX_EVENTS:
+        raise RuntimeError(
+            f"Incremental query {params} matches {count} events, over the USGS limit of {USGS_MAX_EVENTS}; "
+            f"not loading a truncated result. Backfill the range or raise the minimum magnitude."
         )
+    return params, name
+
+
+def count_earthquakes(start: datetime, end: datetime, min_magnitude: float) -> int:
+    """
+    Ask the USGS count method how many events a query window would return.
+    Args:
+        start (datetime): Window start (inclusive).
+        end (datetime): Window end.
+        min_magnitude (float): Minimum magnitude.
+    Returns:
+        int: Number of matching events.
+    """
+    return count_query({
+        "format": "geojson",
+        "starttime": start.isoformat(),
+        "endtime": end.isoformat(),
+        "minmagnitude": min_magnitude
+    })
+
+
+def count_query(params: Dict) -> int:
+    """
+    Ask the USGS count method how many events a query would return.
+    Args:
+        params (dict): Query parameters for the FDSN event endpoint.
+    Returns:
+        int: Number of matching events.
+    """
+    count_url = USGS_BASE_URL.rsplit("/", 1)[0] + "/count"
+    response = requests.get(count_url, params={**params, "format": "geojson"})
+    response.raise_for_status()
+    return int(response.json()["count"])
+
+
+def ensure_checkpoint_table(cursor) -> None:
+    """
+    Create the table that records completed backfill windows.
+    Args:
+        cursor: Active psycopg2 cursor.
+    """
+    cursor.execute("CREATE SCHEMA IF NOT EXISTS raw_data")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS raw_data.backfill_checkpoints (
+            window_start TIMESTAMP NOT NULL,
+            window_end TIMESTAMP NOT NULL,
+            min_magnitude FLOAT NOT NULL,
+            event_count INTEGER,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (window_start, window_end, min_magnitude)
+        );
+    """)
 
-        cursor.execute(insert_query, values)
-        count += 1
 
-    logger.info(f"{count} records processed and inserted (or skipped if already present).")
+def _completed_windows(cursor, start: datetime, end: datetime, min_magnitude: float) -> set:
+    cursor.execute("""
+        SELECT window_start, window_end
+        FROM raw_data.backfill_checkpoints
+        WHERE min_magnitude = %s AND window_start >= %s AND window_end <= %s
+    """, (min_magnitude, start, end))
+    return set(cursor.fetchall())
+
+
+def plan_backfill_windows(
+    start: datetime,
+    end: datetime,
+    min_magnitude: float,
+    window_days: int = BACKFILL_WINDOW_DAYS,
+    completed: set = frozenset(),
+    max_events: int = USGS_MAX_EVENTS,
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Split a date range into query windows that each stay under the USGS event cap.
+    The range is first cut into window_days chunks; each chunk is sized with the
+    count method and bisected until it fits. Windows already in `completed` are
+    dropped without being counted, so a resumed run only re-plans unfinished work.
+    Args:
+        start (datetime): Range start.
+        end (datetime): Range end.
+        min_magnitude (float): Minimum magnitude.
+        window_days (int): Size of the initial windows.
+        completed (set): (window_start, window_end) pairs already loaded.
+        max_events (int): Maximum events per window.
+    Returns:
+        list: (window_start, window_end) pairs to fetch, in time order.
+    """
+    windows = []
+
+    def plan(window_start: datetime, window_end: datetime) -> None:
+        if (window_start, window_end) in completed:
+            return
+        count = count_earthquakes(window_start, window_end, min_magnitude)
+        if count <= max_events or window_end - window_start <= BACKFILL_MIN_WINDOW:
+            if count > max_events:
+                logger.warning(f"Window {window_start} - {window_end} has {count} events; results will be truncated.")
+            windows.append((window_start, window_end))
+            return
+        middle = window_start + (window_end - window_start) / 2
+        middle = middle.replace(microsecond=0)
+        plan(window_start, middle)
+        plan(middle, window_end)
+
+    cursor_start = start
+    while cursor_start < end:
+        cursor_end = min(cursor_start + timedelta(days=window_days), end)
+        plan(cursor_start, cursor_end)
+        cursor_start = cursor_end
+
+    return windows
+
+
+def _load_window(window_start: datetime, window_end: datetime, min_magnitude: float, batch_size: int) -> LoadResult:
+    """
+    Fetch and load one backfill window on its own connection, then checkpoint it.
+    The rows and the checkpoint are committed in the same transaction.
+    """
+    params = {
+        "format": "geojson",
+        "starttime": window_start.isoformat(),
+        "endtime": window_end.isoformat(),
+        "minmagnitude": min_magnitude
+    }
+    conn = connect_db()
+    try:
+        with conn.cursor() as cursor:
+            result = stream_insert_earthquake_data(stream_query_features(params), cursor, batch_size=batch_size)
+            cursor.execute("""
+                INSERT INTO raw_data.backfill_checkpoints (window_start, window_end, min_magnitude, event_count)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (window_start, window_end, min_magnitude)
+                DO UPDATE SET event_count = EXCLUDED.event_count, completed_at = CURRENT_TIMESTAMP
+            """, (window_start, window_end, min_magnitude, result.inserted + result.updated + result.skipped))
+        conn.commit()
+    finally:
+        conn.close()
+    return result
+
+
+def run_backfill(
+    start: datetime,
+    end: datetime,
+    min_magnitude: float = 4.5,
+    window_days: int = BACKFILL_WINDOW_DAYS,
+    workers: int = BACKFILL_WORKERS,
+    batch_size: int = COPY_BATCH_SIZE,
+) -> Dict:
+    """
+    Backfill a date range using adaptive windows fetched by a bounded worker pool.
+    Completed windows are checkpointed, so re-running the same range resumes
+    where a failed run stopped.
+    Args:
+        start (datetime): Range start.
+        end (datetime): Range end.
+        min_magnitude (float): Minimum magnitude.
+        window_days (int): Size of the initial windows.
+        workers (int): Number of windows fetched and loaded concurrently.
+        batch_size (int): Rows per COPY batch.
+    Returns:
+        dict: Window and row counts for the run.
+    """
+    conn = connect_db()
+    try:
+        with conn.cursor() as cursor:
+            ensure_raw_table(cursor)
+            ensure_partitions_for_range(cursor, start, end)
+            ensure_checkpoint_table(cursor)
+            completed = _completed_windows(cursor, start, end, min_magnitude)
+        conn.commit()
+    finally:
+        conn.close()
+
+    windows = plan_backfill_windows(start, end, min_magnitude, window_days=window_days, completed=completed)
+    logger.info(f"Backfill {start} - {end}: {len(windows)} windows to load, {len(completed)} already completed.")
+
+    summary = {"windows": len(windows), "failed": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_load_window, window_start, window_end, min_magnitude, batch_size): (window_start, window_end)
+            for window_start, window_end in windows
+        }
+        for future in as_completed(futures):
+            window_start, window_end = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                logger.exception(f"Backfill window {window_start} - {window_end} failed.")
+                summary["failed"] += 1
+                continue
+            summary["inserted"] += result.inserted
+            summary["updated"] += result.updated
+            summary["skipped"] += result.skipped
+
+    logger.info(f"Backfill finished: {summary}")
+    if summary["failed"]:
+        raise RuntimeError(f"{summary['failed']} backfill windows failed; re-run to resume.")
+    return summary
+
+
+def run_backfill_from_context(**context) -> Dict:
+    """
+    Run a backfill using the DAG run conf (start_date, end_date, min_magnitude,
+    window_days, workers).
+    """
+    dag_conf = context["dag_run"].conf or {}
+    params = build_query_params(**context)
+    return run_backfill(
+        start=datetime.fromisoformat(params["starttime"]),
+        end=datetime.fromisoformat(params["endtime"]),
+        min_magnitude=params["minmagnitude"],
+        window_days=int(dag_conf.get("window_days", BACKFILL_WINDOW_DAYS)),
+        workers=int(dag_conf.get("workers", BACKFILL_WORKERS)),
+    )
 
 
 def main():
@@ -126,22 +1332,60 @@ def main():
     parser = argparse.ArgumentParser(description="Fetch and store earthquake data from USGS API.")
     parser.add_argument("--days-back", type=int, default=7, help="Number of past days to fetch data for.")
     parser.add_argument("--min-magnitude", type=float, default=4.5, help="Minimum earthquake magnitude to include.")
+    parser.add_argument("--batch-size", type=int, default=COPY_BATCH_SIZE, help="Rows per COPY batch.")
+    parser.add_argument("--incremental", action="store_true", help="Only fetch events updated since the stored watermark.")
+    parser.add_argument("--backfill", action="store_true", help="Load --start-date to --end-date in checkpointed windows.")
+    parser.add_argument("--start-date", help="Backfill start date (YYYY-MM-DD).")
+    parser.add_argument("--end-date", help="Backfill end date (YYYY-MM-DD).")
+    parser.add_argument("--window-days", type=int, default=BACKFILL_WINDOW_DAYS, help="Initial backfill window size.")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="Concurrent backfill windows.")
+    parser.add_argument("--detach-before", help="Detach raw_earthquakes partitions for months before YYYY-MM and exit.")
+    parser.add_argument("--compact-raw-json", action="store_true", help="Move stored raw_json to the cold payload table and exit.")
+    parser.add_argument("--fetch-cache-stats", action="store_true", help="Print fetch cache hit/miss counts and exit.")
     args = parser.parse_args()
 
+    if args.fetch_cache_stats:
+        print(json.dumps(fetch_cache_stats()))
+        return
+
+    if args.backfill:
+        if not args.start_date or not args.end_date:
+            parser.error("--backfill requires --start-date and --end-date")
+        run_backfill(
+            start=datetime.fromisoformat(args.start_date),
+            end=datetime.fromisoformat(args.end_date),
+            min_magnitude=args.min_magnitude,
+            window_days=args.window_days,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        )
+        return
+
     try:
         logger.info("Connecting to Postgres database...")
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASS,
-            host=DB_HOST,
-            port=DB_PORT
-        )
+        conn = connect_db()
         cursor = conn.cursor()
+        ensure_raw_table(cursor)
+
+        if args.detach_before:
+            detach_partitions_before(cursor, datetime.strptime(args.detach_before, "%Y-%m"))
+            conn.commit()
+            return
+
+        if args.compact_raw_json:
+            compact_raw_json(cursor, batch_size=args.batch_size)
+            conn.commit()
+            return
 
-        # Fetch and insert
-        earthquake_data = fetch_earthquake_data(days_back=args.days_back, min_magnitude=args.min_magnitude)
-        insert_earthquake_data(earthquake_data, cursor)
+        # Stream features from USGS straight into the bulk loader
+        if args.incremental:
+            params, watermark = build_incremental_params(cursor, min_magnitude=args.min_magnitude)
+            result = stream_insert_earthquake_data(stream_query_features(params), cursor, batch_size=args.batch_size)
+            if result.max_updated_ms is not None:
+                set_watermark(cursor, watermark, result.max_updated_ms)
+        else:
+            features = stream_earthquake_features(days_back=args.days_back, min_magnitude=args.min_magnitude)
+            stream_insert_earthquake_data(features, cursor, batch_size=args.batch_size)
 
         conn.commit()
         logger.info("✅ Data committed to the database.")
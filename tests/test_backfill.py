@@ -0,0 +1,86 @@
+"""
+Backfill window planning with the USGS count method stubbed out.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import fetch_usgs_data
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 4, 1)
+# A swarm dense enough that any window touching it must be split repeatedly
+SWARM = (datetime(2024, 2, 10), datetime(2024, 2, 12))
+
+
+def synthetic_count(start, end, min_magnitude):
+    """1,000 events a day, plus 50,000 spread over the swarm."""
+    days = (end - start) / timedelta(days=1)
+    overlap = max(timedelta(0), min(end, SWARM[1]) - max(start, SWARM[0]))
+    return int(days * 1000 + overlap / (SWARM[1] - SWARM[0]) * 50000)
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    calls = []
+
+    def count_earthquakes(start, end, min_magnitude):
+        calls.append((start, end))
+        return synthetic_count(start, end, min_magnitude)
+
+    monkeypatch.setattr(fetch_usgs_data, "count_earthquakes", count_earthquakes)
+    return calls
+
+
+def assert_tiles(windows, start, end):
+    """Windows are in order and cover [start, end) with no gap or overlap."""
+    assert windows[0][0] == start
+    assert windows[-1][1] == end
+    for (_, previous_end), (next_start, _) in zip(windows, windows[1:]):
+        assert previous_end == next_start
+    assert all(window_start < window_end for window_start, window_end in windows)
+
+
+def test_windows_over_the_cap_are_bisected(counts):
+    windows = fetch_usgs_data.plan_backfill_windows(START, END, 2.5, window_days=30, max_events=20000)
+
+    assert_tiles(windows, START, END)
+    assert all(synthetic_count(s, e, 2.5) <= 20000 for s, e in windows)
+    # Quiet 30-day chunks (30,000 events) are halved once; the swarm is split finer
+    assert (START, START + timedelta(days=15)) in windows
+    assert min(e - s for s, e in windows) < timedelta(days=1)
+    # Split points land on whole seconds, as the USGS query expects
+    assert all(s.microsecond == 0 and e.microsecond == 0 for s, e in windows)
+
+
+def test_windows_under_the_cap_are_counted_once(counts):
+    windows = fetch_usgs_data.plan_backfill_windows(START, END, 2.5, window_days=10, max_events=20000)
+    # Only the 10-day chunk holding the swarm (Feb 10 - Feb 20) needs splitting
+    swarm_chunk = (datetime(2024, 2, 10), datetime(2024, 2, 20))
+    quiet = [(s, e) for s, e in windows if e <= swarm_chunk[0] or s >= swarm_chunk[1]]
+    assert all(e - s == timedelta(days=10) or e == END for s, e in quiet)
+    assert len(counts) == len(set(counts))
+
+
+def test_uneven_splits_keep_whole_seconds(counts):
+    start = datetime(2024, 1, 1)
+    end = start + timedelta(days=1, seconds=1)
+    windows = fetch_usgs_data.plan_backfill_windows(start, end, 2.5, window_days=2, max_events=400)
+    assert_tiles(windows, start, end)
+    assert all(synthetic_count(s, e, 2.5) <= 400 for s, e in windows)
+
+
+def test_completed_windows_are_skipped_without_counting(counts):
+    completed = {(START, START + timedelta(days=15))}
+    windows = fetch_usgs_data.plan_backfill_windows(
+        START, START + timedelta(days=30), 2.5, window_days=30, completed=completed, max_events=20000
+    )
+    assert windows == [(START + timedelta(days=15), START + timedelta(days=30))]
+    assert (START, START + timedelta(days=15)) not in counts
+
+
+def test_bisection_stops_at_the_minimum_window(counts, monkeypatch):
+    monkeypatch.setattr(fetch_usgs_data, "count_earthquakes", lambda start, end, min_magnitude: 10**9)
+    windows = fetch_usgs_data.plan_backfill_windows(START, START + timedelta(hours=1), 2.5, window_days=1)
+    assert_tiles(windows, START, START + timedelta(hours=1))
+    assert all(e - s <= fetch_usgs_data.BACKFILL_MIN_WINDOW for s, e in windows)
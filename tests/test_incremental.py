@@ -0,0 +1,105 @@
+"""
+Watermark-driven incremental runs: query parameters and watermark updates.
+
+The watermark tests run only when TEST_DATABASE_URL is set, inside a
+transaction that is rolled back.
+"""
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import fetch_usgs_data
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+needs_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+class FakeCursor:
+    """Answers get_watermark with a fixed mark and ignores DDL."""
+
+    def __init__(self, high_water_mark):
+        self._high_water_mark = high_water_mark
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return (self._high_water_mark,) if self._high_water_mark else None
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    """Stub the USGS count method, recording the params it was asked about."""
+    calls = SimpleNamespace(params=[], count=10)
+
+    def count_query(params):
+        calls.params.append(params)
+        return calls.count
+
+    monkeypatch.setattr(fetch_usgs_data, "count_query", count_query)
+    return calls
+
+
+def test_first_run_fetches_the_default_window(counted):
+    params, name = fetch_usgs_data.build_incremental_params(FakeCursor(None), min_magnitude=5.0)
+    assert "updatedafter" not in params
+    assert params["minmagnitude"] == 5.0
+    assert name == fetch_usgs_data.watermark_name(5.0)
+
+
+def test_watermark_selects_updatedafter_and_lookback(counted):
+    high_water_mark = datetime(2024, 6, 15, 12, 30, 45, 123000)
+    params, name = fetch_usgs_data.build_incremental_params(FakeCursor(high_water_mark), min_magnitude=4.5)
+
+    assert params["updatedafter"] == "2024-06-15T12:30:45.123"
+    lookback = high_water_mark - timedelta(days=fetch_usgs_data.INCREMENTAL_LOOKBACK_DAYS)
+    assert params["starttime"] == lookback.strftime("%Y-%m-%d")
+    assert "endtime" not in params
+    assert name == fetch_usgs_data.watermark_name(4.5)
+    assert counted.params == [params]
+
+
+def test_explicit_dates_bypass_the_watermark(counted):
+    dag_run = SimpleNamespace(conf={"start_date": "2024-01-01", "end_date": "2024-02-01"})
+    params, name = fetch_usgs_data.build_incremental_params(FakeCursor(datetime(2024, 6, 1)), dag_run=dag_run)
+    assert name is None
+    assert (params["starttime"], params["endtime"]) == ("2024-01-01", "2024-02-01")
+    assert "updatedafter" not in params
+
+
+def test_refuses_queries_over_the_usgs_limit(counted):
+    counted.count = fetch_usgs_data.USGS_MAX_EVENTS + 1
+    with pytest.raises(RuntimeError, match="USGS limit"):
+        fetch_usgs_data.build_incremental_params(FakeCursor(datetime(2024, 6, 1)), min_magnitude=2.5)
+
+
+@pytest.fixture
+def cursor():
+    import psycopg2
+
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with conn.cursor() as cursor:
+            fetch_usgs_data.ensure_watermark_table(cursor)
+            yield cursor
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@needs_db
+def test_watermark_never_moves_backwards(cursor):
+    name = "test_watermark"
+    newer = datetime(2024, 6, 15, 12, 0)
+    fetch_usgs_data.set_watermark(cursor, name, int((newer - datetime(1970, 1, 1)).total_seconds() * 1000))
+    assert fetch_usgs_data.get_watermark(cursor, name) == newer
+
+    older = newer - timedelta(days=1)
+    fetch_usgs_data.set_watermark(cursor, name, int((older - datetime(1970, 1, 1)).total_seconds() * 1000))
+    assert fetch_usgs_data.get_watermark(cursor, name) == newer
+
+    latest = newer + timedelta(seconds=1)
+    fetch_usgs_data.set_watermark(cursor, name, int((latest - datetime(1970, 1, 1)).total_seconds() * 1000))
+    assert fetch_usgs_data.get_watermark(cursor, name) == latest
@@ -0,0 +1,129 @@
+"""
+Month partition maintenance and the legacy table migration against a real Postgres.
+
+Runs only when TEST_DATABASE_URL is set. Everything happens in one transaction
+that is rolled back, so the database is left as it was.
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+import fetch_usgs_data
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def conn():
+    import psycopg2
+
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def cursor(conn):
+    with conn.cursor() as cursor:
+        fetch_usgs_data.ensure_raw_table(cursor)
+        yield cursor
+
+
+def attached_partitions(cursor):
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'raw_data.raw_earthquakes'::regclass
+    """)
+    return {name for (name,) in cursor.fetchall()}
+
+
+def test_ensure_month_partitions_is_idempotent_across_a_year_boundary(cursor):
+    fetch_usgs_data.ensure_partitions_for_range(cursor, datetime(1901, 12, 15), datetime(1902, 1, 10))
+    before = attached_partitions(cursor)
+    assert {"raw_earthquakes_p1901_12", "raw_earthquakes_p1902_01"} <= before
+
+    # Second call, and timestamps anywhere inside the months, issue no DDL
+    fetch_usgs_data.ensure_month_partitions(cursor, [datetime(1901, 12, 31, 23, 59), datetime(1902, 1, 1)])
+    assert attached_partitions(cursor) == before
+
+    cursor.execute(
+        "INSERT INTO raw_data.raw_earthquakes (id, time) VALUES ('test-dec', %s), ('test-jan', %s)",
+        (datetime(1901, 12, 31, 23, 59, 59), datetime(1902, 1, 1)),
+    )
+    cursor.execute("SELECT id, tableoid::regclass::text FROM raw_data.raw_earthquakes WHERE id LIKE 'test-%%' ORDER BY id")
+    assert cursor.fetchall() == [
+        ("test-dec", "raw_data.raw_earthquakes_p1901_12"),
+        ("test-jan", "raw_data.raw_earthquakes_p1902_01"),
+    ]
+
+
+def test_detach_partitions_before_keeps_later_months(cursor):
+    fetch_usgs_data.ensure_partitions_for_range(cursor, datetime(1901, 11, 1), datetime(1902, 1, 1))
+    detached = fetch_usgs_data.detach_partitions_before(cursor, datetime(1902, 1, 20))
+    assert {"raw_earthquakes_p1901_11", "raw_earthquakes_p1901_12"} <= set(detached)
+    assert all(name < "raw_earthquakes_p1902_01" for name in detached)
+
+    attached = attached_partitions(cursor)
+    assert "raw_earthquakes_p1902_01" in attached
+    assert not attached & set(detached)
+
+    # A detached month is a standalone table and is never silently recreated
+    cursor.execute("SELECT to_regclass('raw_data.raw_earthquakes_p1901_12')")
+    assert cursor.fetchone()[0] is not None
+    with pytest.raises(RuntimeError, match="detached"):
+        fetch_usgs_data.ensure_month_partitions(cursor, [datetime(1901, 12, 5)])
+
+
+def test_legacy_table_is_migrated_and_null_times_quarantined(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE SCHEMA IF NOT EXISTS raw_data")
+        cursor.execute("DROP TABLE IF EXISTS raw_data.raw_earthquakes CASCADE")
+        cursor.execute("DROP TABLE IF EXISTS raw_data.raw_earthquakes_null_time")
+        # The layout created by earlier versions: a heap table keyed on id, without `updated`
+        cursor.execute("""
+            CREATE TABLE raw_data.raw_earthquakes (
+                id TEXT PRIMARY KEY,
+                time TIMESTAMP,
+                place TEXT,
+                magnitude FLOAT,
+                longitude FLOAT,
+                latitude FLOAT,
+                depth_km FLOAT,
+                url TEXT,
+                raw_json JSONB,
+                inserted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO raw_data.raw_earthquakes (id, time, magnitude) VALUES
+                ('test-old', '1901-12-31 23:00', 4.0),
+                ('test-new', '1902-01-01 01:00', 5.0),
+                ('test-null', NULL, 6.0)
+        """)
+
+        fetch_usgs_data.ensure_raw_table(cursor)
+
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = 'raw_data.raw_earthquakes'::regclass")
+        assert cursor.fetchone()[0] == "p"
+        cursor.execute("SELECT id, tableoid::regclass::text FROM raw_data.raw_earthquakes ORDER BY id")
+        assert cursor.fetchall() == [
+            ("test-new", "raw_data.raw_earthquakes_p1902_01"),
+            ("test-old", "raw_data.raw_earthquakes_p1901_12"),
+        ]
+        cursor.execute("SELECT id, magnitude FROM raw_data.raw_earthquakes_null_time")
+        assert cursor.fetchall() == [("test-null", 6.0)]
+        cursor.execute("SELECT to_regclass('raw_data.raw_earthquakes_unpartitioned')")
+        assert cursor.fetchone()[0] is None
+
+        # A second run finds the partitioned table and leaves it alone
+        fetch_usgs_data.ensure_raw_table(cursor)
+        cursor.execute("SELECT COUNT(*) FROM raw_data.raw_earthquakes")
+        assert cursor.fetchone()[0] == 2
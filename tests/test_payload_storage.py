@@ -0,0 +1,103 @@
+"""
+Raw payload encodings for each RAW_JSON_STORAGE mode and their COPY text form.
+
+The COPY round trip runs only when TEST_DATABASE_URL is set, inside a
+transaction that is rolled back.
+"""
+import json
+import os
+import zlib
+
+import pytest
+
+import fetch_usgs_data
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+needs_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+def feature(event_id: str = "test-p", updated_ms: int = 1000) -> dict:
+    return {
+        "type": "Feature",
+        "id": event_id,
+        "properties": {
+            "mag": 4.5, "place": "Test", "time": 1700000000000, "updated": updated_ms,
+            "url": "https://example.com", "type": "earthquake", "sig": 312, "tsunami": 0, "magType": "mw",
+            "net": "us", "status": "reviewed", "detail": "tab\there\nnewline \\ backslash",
+        },
+        "geometry": {"type": "Point", "coordinates": [10.0, 20.0, 5.0]},
+    }
+
+
+def test_prune_feature_keeps_only_unpromoted_properties():
+    pruned = fetch_usgs_data.prune_feature(feature())
+    assert pruned == {"properties": {"net": "us", "status": "reviewed", "detail": "tab\there\nnewline \\ backslash"}}
+    assert fetch_usgs_data.prune_feature({"id": "test-empty"}) == {"properties": {}}
+
+
+def test_payload_columns_per_storage_mode():
+    f = feature()
+    for storage in ("inline", "cold"):
+        raw_json, payload_zlib = fetch_usgs_data._payload_columns(f, storage)
+        assert json.loads(raw_json) == f
+        assert payload_zlib is None
+
+    raw_json, payload_zlib = fetch_usgs_data._payload_columns(f, "cold_pruned")
+    assert json.loads(raw_json) == fetch_usgs_data.prune_feature(f)
+    assert payload_zlib is None
+
+    raw_json, payload_zlib = fetch_usgs_data._payload_columns(f, "cold_compressed")
+    assert raw_json is None
+    assert json.loads(zlib.decompress(payload_zlib)) == fetch_usgs_data.prune_feature(f)
+
+
+def test_copy_field_text_encoding():
+    assert fetch_usgs_data._copy_field(None) == "\\N"
+    assert fetch_usgs_data._copy_field(4.5) == "4.5"
+    assert fetch_usgs_data._copy_field("a\tb\nc\rd\\e") == "a\\tb\\nc\\rd\\\\e"
+    # bytea hex input, with the backslash escaped once more for COPY text format
+    assert fetch_usgs_data._copy_field(b"\x00\xff\\") == "\\\\x00ff5c"
+    assert fetch_usgs_data._copy_field(b"") == "\\\\x"
+
+
+@pytest.fixture
+def cursor():
+    import psycopg2
+
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with conn.cursor() as cursor:
+            fetch_usgs_data.ensure_raw_table(cursor)
+            yield cursor
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@needs_db
+@pytest.mark.parametrize("storage", ["inline", "cold", "cold_pruned", "cold_compressed"])
+def test_payload_survives_copy(cursor, monkeypatch, storage):
+    monkeypatch.setattr(fetch_usgs_data, "RAW_JSON_STORAGE", storage)
+    f = feature(f"test-{storage}")
+    fetch_usgs_data.stream_insert_earthquake_data(iter([f]), cursor)
+
+    cursor.execute("SELECT raw_json, event_type, sig, mag_type FROM raw_data.raw_earthquakes WHERE id = %s", (f["id"],))
+    raw_json, event_type, sig, mag_type = cursor.fetchone()
+    assert (event_type, sig, mag_type) == ("earthquake", 312, "mw")
+
+    cursor.execute("SELECT payload, payload_zlib FROM raw_data.raw_earthquake_payloads WHERE id = %s", (f["id"],))
+    payload_row = cursor.fetchone()
+    if storage == "inline":
+        assert raw_json == f
+        assert payload_row is None
+        return
+
+    assert raw_json is None
+    payload, payload_zlib = payload_row
+    if storage == "cold":
+        assert payload == f
+    elif storage == "cold_pruned":
+        assert payload == fetch_usgs_data.prune_feature(f)
+    else:
+        assert payload is None
+        assert json.loads(zlib.decompress(bytes(payload_zlib))) == fetch_usgs_data.prune_feature(f)
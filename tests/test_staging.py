@@ -0,0 +1,147 @@
+"""
+Staging file handoff between the fetch and load tasks, with USGS stubbed out.
+"""
+import gzip
+import json
+import os
+
+import pytest
+
+import fetch_usgs_data
+
+
+def feature(event_id: str, mag: float = 4.5) -> dict:
+    return {
+        "type": "Feature",
+        "id": event_id,
+        "properties": {"mag": mag, "place": "Test", "time": 1700000000000, "updated": 1700000000000},
+        "geometry": {"type": "Point", "coordinates": [10.0, 20.0, 5.0]},
+    }
+
+
+class FakeResponse:
+    """Streams a GeoJSON body in small chunks, like requests with stream=True."""
+
+    def __init__(self, features=(), status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = json.dumps({"type": "FeatureCollection", "features": list(features)}).encode("utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), 7):
+            yield self._body[i:i + 7]
+
+
+@pytest.fixture
+def usgs(monkeypatch, tmp_path):
+    """Stub requests.get; queue responses on .responses and inspect .headers."""
+    monkeypatch.setattr(fetch_usgs_data, "FETCH_CACHE_DIR", str(tmp_path / "cache"))
+
+    class Usgs:
+        responses = []
+        headers = []
+
+    def get(url, params=None, headers=None, stream=False):
+        Usgs.headers.append(headers or {})
+        return Usgs.responses.pop(0)
+
+    monkeypatch.setattr(fetch_usgs_data.requests, "get", get)
+    return Usgs
+
+
+def test_staging_file_round_trip(tmp_path):
+    features = [feature("test-a"), feature("test-b", mag=5.1)]
+    staged = fetch_usgs_data.write_staging_file(iter(features), str(tmp_path / "staged" / "batch.ndjson.gz"))
+
+    assert staged["count"] == 2
+    assert staged["sha256"] == fetch_usgs_data.file_sha256(staged["path"])
+    assert not (tmp_path / "staged" / "batch.ndjson.gz.tmp").exists()
+    assert list(fetch_usgs_data.read_staging_file(staged["path"], sha256=staged["sha256"])) == features
+
+
+def test_corrupted_staging_file_is_rejected_before_any_feature(tmp_path):
+    path = str(tmp_path / "batch.ndjson.gz")
+    staged = fetch_usgs_data.write_staging_file(iter([feature("test-a")]), path)
+    # Still valid gzip NDJSON, just not the file that was staged
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(feature("test-x")) + "\n")
+
+    features = fetch_usgs_data.read_staging_file(path, sha256=staged["sha256"])
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        next(features)
+
+
+def test_fetch_to_staging_file_round_trip(usgs, tmp_path):
+    features = [feature("test-a"), feature("test-b")]
+    usgs.responses.append(FakeResponse(features, headers={"ETag": '"v1"'}))
+    path = str(tmp_path / "batch.ndjson.gz")
+
+    staged = fetch_usgs_data.fetch_to_staging_file({"starttime": "2024-01-01"}, path)
+
+    assert staged["count"] == 2
+    assert staged["cache"]["etag"] == '"v1"'
+    assert list(fetch_usgs_data.read_staging_file(path, sha256=staged["sha256"])) == features
+
+
+def test_loaded_content_is_not_staged_again(usgs, tmp_path):
+    params = {"starttime": "2024-01-01"}
+    path = str(tmp_path / "batch.ndjson.gz")
+    usgs.responses.append(FakeResponse([feature("test-a")], headers={"ETag": '"v1"'}))
+    staged = fetch_usgs_data.fetch_to_staging_file(params, path)
+    fetch_usgs_data.mark_fetch_cache_loaded(staged["cache"])
+
+    # Same features under a new ETag: hashed content matches, nothing to load
+    usgs.responses.append(FakeResponse([feature("test-a")], headers={"ETag": '"v2"'}))
+    assert fetch_usgs_data.fetch_to_staging_file(params, path) == {"unchanged": True, "count": 0}
+    assert usgs.headers[-1] == {"If-None-Match": '"v1"'}
+    assert not (tmp_path / "batch.ndjson.gz").exists()
+
+    usgs.responses.append(FakeResponse(status_code=304))
+    assert fetch_usgs_data.fetch_to_staging_file(params, path) == {"unchanged": True, "count": 0}
+
+    # Revised content is staged
+    usgs.responses.append(FakeResponse([feature("test-a", mag=5.0)]))
+    assert fetch_usgs_data.fetch_to_staging_file(params, path)["count"] == 1
+
+
+def test_incremental_runs_share_a_cache_key():
+    first = {"format": "geojson", "minmagnitude": 4.5, "starttime": "2024-03-01", "updatedafter": "2024-06-01T00:00:00.000"}
+    second = {**first, "starttime": "2024-03-02", "updatedafter": "2024-06-02T00:00:00.000"}
+    assert fetch_usgs_data.fetch_cache_key(first) == fetch_usgs_data.fetch_cache_key(second)
+    assert fetch_usgs_data.fetch_cache_key(first) != fetch_usgs_data.fetch_cache_key({**first, "minmagnitude": 5.0})
+
+    # Explicit windows are keyed on their dates
+    window = {"format": "geojson", "starttime": "2024-01-01", "endtime": "2024-02-01"}
+    assert fetch_usgs_data.fetch_cache_key(window) != fetch_usgs_data.fetch_cache_key({**window, "starttime": "2024-01-02"})
+
+
+def test_incremental_run_hits_the_previous_runs_entry(usgs, tmp_path):
+    path = str(tmp_path / "batch.ndjson.gz")
+    params = {"minmagnitude": 4.5, "starttime": "2024-03-01", "updatedafter": "2024-06-01T00:00:00.000"}
+    usgs.responses.append(FakeResponse([feature("test-a")], headers={"ETag": '"v1"'}))
+    fetch_usgs_data.mark_fetch_cache_loaded(fetch_usgs_data.fetch_to_staging_file(params, path)["cache"])
+
+    usgs.responses.append(FakeResponse(status_code=304))
+    next_run = {**params, "starttime": "2024-03-02", "updatedafter": "2024-06-02T00:00:00.000"}
+    assert fetch_usgs_data.fetch_to_staging_file(next_run, path) == {"unchanged": True, "count": 0}
+    assert usgs.headers[-1] == {"If-None-Match": '"v1"'}
+    assert fetch_usgs_data.fetch_cache_stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_fetch_cache_stats_only_read_the_log(usgs, tmp_path):
+    assert fetch_usgs_data.fetch_cache_stats() == {"entries": 0, "hits": 0, "misses": 0}
+    for hit in (True, False, True):
+        fetch_usgs_data._count_fetch_cache_result("test-key", hit=hit)
+    assert fetch_usgs_data.fetch_cache_stats() == {"entries": 0, "hits": 2, "misses": 1}
+    # Counting never rewrites cache entries
+    assert not any(name.endswith(".json") for name in os.listdir(tmp_path / "cache"))
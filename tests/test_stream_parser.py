@@ -0,0 +1,42 @@
+"""
+The streaming GeoJSON parser must yield the same features however the body is chunked.
+"""
+import json
+
+import pytest
+
+from fetch_usgs_data import iter_geojson_features
+
+FEATURES = [
+    {
+        "type": "Feature",
+        "id": f"us{i}",
+        # Braces, brackets, quotes and multi-byte characters inside strings
+        "properties": {"mag": 4.5 + i / 10, "place": f'{i} km "N" of Añasco {{[,]}}', "time": 1700000000000 + i},
+        "geometry": {"type": "Point", "coordinates": [-66.9 + i, 18.2, 10.0]},
+    }
+    for i in range(5)
+]
+BODY = json.dumps(
+    {"type": "FeatureCollection", "metadata": {"count": len(FEATURES)}, "features": FEATURES, "bbox": [0, 0, 0]},
+    ensure_ascii=False,
+).encode()
+
+
+def _chunks(data: bytes, size: int):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, len(BODY)])
+def test_features_survive_chunk_boundaries(chunk_size):
+    assert list(iter_geojson_features(_chunks(BODY, chunk_size))) == FEATURES
+
+
+def test_empty_feature_collection():
+    body = b'{"type": "FeatureCollection", "metadata": {}, "features": []}'
+    assert list(iter_geojson_features(_chunks(body, 3))) == []
+
+
+def test_truncated_body_raises():
+    with pytest.raises(ValueError):
+        list(iter_geojson_features(_chunks(BODY[:-40], 16)))